@@ -0,0 +1,503 @@
+import numpy as np
+from cpu import CPU
+from instruction_decoder import InstructionDecoder
+from snapshot import Snapshot
+
+
+class BatchCPU(object):
+    """ Many CHIP-8 machines stepped in lockstep as NumPy arrays
+
+    Machine state is held structure-of-arrays. Every step fetches one
+    opcode per machine, groups the machines by opcode table key and runs
+    each group's handler as array operations with the same semantics as
+    the matching CPU handler. A machine hitting an unknown opcode or an
+    out of range access is marked faulted and no longer stepped, where a
+    single CPU would raise.
+    """
+    UNKNOWN = -1
+    CARRY = 0x0F
+
+    keyCodes = None
+
+    def __init__(self, count, memorySize=4096, width=64, height=32):
+        self.count = count
+        self.memorySize = memorySize
+        self.width = width
+        self.height = height
+        self.rowBytes = width // 8
+
+        self.memory = np.zeros((count, memorySize), dtype=np.uint8)
+        self.screen = np.zeros(
+            (count, height, self.rowBytes), dtype=np.uint8
+        )
+        self.vRegister = np.zeros((count, 16), dtype=np.uint8)
+        self.stack = np.zeros((count, 16), dtype=np.int64)
+        self.programCounter = np.full(count, 0x200, dtype=np.int64)
+        self.indexRegister = np.zeros(count, dtype=np.int64)
+        self.stackPointer = np.zeros(count, dtype=np.int64)
+        self.delayTimer = np.zeros(count, dtype=np.int64)
+        self.soundTimer = np.zeros(count, dtype=np.int64)
+        self.opcode = np.zeros(count, dtype=np.int64)
+        self.waitingRegister = np.full(count, -1, dtype=np.int64)
+        self.randomState = np.full(count, CPU.DEFAULT_SEED, dtype=np.int64)
+        self.keys = np.zeros(count, dtype=np.int64)
+        self.faulted = np.zeros(count, dtype=bool)
+        self.everyMachine = np.arange(count)
+        self.cycles = 0
+
+        self.handlers = {
+            0x00E0: self.executeOpcode00E0,
+            0x00EE: self.executeOpcode00EE,
+            0x1000: self.executeOpcode1NNN,
+            0x2000: self.executeOpcode2NNN,
+            0x3000: self.executeOpcode3XNN,
+            0x4000: self.executeOpcode4XNN,
+            0x5000: self.executeOpcode5XY0,
+            0x6000: self.executeOpcode6XNN,
+            0x7000: self.executeOpcode7XNN,
+            0x8000: self.executeOpcode8XY0,
+            0x8001: self.executeOpcode8XY1,
+            0x8002: self.executeOpcode8XY2,
+            0x8003: self.executeOpcode8XY3,
+            0x8004: self.executeOpcode8XY4,
+            0x8005: self.executeOpcode8XY5,
+            0x8006: self.executeOpcode8XY6,
+            0x8007: self.executeOpcode8XY7,
+            0x800E: self.executeOpcode8XYE,
+            0xA000: self.executeOpcodeANNN,
+            0xB000: self.executeOpcodeBNNN,
+            0xC000: self.executeOpcodeCXNN,
+            0xD000: self.executeOpcodeDXYN,
+            0xE09E: self.executeOpcodeEX9E,
+            0xE0A1: self.executeOpcodeEXA1,
+            0xF007: self.executeOpcodeFX07,
+            0xF00A: self.executeOpcodeFX0A,
+            0xF015: self.executeOpcodeFX15,
+            0xF018: self.executeOpcodeFX18,
+            0xF033: self.executeOpcodeFX33,
+            0xF055: self.executeOpcodeFX55,
+            0xF065: self.executeOpcodeFX65,
+        }
+
+    @classmethod
+    def keyCodeTable(cls):
+        """ Opcode table key of every opcode as an array, -1 if unknown """
+        if cls.keyCodes is None:
+            cls.keyCodes = np.array([
+                cls.UNKNOWN if key is None else key
+                for key in InstructionDecoder.keyTable()
+            ], dtype=np.int64)
+
+        return cls.keyCodes
+
+    def loadRom(self, data, position=0x200):
+        """ Load the same program image into every machine """
+        rom = np.frombuffer(bytes(data), dtype=np.uint8)
+
+        if position < 0 or position + len(rom) > self.memorySize:
+            raise IndexError
+
+        self.memory[:, position:position + len(rom)] = rom
+
+    def restore(self, index, blob):
+        """ Load a CPU snapshot into machine index """
+        fields = Snapshot.HEADER.unpack_from(blob)
+
+        if fields[0] != Snapshot.MAGIC or fields[1] != Snapshot.VERSION:
+            raise ValueError("Unsupported snapshot")
+
+        if fields[2:5] != (self.memorySize, self.width, self.height) or (
+            fields[46] != 1
+        ):
+            raise ValueError("Snapshot does not fit this machine")
+
+        (
+            self.programCounter[index], self.indexRegister[index],
+            self.opcode[index], self.stackPointer[index],
+            self.delayTimer[index], self.soundTimer[index], waiting
+        ) = fields[5:12]
+        self.waitingRegister[index] = (
+            -1 if waiting == Snapshot.NOT_WAITING else waiting
+        )
+        self.randomState[index], self.keys[index] = fields[12:14]
+        self.vRegister[index] = fields[14:30]
+        self.stack[index] = fields[30:46]
+
+        offset = Snapshot.HEADER.size
+        data = np.frombuffer(blob, dtype=np.uint8, offset=offset)
+        self.memory[index] = data[:self.memorySize]
+        self.screen[index] = data[self.memorySize:].reshape(
+            self.height, self.rowBytes
+        )
+        self.faulted[index] = False
+
+    def snapshot(self, index):
+        """ Pack machine index in the format of CPU.snapshot """
+        waiting = int(self.waitingRegister[index])
+        header = Snapshot.HEADER.pack(
+            Snapshot.MAGIC, Snapshot.VERSION,
+            self.memorySize, self.width, self.height,
+            int(self.programCounter[index]), int(self.indexRegister[index]),
+            int(self.opcode[index]), int(self.stackPointer[index]),
+            int(self.delayTimer[index]), int(self.soundTimer[index]),
+            Snapshot.NOT_WAITING if waiting < 0 else waiting,
+            int(self.randomState[index]), int(self.keys[index]),
+            *self.vRegister[index].tolist(), *self.stack[index].tolist(),
+            1, 0x01
+        )
+        return b"".join((
+            header, self.memory[index].tobytes(),
+            self.screen[index].tobytes(),
+        ))
+
+    def run(self, cycles):
+        for cycle in range(cycles):
+            self.step()
+
+    def step(self):
+        """ Execute one instruction on every machine that has not faulted """
+        if self.faulted.any():
+            active = np.flatnonzero(~self.faulted)
+            pc = self.programCounter[active]
+        else:
+            active = self.everyMachine
+            pc = self.programCounter
+
+        outside = pc >= self.memorySize - 1
+
+        if outside.any():
+            self.fault(active[outside])
+            active = active[~outside]
+            pc = pc[~outside]
+
+        opcodes = (self.memory[active, pc].astype(np.int64) << 8)
+        opcodes |= self.memory[active, pc + 1]
+        self.opcode[active] = opcodes
+        keys = self.keyCodeTable()[opcodes]
+
+        # Machines in lockstep share one key and need no grouping
+        if len(keys) and (keys == keys[0]).all():
+            self.executeGroup(int(keys[0]), active, opcodes)
+        else:
+            for key in np.unique(keys).tolist():
+                group = keys == key
+                self.executeGroup(key, active[group], opcodes[group])
+
+        self.cycles += 1
+
+    def executeGroup(self, key, machines, opcodes):
+        handler = self.handlers.get(key)
+
+        if handler is None:
+            self.fault(machines)
+        else:
+            handler(machines, opcodes)
+
+    def pressKey(self, key):
+        """ Hold key down on every machine, completing pending FX0As """
+        self.keys |= 1 << key
+        waiting = np.flatnonzero(self.waitingRegister >= 0)
+        self.vRegister[waiting, self.waitingRegister[waiting]] = key
+        self.waitingRegister[waiting] = -1
+        self.programCounter[waiting] += 2
+
+    def releaseKey(self, key):
+        self.keys &= ~(1 << key)
+
+    def decrementTimers(self):
+        """ Count every machine's timers down by one 60 Hz tick """
+        np.subtract(self.delayTimer, 1, out=self.delayTimer,
+                    where=self.delayTimer > 0)
+        np.subtract(self.soundTimer, 1, out=self.soundTimer,
+                    where=self.soundTimer > 0)
+
+    def fault(self, machines):
+        self.faulted[machines] = True
+
+    def operands(self, opcodes):
+        return (opcodes >> 8) & 0x0F, (opcodes >> 4) & 0x0F
+
+    def skipIf(self, machines, condition):
+        self.programCounter[machines] += np.where(condition, 4, 2)
+
+    def executeOpcode00E0(self, machines, opcodes):
+        """ Clear screen """
+        self.screen[machines] = 0
+        self.programCounter[machines] += 2
+
+    def executeOpcode00EE(self, machines, opcodes):
+        """ Return from function """
+        underflow = self.stackPointer[machines] == 0
+        self.fault(machines[underflow])
+        machines = machines[~underflow]
+
+        self.stackPointer[machines] -= 1
+        self.programCounter[machines] = (
+            self.stack[machines, self.stackPointer[machines]] + 2
+        )
+
+    def executeOpcode1NNN(self, machines, opcodes):
+        """ Jump to address NNN """
+        self.programCounter[machines] = opcodes & 0x0FFF
+
+    def executeOpcode2NNN(self, machines, opcodes):
+        """ Call function at address NNN """
+        overflow = self.stackPointer[machines] >= self.stack.shape[1]
+        self.fault(machines[overflow])
+        machines = machines[~overflow]
+        opcodes = opcodes[~overflow]
+
+        self.stack[machines, self.stackPointer[machines]] = (
+            self.programCounter[machines]
+        )
+        self.stackPointer[machines] += 1
+        self.programCounter[machines] = opcodes & 0x0FFF
+
+    def executeOpcode3XNN(self, machines, opcodes):
+        """ Skip next instruction if VX == NN """
+        x, y = self.operands(opcodes)
+        self.skipIf(machines, self.vRegister[machines, x] == opcodes & 0xFF)
+
+    def executeOpcode4XNN(self, machines, opcodes):
+        """ Skip next instruction if VX != NN """
+        x, y = self.operands(opcodes)
+        self.skipIf(machines, self.vRegister[machines, x] != opcodes & 0xFF)
+
+    def executeOpcode5XY0(self, machines, opcodes):
+        """ Skip next instruction if VX == VY """
+        x, y = self.operands(opcodes)
+        self.skipIf(
+            machines,
+            self.vRegister[machines, x] == self.vRegister[machines, y]
+        )
+
+    def executeOpcode6XNN(self, machines, opcodes):
+        """ Set VX to NN """
+        x, y = self.operands(opcodes)
+        self.vRegister[machines, x] = opcodes & 0xFF
+        self.programCounter[machines] += 2
+
+    def executeOpcode7XNN(self, machines, opcodes):
+        """ Adds NN to VX """
+        x, y = self.operands(opcodes)
+        vx = self.vRegister[machines, x].astype(np.int64)
+        self.vRegister[machines, x] = (vx + (opcodes & 0xFF)) & 0xFF
+        self.programCounter[machines] += 2
+
+    def executeArithmetic(self, machines, opcodes, operation):
+        """ Apply operation(vx, vy) -> (vx, carry or None) to each group """
+        x, y = self.operands(opcodes)
+        vx = self.vRegister[machines, x].astype(np.int64)
+        vy = self.vRegister[machines, y].astype(np.int64)
+        result, carry = operation(vx, vy)
+        self.vRegister[machines, x] = result & 0xFF
+
+        # VF gets the carry last, as in the CPU handlers
+        if carry is not None:
+            self.vRegister[machines, self.CARRY] = carry
+
+        self.programCounter[machines] += 2
+
+    def executeOpcode8XY0(self, machines, opcodes):
+        """ Set VX to VY """
+        self.executeArithmetic(machines, opcodes, lambda vx, vy: (vy, None))
+
+    def executeOpcode8XY1(self, machines, opcodes):
+        """ Set VX to VX OR VY """
+        self.executeArithmetic(
+            machines, opcodes, lambda vx, vy: (vx | vy, None)
+        )
+
+    def executeOpcode8XY2(self, machines, opcodes):
+        """ Set VX to VX AND VY """
+        self.executeArithmetic(
+            machines, opcodes, lambda vx, vy: (vx & vy, None)
+        )
+
+    def executeOpcode8XY3(self, machines, opcodes):
+        """ Set VX to VX XOR VY """
+        self.executeArithmetic(
+            machines, opcodes, lambda vx, vy: (vx ^ vy, None)
+        )
+
+    def executeOpcode8XY4(self, machines, opcodes):
+        """ Add VY to VX with carry in VF """
+        self.executeArithmetic(
+            machines, opcodes, lambda vx, vy: (vx + vy, vx + vy > 0xFF)
+        )
+
+    def executeOpcode8XY5(self, machines, opcodes):
+        """ Subtract VY from VX with borrow in VF """
+        self.executeArithmetic(
+            machines, opcodes, lambda vx, vy: (vx - vy, vx - vy > 0)
+        )
+
+    def executeOpcode8XY6(self, machines, opcodes):
+        """ Shift VX right by 1. Set VF to LSB of VX """
+        x, y = self.operands(opcodes)
+        vx = self.vRegister[machines, x].astype(np.int64)
+
+        # VF is written first here, so a shifted VF wins
+        self.vRegister[machines, self.CARRY] = vx & 0x01
+        self.vRegister[machines, x] = vx >> 1
+        self.programCounter[machines] += 2
+
+    def executeOpcode8XY7(self, machines, opcodes):
+        """ Set VX to VY - VX with borrow in VF """
+        self.executeArithmetic(
+            machines, opcodes, lambda vx, vy: (vy - vx, vy - vx > 0)
+        )
+
+    def executeOpcode8XYE(self, machines, opcodes):
+        """ Shift VX left by 1. Set VF to MSB of VX """
+        self.executeArithmetic(
+            machines, opcodes, lambda vx, vy: (vx << 1, vx >> 7)
+        )
+
+    def executeOpcodeANNN(self, machines, opcodes):
+        """ Set index register to NNN """
+        self.indexRegister[machines] = opcodes & 0x0FFF
+        self.programCounter[machines] += 2
+
+    def executeOpcodeBNNN(self, machines, opcodes):
+        """ Jump to address NNN + V0 """
+        self.programCounter[machines] = (
+            (opcodes & 0x0FFF) + self.vRegister[machines, 0]
+        )
+
+    def executeOpcodeCXNN(self, machines, opcodes):
+        """ Set VX to a random byte AND NN """
+        x, y = self.operands(opcodes)
+        state = self.randomState[machines]
+        state ^= (state << 13) & 0xFFFFFFFF
+        state ^= state >> 17
+        state ^= (state << 5) & 0xFFFFFFFF
+        self.randomState[machines] = state
+        self.vRegister[machines, x] = (state >> 24) & opcodes & 0xFF
+        self.programCounter[machines] += 2
+
+    def executeOpcodeDXYN(self, machines, opcodes):
+        """ Draw N-byte sprite from I at VX, VY. Set VF on collision """
+        x, y = self.operands(opcodes)
+        rows = opcodes & 0x0F
+        index = self.indexRegister[machines]
+        outside = index + rows > self.memorySize
+        self.fault(machines[outside])
+        keep = ~outside
+        machines, x, y, rows, index = (
+            machines[keep], x[keep], y[keep], rows[keep], index[keep]
+        )
+
+        left = self.vRegister[machines, x].astype(np.int64) % self.width
+        top = self.vRegister[machines, y].astype(np.int64) % self.height
+        shift = left & 0x07
+        column = left >> 3
+        spill = column + 1
+        collision = np.zeros(len(machines), dtype=bool)
+
+        for row in range(int(rows.max(initial=0))):
+            line = top + row
+            drawn = (row < rows) & (line < self.height)
+            sprite = np.zeros(len(machines), dtype=np.int64)
+            sprite[drawn] = self.memory[
+                machines[drawn], index[drawn] + row
+            ]
+            line = np.minimum(line, self.height - 1)
+
+            bits = sprite >> shift
+            old = self.screen[machines, line, column]
+            collision |= (old & bits) != 0
+            self.screen[machines, line, column] = old ^ bits
+
+            spilled = (shift > 0) & (spill < self.rowBytes)
+            target = machines[spilled]
+            spillLine = line[spilled]
+            spillColumn = spill[spilled]
+            bits = (sprite[spilled] << (8 - shift[spilled])) & 0xFF
+            old = self.screen[target, spillLine, spillColumn]
+            collision[spilled] |= (old & bits) != 0
+            self.screen[target, spillLine, spillColumn] = old ^ bits
+
+        self.vRegister[machines, self.CARRY] = collision
+        self.programCounter[machines] += 2
+
+    def keyPressed(self, machines, opcodes):
+        x, y = self.operands(opcodes)
+        key = self.vRegister[machines, x] & 0x0F
+        return (self.keys[machines] >> key) & 1 == 1
+
+    def executeOpcodeEX9E(self, machines, opcodes):
+        """ Skip next instruction if the key in VX is pressed """
+        self.skipIf(machines, self.keyPressed(machines, opcodes))
+
+    def executeOpcodeEXA1(self, machines, opcodes):
+        """ Skip next instruction if the key in VX is not pressed """
+        self.skipIf(machines, ~self.keyPressed(machines, opcodes))
+
+    def executeOpcodeFX07(self, machines, opcodes):
+        """ Set VX to value of delay timer """
+        x, y = self.operands(opcodes)
+        self.vRegister[machines, x] = self.delayTimer[machines]
+        self.programCounter[machines] += 2
+
+    def executeOpcodeFX0A(self, machines, opcodes):
+        """ Wait for a key press and store the key in VX """
+        x, y = self.operands(opcodes)
+        self.waitingRegister[machines] = x
+
+    def executeOpcodeFX15(self, machines, opcodes):
+        """ Set delay timer to value of register VX """
+        x, y = self.operands(opcodes)
+        self.delayTimer[machines] = self.vRegister[machines, x]
+        self.programCounter[machines] += 2
+
+    def executeOpcodeFX18(self, machines, opcodes):
+        """ Set sound timer to value of register VX """
+        x, y = self.operands(opcodes)
+        self.soundTimer[machines] = self.vRegister[machines, x]
+        self.programCounter[machines] += 2
+
+    def checkIndexRange(self, machines, values, length):
+        """ Fault machines whose I + length leaves memory, filter values """
+        outside = self.indexRegister[machines] + length > self.memorySize
+        self.fault(machines[outside])
+        return machines[~outside], values[~outside]
+
+    def executeOpcodeFX33(self, machines, opcodes):
+        """ Store BCD of VX at I, I+1 and I+2 """
+        machines, opcodes = self.checkIndexRange(machines, opcodes, 3)
+        x, y = self.operands(opcodes)
+        vx = self.vRegister[machines, x]
+        index = self.indexRegister[machines]
+        self.memory[machines, index] = vx // 100
+        self.memory[machines, index + 1] = vx // 10 % 10
+        self.memory[machines, index + 2] = vx % 10
+        self.programCounter[machines] += 2
+
+    def executeOpcodeFX55(self, machines, opcodes):
+        """ Store V0 to VX in memory starting at I """
+        x, y = self.operands(opcodes)
+        machines, x = self.checkIndexRange(machines, x, x + 1)
+
+        for register in range(16):
+            stored = x >= register
+            target = machines[stored]
+            self.memory[target, self.indexRegister[target] + register] = (
+                self.vRegister[target, register]
+            )
+
+        self.programCounter[machines] += 2
+
+    def executeOpcodeFX65(self, machines, opcodes):
+        """ Load V0 to VX from memory starting at I """
+        x, y = self.operands(opcodes)
+        machines, x = self.checkIndexRange(machines, x, x + 1)
+
+        for register in range(16):
+            loaded = x >= register
+            target = machines[loaded]
+            self.vRegister[target, register] = self.memory[
+                target, self.indexRegister[target] + register
+            ]
+
+        self.programCounter[machines] += 2
@@ -0,0 +1,148 @@
+import concurrent.futures
+import hashlib
+import time
+from multiprocessing import resource_tracker, shared_memory
+from cpu import CPU
+from memory import Memory
+from scheduler import Scheduler
+from screen import Screen
+
+
+class RunSpec(object):
+    """ One headless run of the ROM at romIndex """
+
+    def __init__(self, romIndex, cycles, inputScript=(), seed=0,
+                 instructionsPerTick=10, engine=CPU.ENGINE_INTERPRETER):
+        self.romIndex = romIndex
+        self.cycles = cycles
+        # (tick, key) presses or (tick, key, pressed) changes, each
+        # applied before that tick runs
+        self.inputScript = tuple(inputScript)
+        # Seeds the CXNN random generator
+        self.seed = seed
+        self.instructionsPerTick = instructionsPerTick
+        self.engine = engine
+
+
+class RunOutcome(object):
+    """ Final state and cost of one RunSpec """
+
+    def __init__(self, specIndex, spec, screenHash, vRegister, indexRegister,
+                 programCounter, cycles, wallTime, error=None):
+        self.specIndex = specIndex
+        self.spec = spec
+        self.screenHash = screenHash
+        self.vRegister = vRegister
+        self.indexRegister = indexRegister
+        self.programCounter = programCounter
+        self.cycles = cycles
+        self.wallTime = wallTime
+        self.error = error
+
+
+class BatchRunner(object):
+    """ Runs ROMs headless across a process pool
+
+    All ROMs are copied once into a shared memory block and workers load
+    them from there, so only the small RunSpec is pickled per task.
+    Outcomes are yielded as runs complete, not in submission order.
+    """
+    MEMORY_SIZE = 4096
+    SCREEN_W = 64
+    SCREEN_H = 32
+    ROM_ADDRESS = 0x200
+
+    def __init__(self, workers=None):
+        self.workers = workers
+
+    def run(self, roms, specs):
+        offsets = []
+        size = 0
+
+        for rom in roms:
+            offsets.append((size, len(rom)))
+            size += len(rom)
+
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+
+        try:
+            for rom, (offset, length) in zip(roms, offsets):
+                block.buf[offset:offset + length] = rom
+
+            with concurrent.futures.ProcessPoolExecutor(
+                self.workers
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        runShared, block.name, offsets[spec.romIndex],
+                        specIndex, spec
+                    )
+                    for specIndex, spec in enumerate(specs)
+                ]
+
+                for future in concurrent.futures.as_completed(futures):
+                    yield future.result()
+        finally:
+            block.close()
+            block.unlink()
+
+
+# Shared memory blocks a worker has attached to, by name
+attachedBlocks = {}
+
+
+def runShared(blockName, romRange, specIndex, spec):
+    """ Worker entry point: run spec on a ROM held in shared memory """
+    block = attachedBlocks.get(blockName)
+
+    if block is None:
+        block = shared_memory.SharedMemory(name=blockName)
+        # The creating process owns the block and unlinks it
+        resource_tracker.unregister(block._name, "shared_memory")
+        attachedBlocks[blockName] = block
+
+    offset, length = romRange
+    return runRom(block.buf[offset:offset + length], specIndex, spec)
+
+
+def runRom(rom, specIndex, spec):
+    """ Run spec on rom in this process and describe the final state """
+    started = time.perf_counter()
+    memory = Memory(BatchRunner.MEMORY_SIZE)
+    screen = Screen(BatchRunner.SCREEN_W, BatchRunner.SCREEN_H)
+    memory.load(BatchRunner.ROM_ADDRESS, rom)
+    cpu = CPU(memory, screen, spec.engine)
+    cpu.seedRandom(spec.seed)
+    scheduler = Scheduler(
+        cpu, spec.instructionsPerTick, Scheduler.MODE_UNTHROTTLED
+    )
+    keys = {}
+
+    for event in spec.inputScript:
+        tick, key = event[:2]
+        pressed = event[2] if len(event) > 2 else True
+        keys.setdefault(tick, []).append((key, pressed))
+
+    error = None
+
+    try:
+        while scheduler.cycles < spec.cycles:
+            for key, pressed in keys.get(scheduler.ticks, ()):
+                if pressed:
+                    cpu.pressKey(key)
+                else:
+                    cpu.releaseKey(key)
+
+            scheduler.instructionsPerTick = min(
+                spec.instructionsPerTick, spec.cycles - scheduler.cycles
+            )
+            scheduler.tick()
+    except Exception as exception:
+        error = repr(exception)
+
+    return RunOutcome(
+        specIndex, spec,
+        hashlib.blake2b(screen.screen, digest_size=16).hexdigest(),
+        list(cpu.vRegister), cpu.indexRegister, cpu.programCounter,
+        scheduler.cycles, time.perf_counter() - started, error
+    )
@@ -0,0 +1,265 @@
+import argparse
+import json
+import platform
+import sys
+import time
+from cpu import CPU
+from instruction_decoder import InstructionDecoder
+from memory import Memory
+from scheduler import Scheduler
+from screen import Screen
+
+
+class Benchmark(object):
+    """ Micro and macro benchmarks of the interpreter, reported as JSON
+
+    Every result is the best of repeat timings, so noise only ever makes
+    a run look slower. Micro results are nanoseconds per call, including
+    the small cost of resetting state between calls; macro results are
+    instructions and frames per second.
+    """
+    VERSION = 1
+    ROM_ADDRESS = 0x200
+    DATA_ADDRESS = 0x300
+
+    # Operand patterns tried in turn until one decodes to the wanted key
+    OPERANDS = [0x0125, 0x0120, 0x0100, 0x0000]
+
+    MACRO_ROMS = {
+        # Count V0 up forever
+        "tightLoop": "7001 1200",
+        # Add, subtract and shift through a few registers
+        "arithmetic": "6107 7001 8014 8125 8206 820e 8317 8233 1202",
+        # Walk a sprite down the screen, one DXYN per pass
+        "draw": "a20a d015 7101 7003 1200 f090 90f0 9000",
+        # Call a subroutine that does a little work and returns
+        "call": "2206 7001 1200 7101 8214 00ee",
+    }
+
+    def __init__(self, repeat=3, number=20000, ticks=300,
+                 instructionsPerTick=100):
+        self.repeat = repeat
+        self.number = number
+        self.ticks = ticks
+        self.instructionsPerTick = instructionsPerTick
+        self.results = {}
+
+    def runAll(self):
+        self.benchmarkOpcodes()
+        self.benchmarkMemory()
+        self.benchmarkScreen()
+        self.benchmarkRoms()
+        return self.report()
+
+    def report(self):
+        return {
+            "version": self.VERSION,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "results": self.results,
+        }
+
+    def record(self, name, value, unit, higherIsBetter):
+        self.results[name] = {
+            "value": value, "unit": unit, "higherIsBetter": higherIsBetter,
+        }
+
+    def best(self, function):
+        """ Shortest of repeat timings of function(), in seconds """
+        timings = []
+
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+
+        return min(timings)
+
+    def recordMicro(self, name, loop):
+        nanoseconds = self.best(loop) * 1e9 / self.number
+        self.record("micro." + name, nanoseconds, "ns/op", False)
+
+    @classmethod
+    def sampleOpcode(cls, key):
+        """ An opcode with non-zero operands that decodes to key """
+        keys = InstructionDecoder.keyTable()
+
+        for operands in cls.OPERANDS:
+            if keys[key | operands] == key:
+                return key | operands
+
+        return key
+
+    def newCpu(self):
+        memory = Memory(4096)
+        screen = Screen(64, 32)
+        return CPU(memory, screen)
+
+    def benchmarkOpcodes(self):
+        """ Fetch, decode and execute each implemented handler """
+        for key, handler in sorted(self.newCpu().opcodeTable.items()):
+            if handler is None:
+                continue
+
+            cpu = self.newCpu()
+            opcode = self.sampleOpcode(key)
+            cpu.memory.setByte(self.ROM_ADDRESS, opcode >> 8)
+            cpu.memory.setByte(self.ROM_ADDRESS + 1, opcode & 0xFF)
+            cpu.indexRegister = self.DATA_ADDRESS
+            cpu.stack[0] = self.ROM_ADDRESS
+            self.recordMicro(
+                "opcode.%04X" % key, self.opcodeLoop(cpu, self.number)
+            )
+
+    @classmethod
+    def opcodeLoop(cls, cpu, number):
+        address = cls.ROM_ADDRESS
+        nextCycle = cpu.nextCycle
+
+        def loop():
+            for _ in range(number):
+                cpu.programCounter = address
+                cpu.stackPointer = 1
+                cpu.waitingRegister = None
+                nextCycle()
+
+        return loop
+
+    def benchmarkMemory(self):
+        memory = Memory(4096)
+        number = self.number
+
+        def getByte():
+            read = memory.getByte
+
+            for position in range(number):
+                read(position & 0xFFF)
+
+        def setByte():
+            write = memory.setByte
+
+            for position in range(number):
+                write(position & 0xFFF, position)
+
+        self.recordMicro("memory.getByte", getByte)
+        self.recordMicro("memory.setByte", setByte)
+
+    def benchmarkScreen(self):
+        screen = Screen(64, 32)
+        number = self.number
+
+        def setPixel():
+            write = screen.setPixel
+
+            for position in range(number):
+                write(position & 0x3F, position >> 6 & 0x1F, position & 1)
+
+        def clear():
+            for position in range(number):
+                screen.screen[position & 0xFF] = 0xFF
+                screen.clear()
+
+        self.recordMicro("screen.setPixel", setPixel)
+        self.recordMicro("screen.clear", clear)
+
+    def benchmarkRoms(self):
+        for name, rom in sorted(self.MACRO_ROMS.items()):
+            for engine in (CPU.ENGINE_INTERPRETER, CPU.ENGINE_TRANSLATOR):
+                self.benchmarkRom(name, bytes.fromhex(rom), engine)
+
+    def benchmarkRom(self, name, rom, engine):
+        """ Run rom unthrottled for self.ticks frames """
+        schedulers = []
+
+        def run():
+            memory = Memory(4096)
+            memory.load(self.ROM_ADDRESS, rom)
+            cpu = CPU(memory, Screen(64, 32), engine)
+            # Measure the instructions themselves, not idle skipping
+            cpu.idleSkipping = False
+            scheduler = Scheduler(
+                cpu, self.instructionsPerTick, Scheduler.MODE_UNTHROTTLED
+            )
+            scheduler.runTicks(self.ticks)
+            schedulers.append(scheduler)
+
+        seconds = self.best(run)
+        scheduler = schedulers[-1]
+        prefix = "macro.%s.%s." % (name, engine)
+        self.record(
+            prefix + "ips", scheduler.cycles / seconds, "instructions/s", True
+        )
+        self.record(
+            prefix + "fps", scheduler.ticks / seconds, "frames/s", True
+        )
+
+    @staticmethod
+    def compare(baseline, current, threshold=0.1):
+        """ List (name, baseline, current, change) of regressions
+
+        change is the relative slowdown; a result regresses when it is
+        more than threshold worse than the baseline. Results missing from
+        either report are ignored.
+        """
+        regressions = []
+        baseResults = baseline["results"]
+
+        for name, result in sorted(current["results"].items()):
+            base = baseResults.get(name)
+
+            if base is None or not base["value"] or not result["value"]:
+                continue
+
+            if result["higherIsBetter"]:
+                change = base["value"] / result["value"] - 1
+            else:
+                change = result["value"] / base["value"] - 1
+
+            if change > threshold:
+                regressions.append(
+                    (name, base["value"], result["value"], change)
+                )
+
+        return regressions
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmark the emulator")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to check")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--ticks", type=int, default=300)
+    options = parser.parse_args(arguments)
+
+    benchmark = Benchmark(options.repeat, options.number, options.ticks)
+    report = benchmark.runAll()
+
+    if options.output:
+        with open(options.output, "w") as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    if not options.compare:
+        return 0
+
+    with open(options.compare) as baselineFile:
+        baseline = json.load(baselineFile)
+
+    regressions = Benchmark.compare(baseline, report, options.threshold)
+
+    for name, base, value, change in regressions:
+        print(
+            "REGRESSION %s: %.4g -> %.4g (%+.1f%%)"
+            % (name, base, value, change * 100),
+            file=sys.stderr
+        )
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
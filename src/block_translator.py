@@ -0,0 +1,349 @@
+import re
+import types
+from instruction_decoder import InstructionDecoder
+from unknown_opcode_exception import UnknownOpcodeException
+
+
+class BlockTranslator(object):
+    """ Compiles straight-line runs of CHIP-8 code into Python functions """
+    MAX_BLOCK_LENGTH = 64
+    CARRY = 0x0F
+
+    STRAIGHT_TEMPLATES = {
+        "CPU.executeOpcode6XNN": ["v{x} = {nn}"],
+        "CPU.executeOpcode7XNN": ["v{x} = (v{x} + {nn}) & 0xFF"],
+        "CPU.executeOpcode8XY0": ["v{x} = v{y}"],
+        "CPU.executeOpcode8XY1": ["v{x} |= v{y}"],
+        "CPU.executeOpcode8XY2": ["v{x} &= v{y}"],
+        "CPU.executeOpcode8XY3": ["v{x} ^= v{y}"],
+        "CPU.executeOpcode8XY4": [
+            "t = v{x} + v{y}",
+            "v{x} = t & 0xFF",
+            "v{carry} = 1 if t > 0xFF else 0",
+        ],
+        "CPU.executeOpcode8XY5": [
+            "t = v{x} - v{y}",
+            "v{x} = t & 0xFF",
+            "v{carry} = 1 if t > 0 else 0",
+        ],
+        "CPU.executeOpcode8XY6": [
+            "t = v{x}",
+            "v{carry} = t & 0x01",
+            "v{x} = t >> 1",
+        ],
+        "CPU.executeOpcode8XY7": [
+            "t = v{y} - v{x}",
+            "v{x} = t & 0xFF",
+            "v{carry} = 1 if t > 0 else 0",
+        ],
+        "CPU.executeOpcode8XYE": [
+            "t = v{x}",
+            "v{x} = (t << 1) & 0xFF",
+            "v{carry} = t >> 7",
+        ],
+        "CPU.executeOpcode8XY1ResetVF": ["v{x} |= v{y}", "v{carry} = 0"],
+        "CPU.executeOpcode8XY2ResetVF": ["v{x} &= v{y}", "v{carry} = 0"],
+        "CPU.executeOpcode8XY3ResetVF": ["v{x} ^= v{y}", "v{carry} = 0"],
+        "CPU.executeOpcode8XY6ShiftVY": [
+            "t = v{y}",
+            "v{x} = t >> 1",
+            "v{carry} = t & 0x01",
+        ],
+        "CPU.executeOpcode8XYEShiftVY": [
+            "t = v{y}",
+            "v{x} = (t << 1) & 0xFF",
+            "v{carry} = t >> 7",
+        ],
+        "CPU.executeOpcodeANNN": ["i = {nnn}"],
+        "CPU.executeOpcodeFX07": ["v{x} = cpu.delayTimer"],
+        "CPU.executeOpcodeFX15": ["cpu.delayTimer = v{x}"],
+        "CPU.executeOpcodeFX18": ["cpu.soundTimer = v{x}"],
+    }
+
+    # Block exits, each ends by setting the program counter
+    EXIT_TEMPLATES = {
+        "CPU.executeOpcode1NNN": ["cpu.programCounter = {nnn}"],
+        "CPU.executeOpcode2NNN": [
+            "cpu.programCounter = {address}",
+            "sp = cpu.stackPointer",
+            "cpu.stack[sp] = {address}",
+            "cpu.stackPointer = sp + 1",
+            "cpu.programCounter = {nnn}",
+        ],
+        "CPU.executeOpcode00EE": [
+            "cpu.programCounter = {address}",
+            "sp = cpu.stackPointer - 1",
+            "if sp < 0: raise IndexError",
+            "cpu.stackPointer = sp",
+            "cpu.programCounter = cpu.stack[sp] + 2",
+        ],
+        "CPU.executeOpcodeBNNN": ["cpu.programCounter = {nnn} + v0"],
+        "CPU.executeOpcodeBXNN": ["cpu.programCounter = {nnn} + v{x}"],
+        "CPU.executeOpcode3XNN": [
+            "cpu.programCounter = {skip} if v{x} == {nn} else {next}",
+        ],
+        "CPU.executeOpcode4XNN": [
+            "cpu.programCounter = {skip} if v{x} != {nn} else {next}",
+        ],
+        "CPU.executeOpcode5XY0": [
+            "cpu.programCounter = {skip} if v{x} == v{y} else {next}",
+        ],
+    }
+
+    # Any other handler is called as-is and ends the block
+    FALLBACK_TEMPLATE = [
+        "cpu.programCounter = {address}",
+        "return handler{address}(cpu, ({x}, {y}, {n}, {nn}, {nnn}))",
+    ]
+
+    REGISTER_PATTERN = re.compile(r"\bv(\d+)\b")
+    ASSIGNMENT_PATTERN = re.compile(r"^(v\d+|i) (=|\|=|&=|\^=) ")
+
+    def __init__(self, cpu):
+        self.cpu = cpu
+        self.blocks = {}
+        self.coverage = {}
+        # Code object and end address of each block, for RomCache
+        self.codes = {}
+        self.translations = 0
+        self.invalidations = 0
+        # XO-CHIP skips depend on the word after the block's last opcode
+        self.lookahead = 2 if cpu.quirks.xoChip else 0
+        cpu.memory.addWriteListener(self.invalidate)
+
+    def lookup(self, address):
+        """ Return the (function, length) block starting at address """
+        block = self.blocks.get(address)
+
+        if block is None:
+            block = self.translate(address)
+
+        return block
+
+    def executeBlock(self):
+        """ Run the block at the program counter, return its length """
+        function, length = self.lookup(self.cpu.programCounter)
+        function(self.cpu)
+        return length
+
+    def translate(self, address):
+        instructions = self.collectInstructions(address)
+
+        if not instructions:
+            self.cpu.opcode = self.cpu.memory.getWord(address)
+            raise UnknownOpcodeException()
+
+        code, handlers = self.compileBlock(instructions)
+        end = min(
+            instructions[-1][0] + 2 + self.lookahead,
+            len(self.cpu.memory.memory)
+        )
+        block = self.install(address, end, code, handlers, len(instructions))
+        self.translations += 1
+        return block
+
+    def install(self, address, end, code, handlers, length):
+        namespace = dict(handlers)
+        exec(code, namespace)
+        block = (namespace["block"], length)
+        self.blocks[address] = block
+        self.codes[address] = (code, end)
+
+        for covered in range(address, end):
+            self.coverage.setdefault(covered, []).append(address)
+
+        return block
+
+    def exportBlocks(self):
+        """ (address, end, bytes, code, length) of every live block """
+        memory = self.cpu.memory.memory
+        return [
+            (address, end, bytes(memory[address:end]), code,
+             self.blocks[address][1])
+            for address, (code, end) in self.codes.items()
+        ]
+
+    def importBlocks(self, entries):
+        """ Install exported blocks whose bytes still match memory """
+        memory = self.cpu.memory
+        dispatchTable = self.cpu.dispatchTable
+        imported = 0
+
+        for address, end, image, code, length in entries:
+            if address in self.blocks or memory.memory[address:end] != image:
+                continue
+
+            # Fallback handlers are named after the address they run at
+            handlers = {
+                name: dispatchTable[memory.getWord(int(name[7:]))]
+                for name in self.globalNames(code)
+                if name.startswith("handler")
+            }
+            self.install(address, end, code, handlers, length)
+            imported += 1
+
+        return imported
+
+    def collectInstructions(self, address):
+        """ Decode up to the first block exit or untranslatable opcode """
+        memory = self.cpu.memory
+        dispatchTable = self.cpu.dispatchTable
+        instructions = []
+        end = len(memory.memory) - 1
+
+        while address < end and len(instructions) < self.MAX_BLOCK_LENGTH:
+            opcode = memory.getWord(address)
+            handler = dispatchTable[opcode]
+
+            if handler.__qualname__ == "CPU.executeUnknownOpcode":
+                break
+
+            instructions.append((address, opcode, handler))
+
+            if handler.__qualname__ not in self.STRAIGHT_TEMPLATES:
+                break
+
+            address += 2
+
+        return instructions
+
+    def compileBlock(self, instructions):
+        """ Generate the source of one block and compile it """
+        body = []
+        handlers = {}
+
+        for address, opcode, handler in instructions[:-1]:
+            body += self.expand(
+                self.STRAIGHT_TEMPLATES[handler.__qualname__], address, opcode
+            )
+
+        address, opcode, handler = instructions[-1]
+        name = handler.__qualname__
+
+        if name in self.STRAIGHT_TEMPLATES:
+            body += self.expand(self.STRAIGHT_TEMPLATES[name], address, opcode)
+            exitTemplate = ["cpu.programCounter = {next}"]
+        elif name in self.EXIT_TEMPLATES and not self.isIdleJump(
+            name, address, opcode
+        ):
+            exitTemplate = self.EXIT_TEMPLATES[name]
+        else:
+            exitTemplate = self.FALLBACK_TEMPLATE
+            handlers["handler%d" % address] = handler
+
+        exitLines = self.expand(exitTemplate, address, opcode)
+        source = self.assemble(body, exitLines, opcode)
+        code = compile(source, "<block 0x%03X>" % instructions[0][0], "exec")
+        return code, handlers
+
+    def isIdleJump(self, name, address, opcode):
+        """ Idle loop jumps go through the handler to report EVENT_IDLE """
+        target = opcode & 0x0FFF
+        return (
+            name == "CPU.executeOpcode1NNN" and target <= address
+            and self.cpu.isIdleJump(target, address)
+        )
+
+    def expand(self, template, address, opcode):
+        x, y, n, nn, nnn = InstructionDecoder.operandTable()[opcode]
+        skip = address + 4
+
+        if self.lookahead and address + 3 < len(self.cpu.memory.memory):
+            if self.cpu.memory.getWord(address + 2) == 0xF000:
+                skip += 2
+
+        fields = {
+            "x": x, "y": y, "n": n, "nn": nn, "nnn": nnn,
+            "carry": self.CARRY,
+            "opcode": opcode,
+            "address": address,
+            "next": address + 2,
+            "skip": skip,
+        }
+        return [line.format(**fields) for line in template]
+
+    def assemble(self, body, exitLines, lastOpcode):
+        """ Wrap body in register loads and write backs """
+        used = set()
+        assigned = set()
+
+        for line in body + exitLines:
+            used.update(int(r) for r in self.REGISTER_PATTERN.findall(line))
+
+        used = sorted(used)
+
+        for line in body:
+            match = self.ASSIGNMENT_PATTERN.match(line)
+
+            if match:
+                assigned.add(match.group(1))
+
+        usesIndex = any(re.search(r"\bi\b", line) for line in body)
+
+        source = ["def block(cpu):", "    v = cpu.vRegister"]
+        source += ["    v%d = v[%d]" % (r, r) for r in used]
+
+        if usesIndex:
+            source.append("    i = cpu.indexRegister")
+
+        source += ["    " + line for line in body]
+        source += [
+            "    v[%d] = v%d" % (r, r) for r in used if "v%d" % r in assigned
+        ]
+
+        if "i" in assigned:
+            source.append("    cpu.indexRegister = i")
+
+        source.append("    cpu.opcode = %d" % lastOpcode)
+        source += ["    " + line for line in exitLines]
+        return "\n".join(source) + "\n"
+
+    @staticmethod
+    def globalNames(code):
+        names = set(code.co_names)
+
+        for constant in code.co_consts:
+            if isinstance(constant, types.CodeType):
+                names.update(constant.co_names)
+
+        return names
+
+    def invalidate(self, start, end):
+        """ Drop every block covering one of the bytes start..end-1 """
+        coverage = self.coverage
+
+        if end - start > len(coverage):
+            addresses = [a for a in coverage if start <= a < end]
+        else:
+            addresses = range(start, end)
+
+        for address in addresses:
+            entries = coverage.pop(address, None)
+
+            if entries is None:
+                continue
+
+            for entry in entries:
+                if self.blocks.pop(entry, None) is not None:
+                    self.uncover(entry, self.codes.pop(entry)[1])
+                    self.invalidations += 1
+
+    def uncover(self, block, end):
+        """ Forget block at every byte it covered that is still mapped """
+        coverage = self.coverage
+
+        for address in range(block, end):
+            blocks = coverage.get(address)
+
+            if blocks is None:
+                continue
+
+            blocks.remove(block)
+
+            if not blocks:
+                del coverage[address]
+
+    def flush(self):
+        self.blocks.clear()
+        self.coverage.clear()
+        self.codes.clear()
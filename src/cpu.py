@@ -1,3 +1,13 @@
+from block_translator import BlockTranslator
+from debugger import Debugger, DebuggerStop
+from instruction_cache import InstructionCache
+from instruction_decoder import InstructionDecoder
+from keypad import Keypad
+from profiler import Profiler
+from quirks import QuirkProfile
+from run_result import RunResult
+from snapshot import Snapshot
+from tracer import Tracer
 from unknown_opcode_exception import UnknownOpcodeException
 
 
@@ -6,18 +16,169 @@ class CPU(object):
     OPCODE_MASK_8_BIT = 0xF00F
     OPCODE_MASK_12_BIT = 0xF0FF
 
-    def __init__(self, memory, screen):
+    ENGINE_INTERPRETER = "interpreter"
+    ENGINE_TRANSLATOR = "translator"
+
+    # Events handlers may return to the run loop
+    EVENT_DRAW = 0x01
+    EVENT_WAIT_KEY = 0x02
+    EVENT_IDLE = 0x04
+    EVENT_REASONS = {
+        EVENT_DRAW: RunResult.DRAW,
+        EVENT_WAIT_KEY: RunResult.WAIT_KEY,
+    }
+
+    # Instructions allowed in the body of a loop waiting on timers or keys
+    IDLE_BODY_KEYS = frozenset([0xF007])
+    IDLE_GUARD_KEYS = frozenset([
+        0x3000, 0x4000, 0x5000, 0x9000, 0xE09E, 0xE0A1
+    ])
+
+    # CXNN draws from a xorshift32 generator seeded with this by default
+    DEFAULT_SEED = 0x2545F491
+
+    dispatchTables = {}
+
+    def __init__(self, memory, screen, engine=ENGINE_INTERPRETER,
+                 keypad=None, quirks=QuirkProfile.MODERN):
         self.memory = memory
         self.screen = screen
+        self.keypad = keypad if keypad is not None else Keypad()
+        self.quirks = QuirkProfile.resolve(quirks)
         self.initialiseRegisters()
         self.initialiseInstructionTable()
         self.initialiseStack()
+        self.initialiseEngine(engine)
+
+    def initialiseEngine(self, engine):
+        if engine not in (self.ENGINE_INTERPRETER, self.ENGINE_TRANSLATOR):
+            raise ValueError("Unknown engine: %s" % engine)
+
+        self.engine = engine
+        self.instructionCache = InstructionCache(
+            self.memory, self.dispatchTable
+        )
+        self.idleLoops = {}
+        self.idleLoopLength = 0
+        self.idleLoopArmed = None
+        self.idleSkipping = True
+        self.cyclesSkipped = 0
+        self.memory.addWriteListener(self.forgetIdleLoops)
+        self.blockTranslator = None
+        self.profiler = None
+        self.tracer = None
+        self.debugger = None
+        # (layer, instrument) pairs, innermost first
+        self.instrumentation = []
+
+        if engine == self.ENGINE_TRANSLATOR:
+            self.blockTranslator = BlockTranslator(self)
+
+        self.plainTranslator = self.blockTranslator
+
+    def addInstrumentation(self, layer, instrument=None):
+        """ Run every handler wrapped by instrument(handler), outside any
+        layers already added, until layer is removed
+
+        While any layer is installed the CPU interprets, since translated
+        blocks bypass the handlers; a layer without instrument only does
+        that.
+        """
+        self.instrumentation.append((layer, instrument))
+        self.rebuildDispatch()
+
+    def removeInstrumentation(self, layer):
+        """ Unwrap layer, leaving the others in place in any order """
+        self.instrumentation = [
+            entry for entry in self.instrumentation if entry[0] is not layer
+        ]
+        self.rebuildDispatch()
+
+    def rebuildDispatch(self):
+        """ Wrap the plain dispatch table in every installed layer """
+        table = self.plainDispatchTable
+
+        for layer, instrument in self.instrumentation:
+            if instrument is None:
+                continue
+
+            wrappers = {}
+
+            for handler in table:
+                if handler not in wrappers:
+                    wrappers[handler] = instrument(handler)
+
+            table = [wrappers[handler] for handler in table]
+
+        self.dispatchTable = table
+        self.instructionCache.flush(table)
+        self.blockTranslator = (
+            None if self.instrumentation else self.plainTranslator
+        )
+
+    def enableProfiling(self):
+        """ Start counting instructions, return the Profiler """
+        if self.profiler is None:
+            self.profiler = Profiler(self)
+            self.profiler.install()
+
+        return self.profiler
+
+    def disableProfiling(self):
+        """ Restore the plain dispatch path, return the final Profiler """
+        profiler = self.profiler
+
+        if profiler is not None:
+            profiler.uninstall()
+            self.profiler = None
+
+        return profiler
+
+    def enableTracing(self, path, compress=False):
+        """ Start writing a binary trace to path, return the Tracer """
+        if self.tracer is None:
+            self.tracer = Tracer(self, path, compress)
+            self.tracer.install()
+
+        return self.tracer
+
+    def disableTracing(self):
+        """ Flush and close the trace, restoring the plain dispatch path """
+        tracer = self.tracer
+
+        if tracer is not None:
+            tracer.uninstall()
+            self.tracer = None
+
+        return tracer
+
+    def enableDebugging(self):
+        """ Return the Debugger, through which runs resume after a stop """
+        if self.debugger is None:
+            self.debugger = Debugger(self)
+
+        return self.debugger
+
+    def disableDebugging(self):
+        """ Remove every breakpoint and watchpoint, return the Debugger """
+        debugger = self.debugger
+
+        if debugger is not None:
+            debugger.clear()
+            self.debugger = None
+
+        return debugger
 
     def initialiseInstructionTable(self):
         self.opcodeTable = {
             0x0000: None,
+            0x00C0: None,
             0x00E0: self.executeOpcode00E0,
-            0x00EE: None,
+            0x00EE: self.executeOpcode00EE,
+            0x00FB: None,
+            0x00FC: None,
+            0x00FE: None,
+            0x00FF: None,
             0x1000: self.executeOpcode1NNN,
             0x2000: self.executeOpcode2NNN,
             0x3000: self.executeOpcode3XNN,
@@ -36,22 +197,54 @@ class CPU(object):
             0x800E: self.executeOpcode8XYE,
             0x9000: None,
             0xA000: self.executeOpcodeANNN,
-            0xB000: None,
-            0xC000: None,
-            0xD000: None,
-            0xE09E: None,
-            0xE0A1: None,
-            0xF007: None,
-            0xF00A: None,
+            0xB000: self.executeOpcodeBNNN,
+            0xC000: self.executeOpcodeCXNN,
+            0xD000: self.executeOpcodeDXYN,
+            0xE09E: self.executeOpcodeEX9E,
+            0xE0A1: self.executeOpcodeEXA1,
+            0xF000: None,
+            0xF001: None,
+            0xF007: self.executeOpcodeFX07,
+            0xF00A: self.executeOpcodeFX0A,
             0xF015: self.executeOpcodeFX15,
             0xF018: self.executeOpcodeFX18,
             0xF01E: None,
             0xF029: None,
-            0xF033: None,
-            0xF055: None,
-            0xF065: None,
+            0xF033: self.executeOpcodeFX33,
+            0xF055: self.executeOpcodeFX55,
+            0xF065: self.executeOpcodeFX65,
         }
 
+        for key, name in self.quirks.handlerNames().items():
+            self.opcodeTable[key] = getattr(self, name)
+
+        if self.quirks.xoChip:
+            # Skips step over all four bytes of F000 NNNN
+            self.skipInstruction = self.skipLongInstruction
+
+        self.dispatchTable = self.buildDispatchTable()
+        self.plainDispatchTable = self.dispatchTable
+
+    def buildDispatchTable(self):
+        """ Map every opcode to its handler, shared by all CPUs of a class
+        with the same quirk settings
+        """
+        tableKey = (type(self), self.quirks.flags())
+        table = CPU.dispatchTables.get(tableKey)
+
+        if table is None:
+            handlers = {
+                key: handler.__func__
+                for key, handler in self.opcodeTable.items()
+                if handler is not None
+            }
+            unknown = CPU.executeUnknownOpcode
+            keys = InstructionDecoder.keyTable()
+            table = [handlers.get(key, unknown) for key in keys]
+            CPU.dispatchTables[tableKey] = table
+
+        return table
+
     def initialiseStack(self):
         self.stack = [0x00] * 16
         self.stackPointer = 0x00
@@ -63,32 +256,317 @@ class CPU(object):
         self.vRegister = [0x00] * 16
         self.delayTimer = 0x00
         self.soundTimer = 0x00
+        self.waitingRegister = None
+        self.seedRandom(self.DEFAULT_SEED)
 
     def nextCycle(self):
-        pass
+        """ Execute one instruction, or one block, return the count run """
+        if self.blockTranslator is not None:
+            return self.blockTranslator.executeBlock()
+
+        self.opcode, handler, operands = self.instructionCache.lookup(
+            self.programCounter
+        )
+        handler(self, operands)
+        return 1
+
+    def run(self, maxCycles, until=EVENT_WAIT_KEY, breakpoints=None):
+        """ Execute up to maxCycles instructions and return a RunResult
+
+        Stops early before an address in breakpoints, before an instruction
+        hitting a Debugger breakpoint or watchpoint, after an instruction
+        raising one of the events in the until mask, or on an exception.
+        Idle loops are never a reason to stop.
+        """
+        until &= ~self.EVENT_IDLE
+
+        if breakpoints:
+            return self.runWithBreakpoints(maxCycles, until, breakpoints)
+
+        if self.debugger is not None:
+            return self.debugger.run(maxCycles, until)
+
+        return self.runEngine(maxCycles, until)
+
+    def runEngine(self, maxCycles, until):
+        if self.blockTranslator is not None:
+            return self.runTranslated(maxCycles, until)
+
+        return self.runInterpreted(maxCycles, until)
+
+    def runInterpreted(self, maxCycles, until):
+        self.idleLoopArmed = None
+        cache = self.instructionCache
+        entries = cache.entries
+        fill = cache.fill
+        misses = cache.misses
+        skipped = self.cyclesSkipped
+        cycles = 0
+        reason = RunResult.BUDGET
+        error = None
+
+        try:
+            while cycles < maxCycles:
+                entry = entries[self.programCounter]
+
+                if entry is None:
+                    entry = fill(self.programCounter)
+
+                self.opcode, handler, operands = entry
+                event = handler(self, operands)
+                cycles += 1
+
+                if event is not None:
+                    if event & until:
+                        reason = self.EVENT_REASONS[event]
+                        break
+
+                    if event == self.EVENT_IDLE:
+                        cycles = self.skipIdleCycles(cycles, maxCycles)
+        except DebuggerStop as stop:
+            reason = stop.reason
+        except Exception as exception:
+            reason, error = RunResult.ERROR, exception
+
+        # Skipped idle passes never looked anything up
+        executed = cycles - (self.cyclesSkipped - skipped)
+        cache.hits += max(executed - (cache.misses - misses), 0)
+        return RunResult(reason, cycles, self.programCounter, error)
+
+    def runWithBreakpoints(self, maxCycles, until, breakpoints):
+        """ Reference loop checking every address against breakpoints """
+        lookup = self.instructionCache.lookup
+        cycles = 0
+        reason = RunResult.BUDGET
+        error = None
+
+        try:
+            while cycles < maxCycles:
+                if cycles and self.programCounter in breakpoints:
+                    reason = RunResult.BREAKPOINT
+                    break
+
+                self.opcode, handler, operands = lookup(self.programCounter)
+                event = handler(self, operands)
+                cycles += 1
+
+                # Idle loops spin here so every address is seen
+                if event is not None and event & until:
+                    reason = self.EVENT_REASONS[event]
+                    break
+        except DebuggerStop as stop:
+            reason = stop.reason
+        except Exception as exception:
+            reason, error = RunResult.ERROR, exception
+
+        return RunResult(reason, cycles, self.programCounter, error)
+
+    def runTranslated(self, maxCycles, until):
+        self.idleLoopArmed = None
+        translator = self.blockTranslator
+        blocks = translator.blocks
+        cycles = 0
+        pending = 0
+
+        try:
+            while cycles < maxCycles:
+                block = blocks.get(self.programCounter)
+
+                if block is None:
+                    block = translator.translate(self.programCounter)
+
+                function, length = block
+
+                if cycles + length > maxCycles:
+                    break
+
+                # Only the last instruction of a block can raise
+                pending = length - 1
+                event = function(self)
+                cycles += length
+                pending = 0
+
+                if event is not None:
+                    if event & until:
+                        return RunResult(
+                            self.EVENT_REASONS[event], cycles,
+                            self.programCounter
+                        )
+
+                    if event == self.EVENT_IDLE:
+                        cycles = self.skipIdleCycles(cycles, maxCycles)
+        except DebuggerStop as stop:
+            return RunResult(
+                stop.reason, cycles + pending, self.programCounter
+            )
+        except Exception as exception:
+            return RunResult(
+                RunResult.ERROR, cycles + pending, self.programCounter,
+                exception
+            )
+
+        # Finish a budget ending inside a block one instruction at a time
+        result = self.runInterpreted(maxCycles - cycles, until)
+        result.cycles += cycles
+        return result
+
+    def skipIdleCycles(self, cycles, maxCycles):
+        """ Fast-forward whole passes of an idle loop towards the budget
+
+        The first jump only arms the loop. Once a full pass has run between
+        two jumps, nothing it reads can change before the budget ends, so
+        every further pass would leave the same state.
+        """
+        if not self.idleSkipping:
+            return cycles
+
+        length = self.idleLoopLength
+        armed = (self.programCounter, cycles - length)
+
+        if self.idleLoopArmed != armed:
+            self.idleLoopArmed = (self.programCounter, cycles)
+            return cycles
+
+        skipped = (maxCycles - cycles) // length * length
+        self.cyclesSkipped += skipped
+        return cycles + skipped
+
+    def measureIdleLoop(self, start, jumpAddress):
+        """ Instructions per pass of the idle loop start..jump, 0 if busy """
+        keys = InstructionDecoder.keyTable()
+        body = [
+            keys[self.memory.getWord(address)]
+            for address in range(start, jumpAddress, 2)
+        ]
+
+        # A skip may only guard the jump, or passes would differ in length
+        if body and body[-1] in self.IDLE_GUARD_KEYS:
+            body.pop()
+
+        if any(key not in self.IDLE_BODY_KEYS for key in body):
+            return 0
+
+        return (jumpAddress - start) // 2 + 1
+
+    def isIdleJump(self, target, jumpAddress):
+        length = self.idleLoops.get(jumpAddress)
+
+        if length is None:
+            length = self.measureIdleLoop(target, jumpAddress)
+            self.idleLoops[jumpAddress] = length
+
+        self.idleLoopLength = length
+        return length != 0
+
+    def forgetIdleLoops(self, start, end):
+        if self.idleLoops:
+            self.idleLoops.clear()
+
+    def exportAnalysis(self):
+        """ Idle loops and translated blocks, in the form RomCache keeps """
+        memory = self.memory.memory
+        idleLoops = []
+
+        for jumpAddress, length in self.idleLoops.items():
+            if length:
+                start = jumpAddress - 2 * (length - 1)
+                idleLoops.append(
+                    (jumpAddress, length, bytes(memory[start:jumpAddress + 2]))
+                )
+
+        blocks = []
+
+        if self.blockTranslator is not None:
+            blocks = self.blockTranslator.exportBlocks()
+
+        return {
+            "idleLoops": idleLoops, "blocks": blocks,
+            "quirks": self.quirks.flags(),
+        }
+
+    def importAnalysis(self, analysis):
+        """ Reuse exported analysis wherever memory still matches it """
+        memory = self.memory.memory
+
+        for jumpAddress, length, image in analysis.get("idleLoops", ()):
+            start = jumpAddress - 2 * (length - 1)
+
+            if memory[start:jumpAddress + 2] == image:
+                self.idleLoops[jumpAddress] = length
+
+        # Blocks inline the handlers of the settings they were built under
+        if self.blockTranslator is not None and tuple(analysis.get(
+            "quirks", QuirkProfile.resolve(QuirkProfile.MODERN).flags()
+        )) == self.quirks.flags():
+            self.blockTranslator.importBlocks(analysis.get("blocks", ()))
+
+    def snapshot(self):
+        """ Pack registers, stack, timers, memory and screen into bytes """
+        return Snapshot.capture(self)
+
+    def restore(self, blob):
+        """ Return to a state taken with snapshot """
+        Snapshot.apply(self, blob)
 
     def fetchOpcode(self, address):
-        firstHalf = self.memory.getByte(address) << 8
-        secondHalf = self.memory.getByte(address + 1)
-        return firstHalf | secondHalf
+        return self.memory.getWord(address)
 
     def decodeOpcode(self):
-        # TODO: does this match 0x00E0 vs 0x000?
-        for mask in [
-            self.OPCODE_MASK_4_BIT,
-            self.OPCODE_MASK_8_BIT,
-            self.OPCODE_MASK_12_BIT
-        ]:
-            decodedOpcode = self.opcode & mask
+        decodedOpcode = InstructionDecoder.keyTable()[self.opcode]
 
-            if decodedOpcode in self.opcodeTable:
-                return decodedOpcode
+        if decodedOpcode not in self.opcodeTable:
+            raise UnknownOpcodeException()
 
-        raise UnknownOpcodeException()
+        return decodedOpcode
 
     def executeOpcode(self, decodedOpcode):
         self.opcodeTable[decodedOpcode]()
 
+    def decodeOperands(self):
+        """ X, Y, N, NN and NNN of the opcode, for handlers called directly
+        rather than through the dispatch
+        """
+        return InstructionDecoder.operandTable()[self.opcode]
+
+    def seedRandom(self, seed):
+        """ Restart the CXNN random sequence from seed """
+        # xorshift never leaves an all-zero state
+        self.randomState = seed & 0xFFFFFFFF or self.DEFAULT_SEED
+
+    def nextRandom(self):
+        """ Advance the xorshift32 generator, return a random byte """
+        state = self.randomState
+        state ^= (state << 13) & 0xFFFFFFFF
+        state ^= state >> 17
+        state ^= (state << 5) & 0xFFFFFFFF
+        self.randomState = state
+        return state >> 24
+
+    def pressKey(self, key):
+        """ Hold key down, completing a pending FX0A with it """
+        self.keypad.press(key)
+
+        if self.waitingRegister is None:
+            return
+
+        self.vRegister[self.waitingRegister] = key
+        self.waitingRegister = None
+        self.increaseProgramCounter()
+
+    def releaseKey(self, key):
+        self.keypad.release(key)
+
+    def decrementTimers(self):
+        """ Count both timers down by one 60 Hz tick """
+        if self.delayTimer:
+            self.delayTimer -= 1
+
+        if self.soundTimer:
+            self.soundTimer -= 1
+
+    def executeUnknownOpcode(self, operands=None):
+        raise UnknownOpcodeException()
+
     def increaseProgramCounter(self):
         self.programCounter += 2
 
@@ -98,150 +576,391 @@ class CPU(object):
     def skipInstruction(self):
         self.programCounter += 4
 
-    def executeOpcode00E0(self):
+    def skipLongInstruction(self):
+        if self.memory.getWord(self.programCounter + 2) == 0xF000:
+            self.programCounter += 6
+        else:
+            self.programCounter += 4
+
+    def executeOpcode00E0(self, operands=None):
         """ Clear screen """
         self.screen.clear()
         self.increaseProgramCounter()
+        return self.EVENT_DRAW
+
+    def executeOpcode00CN(self, operands=None):
+        """ Scroll the screen down N rows """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.screen.scrollDown(n)
+        self.increaseProgramCounter()
+        return self.EVENT_DRAW
+
+    def executeOpcode00FB(self, operands=None):
+        """ Scroll the screen right 4 pixels """
+        self.screen.scrollRight()
+        self.increaseProgramCounter()
+        return self.EVENT_DRAW
+
+    def executeOpcode00FC(self, operands=None):
+        """ Scroll the screen left 4 pixels """
+        self.screen.scrollLeft()
+        self.increaseProgramCounter()
+        return self.EVENT_DRAW
+
+    def executeOpcode00FE(self, operands=None):
+        """ Switch to low resolution """
+        self.screen.setResolution(*self.screen.LOW_RESOLUTION)
+        self.increaseProgramCounter()
+        return self.EVENT_DRAW
 
-    def executeOpcode1NNN(self):
+    def executeOpcode00FF(self, operands=None):
+        """ Switch to high resolution """
+        self.screen.setResolution(*self.screen.HIGH_RESOLUTION)
+        self.increaseProgramCounter()
+        return self.EVENT_DRAW
+
+    def executeOpcode00EE(self, operands=None):
+        """ Return from function """
+        if not self.stackPointer:
+            raise IndexError
+
+        self.stackPointer -= 1
+        self.programCounter = self.stack[self.stackPointer] + 2
+
+    def executeOpcode1NNN(self, operands=None):
         """ Jump to address NNN """
-        self.programCounter = self.opcode & ~self.OPCODE_MASK_4_BIT
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        address = self.programCounter
+        self.programCounter = nnn
+
+        if self.programCounter <= address:
+            if self.isIdleJump(self.programCounter, address):
+                return self.EVENT_IDLE
 
-    def executeOpcode2NNN(self):
+    def executeOpcode2NNN(self, operands=None):
         """ Call function at address NNN """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
         self.stack[self.stackPointer] = self.programCounter
         self.stackPointer += 1
-        self.programCounter = self.opcode & ~self.OPCODE_MASK_4_BIT
+        self.programCounter = nnn
 
-    def executeOpcode3XNN(self):
+    def executeOpcode3XNN(self, operands=None):
         """ Skip next instruction if VX == NN """
-        x = (self.opcode & ~self.OPCODE_MASK_12_BIT) >> 8
-        nn = self.opcode & 0xFF
+        x, y, n, nn, nnn = operands or self.decodeOperands()
 
         if self.vRegister[x] == nn:
             self.skipInstruction()
         else:
             self.increaseProgramCounter()
 
-    def executeOpcode4XNN(self):
+    def executeOpcode4XNN(self, operands=None):
         """ Skip next instruction if VX != NN """
-        x = (self.opcode & ~self.OPCODE_MASK_12_BIT) >> 8
-        nn = self.opcode & 0xFF
+        x, y, n, nn, nnn = operands or self.decodeOperands()
 
         if self.vRegister[x] != nn:
             self.skipInstruction()
         else:
             self.increaseProgramCounter()
 
-    def executeOpcode5XY0(self):
+    def executeOpcode5XY0(self, operands=None):
         """ Skip next instruction if VX == VY """
-        x = (self.opcode & 0xF00) >> 8
-        y = (self.opcode & 0xF0) >> 4
+        x, y, n, nn, nnn = operands or self.decodeOperands()
 
         if self.vRegister[x] == self.vRegister[y]:
             self.skipInstruction()
         else:
             self.increaseProgramCounter()
 
-    def executeOpcode6XNN(self):
+    def executeOpcode6XNN(self, operands=None):
         """ Set VX to NN """
-        x = (self.opcode & ~self.OPCODE_MASK_12_BIT) >> 8
-        nn = self.opcode & 0xFF
+        x, y, n, nn, nnn = operands or self.decodeOperands()
         self.vRegister[x] = nn
         self.increaseProgramCounter()
 
-    def executeOpcode7XNN(self):
+    def executeOpcode7XNN(self, operands=None):
         """ Adds NN to VX """
-        x = (self.opcode & ~self.OPCODE_MASK_12_BIT) >> 8
-        nn = self.opcode & 0xFF
+        x, y, n, nn, nnn = operands or self.decodeOperands()
         vxVal = self.vRegister[x]
         self.vRegister[x] = (vxVal + nn) & 0xFF
         self.increaseProgramCounter()
 
-    def executeOpcode8XY0(self):
+    def executeOpcode8XY0(self, operands=None):
         """ Set VX to VY """
-        x = (self.opcode & 0xF00) >> 8
-        y = (self.opcode & 0xF0) >> 4
+        x, y, n, nn, nnn = operands or self.decodeOperands()
         self.vRegister[x] = self.vRegister[y]
         self.increaseProgramCounter()
 
-    def executeOpcode8XY1(self):
+    def executeOpcode8XY1(self, operands=None):
         """ Set VX to VX OR VY """
-        x = (self.opcode & 0xF00) >> 8
-        y = (self.opcode & 0xF0) >> 4
+        x, y, n, nn, nnn = operands or self.decodeOperands()
         self.vRegister[x] |= self.vRegister[y]
         self.increaseProgramCounter()
 
-    def executeOpcode8XY2(self):
+    def executeOpcode8XY2(self, operands=None):
         """ Set VX to VX AND VY """
-        x = (self.opcode & 0xF00) >> 8
-        y = (self.opcode & 0xF0) >> 4
+        x, y, n, nn, nnn = operands or self.decodeOperands()
         self.vRegister[x] &= self.vRegister[y]
         self.increaseProgramCounter()
 
-    def executeOpcode8XY3(self):
+    def executeOpcode8XY3(self, operands=None):
         """ Set VX to VX XOR VY """
-        x = (self.opcode & 0xF00) >> 8
-        y = (self.opcode & 0xF0) >> 4
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.vRegister[x] ^= self.vRegister[y]
+        self.increaseProgramCounter()
+
+    def executeOpcode8XY1ResetVF(self, operands=None):
+        """ Set VX to VX OR VY, clearing VF """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.vRegister[x] |= self.vRegister[y]
+        self.vRegister[0x0F] = 0x00
+        self.increaseProgramCounter()
+
+    def executeOpcode8XY2ResetVF(self, operands=None):
+        """ Set VX to VX AND VY, clearing VF """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.vRegister[x] &= self.vRegister[y]
+        self.vRegister[0x0F] = 0x00
+        self.increaseProgramCounter()
+
+    def executeOpcode8XY3ResetVF(self, operands=None):
+        """ Set VX to VX XOR VY, clearing VF """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
         self.vRegister[x] ^= self.vRegister[y]
+        self.vRegister[0x0F] = 0x00
         self.increaseProgramCounter()
 
-    def executeOpcode8XY4(self):
+    def executeOpcode8XY4(self, operands=None):
         """ Add VY to VX with carry in VF """
-        x = (self.opcode & 0xF00) >> 8
-        y = (self.opcode & 0xF0) >> 4
+        x, y, n, nn, nnn = operands or self.decodeOperands()
         val = self.vRegister[x] + self.vRegister[y]
         self.vRegister[x] = val & 0xFF
         self.setCarry(val > 0xFF)
         self.increaseProgramCounter()
 
-    def executeOpcode8XY5(self):
+    def executeOpcode8XY5(self, operands=None):
         """ Subtract VY from VX with borrow in VF """
-        x = (self.opcode & 0xF00) >> 8
-        y = (self.opcode & 0xF0) >> 4
+        x, y, n, nn, nnn = operands or self.decodeOperands()
         val = self.vRegister[x] - self.vRegister[y]
         self.vRegister[x] = val & 0xFF
         self.setCarry(val > 0x00)
         self.increaseProgramCounter()
 
-    def executeOpcode8XY6(self):
+    def executeOpcode8XY6(self, operands=None):
         """ Shift VX right by 1. Set VF to LSB of VX """
-        x = (self.opcode & 0xF00) >> 8
+        x, y, n, nn, nnn = operands or self.decodeOperands()
         vxVal = self.vRegister[x]
         self.setCarry(vxVal & 0x01)
         self.vRegister[x] = vxVal >> 1
         self.increaseProgramCounter()
 
-    def executeOpcode8XY7(self):
+    def executeOpcode8XY6ShiftVY(self, operands=None):
+        """ Set VX to VY shifted right by 1. Set VF to LSB of VY """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        vyVal = self.vRegister[y]
+        self.vRegister[x] = vyVal >> 1
+        self.setCarry(vyVal & 0x01)
+        self.increaseProgramCounter()
+
+    def executeOpcode8XY7(self, operands=None):
         """ Set VX to VY - VX with borrow in VF """
-        x = (self.opcode & 0xF00) >> 8
-        y = (self.opcode & 0xF0) >> 4
+        x, y, n, nn, nnn = operands or self.decodeOperands()
         val = self.vRegister[y] - self.vRegister[x]
         self.vRegister[x] = val & 0xFF
         self.setCarry(val > 0x00)
         self.increaseProgramCounter()
 
-    def executeOpcode8XYE(self):
+    def executeOpcode8XYE(self, operands=None):
         """ Shift VX left by 1. Set VF to MSB of VX """
-        x = (self.opcode & 0xF00) >> 8
+        x, y, n, nn, nnn = operands or self.decodeOperands()
         vxVal = self.vRegister[x]
         self.vRegister[x] = (vxVal << 1) & 0xFF
         self.setCarry(vxVal >> 7)
         self.increaseProgramCounter()
 
-    def executeOpcodeANNN(self):
+    def executeOpcode8XYEShiftVY(self, operands=None):
+        """ Set VX to VY shifted left by 1. Set VF to MSB of VY """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        vyVal = self.vRegister[y]
+        self.vRegister[x] = (vyVal << 1) & 0xFF
+        self.setCarry(vyVal >> 7)
+        self.increaseProgramCounter()
+
+    def executeOpcodeANNN(self, operands=None):
         """ Set index register to NNN """
-        self.indexRegister = self.opcode & ~self.OPCODE_MASK_4_BIT
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.indexRegister = nnn
+        self.increaseProgramCounter()
+
+    def executeOpcodeBNNN(self, operands=None):
+        """ Jump to address NNN + V0 """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.programCounter = nnn + self.vRegister[0]
+
+    def executeOpcodeBXNN(self, operands=None):
+        """ Jump to address XNN + VX """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.programCounter = nnn + self.vRegister[x]
+
+    def executeOpcodeCXNN(self, operands=None):
+        """ Set VX to a random byte AND NN """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.vRegister[x] = self.nextRandom() & nn
+        self.increaseProgramCounter()
+
+    def executeOpcodeDXYN(self, operands=None):
+        """ Draw N-byte sprite from I at VX, VY. Set VF on collision """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        rows = self.memory.read(self.indexRegister, n)
+        self.setCarry(self.screen.drawSprite(
+            self.vRegister[x], self.vRegister[y], rows
+        ))
+        self.increaseProgramCounter()
+        return self.EVENT_DRAW
+
+    def executeOpcodeDXYNWide(self, operands=None):
+        """ Draw N-byte sprite, or a 16x16 one if N is 0, from I at VX, VY """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+
+        if n:
+            self.setCarry(self.screen.drawSprite(
+                self.vRegister[x], self.vRegister[y],
+                self.memory.read(self.indexRegister, n)
+            ))
+        else:
+            self.setCarry(self.screen.drawWideSprite(
+                self.vRegister[x], self.vRegister[y],
+                self.memory.read(self.indexRegister, 32)
+            ))
+
         self.increaseProgramCounter()
+        return self.EVENT_DRAW
+
+    def executeOpcodeDXYNPlanes(self, operands=None):
+        """ Draw the sprite into every selected plane, each plane's rows
+        following the previous plane's in memory
+        """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        screen = self.screen
+        vxVal = self.vRegister[x]
+        vyVal = self.vRegister[y]
+        length = n if n else 32
+        address = self.indexRegister
+        planes = screen.activePlanes
+        collision = False
+
+        # Read every plane first, so a watchpoint stops before any drawing
+        sprites = [
+            self.memory.read(address + index * length, length)
+            for index in range(len(planes))
+        ]
+
+        for plane, rows in zip(planes, sprites):
+            if n:
+                collision |= screen.drawSprite(vxVal, vyVal, rows, plane)
+            else:
+                collision |= screen.drawWideSprite(vxVal, vyVal, rows, plane)
+
+        self.setCarry(collision)
+        self.increaseProgramCounter()
+        return self.EVENT_DRAW
+
+    def executeOpcodeEX9E(self, operands=None):
+        """ Skip next instruction if the key in VX is pressed """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
 
-    def executeOpcodeFX15(self):
+        if self.keypad.isPressed(self.vRegister[x]):
+            self.skipInstruction()
+        else:
+            self.increaseProgramCounter()
+
+    def executeOpcodeEXA1(self, operands=None):
+        """ Skip next instruction if the key in VX is not pressed """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+
+        if self.keypad.isPressed(self.vRegister[x]):
+            self.increaseProgramCounter()
+        else:
+            self.skipInstruction()
+
+    def executeOpcodeF000(self, operands=None):
+        """ Set index register to the 16-bit word after the instruction """
+        self.indexRegister = self.memory.getWord(self.programCounter + 2)
+        self.programCounter += 4
+
+    def executeOpcodeFN01(self, operands=None):
+        """ Select the bitplanes in mask N for drawing and scrolling """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.screen.selectPlanes(x)
+        self.increaseProgramCounter()
+
+    def executeOpcodeFX07(self, operands=None):
+        """ Set VX to value of delay timer """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.vRegister[x] = self.delayTimer
+        self.increaseProgramCounter()
+
+    def executeOpcodeFX0A(self, operands=None):
+        """ Wait for a key press and store the key in VX """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.waitingRegister = x
+        return self.EVENT_WAIT_KEY
+
+    def executeOpcodeFX15(self, operands=None):
         """ Set delay timer to value of register VX """
-        x = (self.opcode & ~self.OPCODE_MASK_12_BIT) >> 8
+        x, y, n, nn, nnn = operands or self.decodeOperands()
         self.delayTimer = self.vRegister[x]
         self.increaseProgramCounter()
 
-    def executeOpcodeFX18(self):
+    def executeOpcodeFX18(self, operands=None):
         """ Set sound timer to value of register VX """
-        x = (self.opcode & ~self.OPCODE_MASK_12_BIT) >> 8
+        x, y, n, nn, nnn = operands or self.decodeOperands()
         self.soundTimer = self.vRegister[x]
         self.increaseProgramCounter()
+
+    def executeOpcodeFX33(self, operands=None):
+        """ Store BCD of VX at I, I+1 and I+2 """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        vxVal = self.vRegister[x]
+        digits = bytes((vxVal // 100, vxVal // 10 % 10, vxVal % 10))
+        self.memory.write(self.indexRegister, digits)
+        self.increaseProgramCounter()
+
+    def executeOpcodeFX55(self, operands=None):
+        """ Store V0 to VX in memory starting at I """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.memory.write(self.indexRegister, bytes(self.vRegister[:x + 1]))
+        self.increaseProgramCounter()
+
+    def executeOpcodeFX65(self, operands=None):
+        """ Load V0 to VX from memory starting at I """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.vRegister[:x + 1] = self.memory.read(self.indexRegister, x + 1)
+        self.increaseProgramCounter()
+
+    def executeOpcodeFX55IncrementX(self, operands=None):
+        """ Store V0 to VX in memory starting at I, then add X to I """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.memory.write(self.indexRegister, bytes(self.vRegister[:x + 1]))
+        self.indexRegister += x
+        self.increaseProgramCounter()
+
+    def executeOpcodeFX65IncrementX(self, operands=None):
+        """ Load V0 to VX from memory starting at I, then add X to I """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.vRegister[:x + 1] = self.memory.read(self.indexRegister, x + 1)
+        self.indexRegister += x
+        self.increaseProgramCounter()
+
+    def executeOpcodeFX55IncrementXPlus1(self, operands=None):
+        """ Store V0 to VX in memory starting at I, leaving I past them """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.memory.write(self.indexRegister, bytes(self.vRegister[:x + 1]))
+        self.indexRegister += x + 1
+        self.increaseProgramCounter()
+
+    def executeOpcodeFX65IncrementXPlus1(self, operands=None):
+        """ Load V0 to VX from memory starting at I, leaving I past them """
+        x, y, n, nn, nnn = operands or self.decodeOperands()
+        self.vRegister[:x + 1] = self.memory.read(self.indexRegister, x + 1)
+        self.indexRegister += x + 1
+        self.increaseProgramCounter()
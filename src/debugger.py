@@ -0,0 +1,231 @@
+from instruction_cache import InstructionCache
+from run_result import RunResult
+
+
+class DebuggerStop(Exception):
+    """ Raised before an instruction to stop the run loop at it """
+
+    def __init__(self, reason, programCounter, address=None, length=0,
+                 access=None):
+        Exception.__init__(self, reason, programCounter)
+        self.reason = reason
+        self.programCounter = programCounter
+        # The bytes a watchpoint caught the instruction accessing
+        self.address = address
+        self.length = length
+        self.access = access
+
+    def __repr__(self):
+        if self.address is None:
+            return "DebuggerStop(%s, pc=0x%03X)" % (
+                self.reason, self.programCounter
+            )
+
+        return "DebuggerStop(%s, pc=0x%03X, %s 0x%03X+%d)" % (
+            self.reason, self.programCounter, self.access, self.address,
+            self.length
+        )
+
+
+class Debugger(object):
+    """ Breakpoints and memory watchpoints that cost nothing until set
+
+    A breakpoint swaps a trap into the instruction cache entry of its
+    address, and watchpoints swap checking accessors onto the Memory
+    instance, so every other instruction runs exactly the handlers it
+    always did. Either stops the run loop before the instruction, which
+    is left unexecuted. While breakpoints are set the CPU interprets,
+    since translated blocks bypass the cache, and spins through idle
+    loops so every pass is seen.
+    """
+    READ = "read"
+    WRITE = "write"
+
+    def __init__(self, cpu):
+        self.cpu = cpu
+        # Condition, or None, of the breakpoint at each address
+        self.breakpoints = {}
+        # (start, end) ranges of bytes watched for each access
+        self.readWatches = []
+        self.writeWatches = []
+        self.lastStop = None
+        # The next run steps over the instruction stopped before here
+        self.resumeAddress = None
+        self.suspended = False
+        self.trapping = False
+        self.originalIdleSkipping = True
+        self.plainRead = None
+        self.plainGetByte = None
+        self.plainWrite = None
+        self.plainSetByte = None
+
+    def addBreakpoint(self, address, condition=None):
+        """ Stop before the instruction at address if condition(cpu) holds
+        or no condition is given
+        """
+        self.breakpoints[address] = condition
+
+        if not self.trapping:
+            self.installTraps()
+
+        self.cpu.instructionCache.entries[address] = None
+
+    def removeBreakpoint(self, address):
+        del self.breakpoints[address]
+        self.cpu.instructionCache.entries[address] = None
+
+        if not self.breakpoints:
+            self.uninstallTraps()
+
+    def addWatchpoint(self, start, end=None, read=False, write=True):
+        """ Stop before an instruction reading or writing any of the bytes
+        start..end-1, or just start
+        """
+        if end is None:
+            end = start + 1
+
+        if read:
+            self.readWatches.append((start, end))
+
+        if write:
+            self.writeWatches.append((start, end))
+
+        self.installAccessors()
+
+    def removeWatchpoint(self, start, end=None):
+        if end is None:
+            end = start + 1
+
+        watch = (start, end)
+        self.readWatches = [w for w in self.readWatches if w != watch]
+        self.writeWatches = [w for w in self.writeWatches if w != watch]
+        self.installAccessors()
+
+    def clear(self):
+        """ Remove every breakpoint and watchpoint """
+        for address in list(self.breakpoints):
+            self.removeBreakpoint(address)
+
+        self.readWatches = []
+        self.writeWatches = []
+        self.installAccessors()
+
+    def installTraps(self):
+        """ Trap through the cache fill, as a layer that turns the
+        translator off alongside any profiler or tracer
+        """
+        cpu = self.cpu
+        self.originalIdleSkipping = cpu.idleSkipping
+        cpu.idleSkipping = False
+        cpu.instructionCache.fill = self.fill
+        cpu.addInstrumentation(self)
+        self.trapping = True
+
+    def uninstallTraps(self):
+        cpu = self.cpu
+        del cpu.instructionCache.fill
+        cpu.removeInstrumentation(self)
+
+        # Leave idle skipping alone if it was switched on again meanwhile
+        if not cpu.idleSkipping:
+            cpu.idleSkipping = self.originalIdleSkipping
+
+        self.trapping = False
+
+    def fill(self, address):
+        """ Decode as the cache does, trapping breakpoint addresses """
+        cache = self.cpu.instructionCache
+        entry = InstructionCache.fill(cache, address)
+
+        if address in self.breakpoints:
+            entry = cache.entries[address] = (entry[0], self.trap, entry[2])
+
+        return entry
+
+    def trap(self, cpu, operands=None):
+        """ Handler at breakpoint addresses, run in place of the real one """
+        condition = self.breakpoints[cpu.programCounter]
+
+        if not self.suspended and (condition is None or condition(cpu)):
+            self.halt(RunResult.BREAKPOINT)
+
+        return cpu.dispatchTable[cpu.opcode](cpu, operands)
+
+    def installAccessors(self):
+        """ Put checking accessors only on the kinds of access watched """
+        memory = self.cpu.memory
+
+        for name in ("read", "getByte", "write", "setByte"):
+            memory.__dict__.pop(name, None)
+
+        self.plainRead = memory.read
+        self.plainGetByte = memory.getByte
+        self.plainWrite = memory.write
+        self.plainSetByte = memory.setByte
+
+        if self.readWatches:
+            memory.read = self.watchedRead
+            memory.getByte = self.watchedGetByte
+
+        if self.writeWatches:
+            memory.write = self.watchedWrite
+            memory.setByte = self.watchedSetByte
+
+    def watchedRead(self, position, length):
+        self.checkAccess(self.readWatches, position, length, self.READ)
+        return self.plainRead(position, length)
+
+    def watchedGetByte(self, position):
+        self.checkAccess(self.readWatches, position, 1, self.READ)
+        return self.plainGetByte(position)
+
+    def watchedWrite(self, position, data):
+        self.checkAccess(self.writeWatches, position, len(data), self.WRITE)
+        self.plainWrite(position, data)
+
+    def watchedSetByte(self, position, newByte):
+        self.checkAccess(self.writeWatches, position, 1, self.WRITE)
+        self.plainSetByte(position, newByte)
+
+    def checkAccess(self, watches, position, length, access):
+        if self.suspended:
+            return
+
+        end = position + length
+
+        for start, watchEnd in watches:
+            if position < watchEnd and start < end:
+                self.halt(RunResult.WATCHPOINT, position, length, access)
+
+    def halt(self, reason, address=None, length=0, access=None):
+        programCounter = self.cpu.programCounter
+        self.lastStop = DebuggerStop(
+            reason, programCounter, address, length, access
+        )
+        self.resumeAddress = programCounter
+        raise self.lastStop
+
+    def run(self, maxCycles, until):
+        """ Run the CPU, first stepping over the instruction it last
+        stopped before if it is still there
+        """
+        cpu = self.cpu
+        resume = self.resumeAddress == cpu.programCounter
+        self.resumeAddress = None
+
+        if not resume or not maxCycles:
+            return cpu.runEngine(maxCycles, until)
+
+        self.suspended = True
+
+        try:
+            result = cpu.runEngine(1, until)
+        finally:
+            self.suspended = False
+
+        if result.reason != RunResult.BUDGET or maxCycles == 1:
+            return result
+
+        rest = cpu.runEngine(maxCycles - result.cycles, until)
+        rest.cycles += result.cycles
+        return rest
@@ -0,0 +1,357 @@
+from instruction_decoder import InstructionDecoder
+from unknown_opcode_exception import UnknownOpcodeException
+
+
+class BasicBlock(object):
+    """ Straight-line run of instructions from start up to end """
+
+    def __init__(self, start):
+        self.start = start
+        self.end = start
+        self.successors = []
+        self.calls = []
+
+    def __repr__(self):
+        return "<BasicBlock 0x%03X-0x%03X>" % (self.start, self.end)
+
+
+class Disassembler(object):
+    """ Static recursive-descent analysis of a ROM image in Memory
+
+    Only addresses reachable from the entry point are decoded as code,
+    which keeps sprites and tables inside the ROM out of the listing.
+    BNNN jumps to V0 + NNN cannot be followed, so the 256 bytes they may
+    land in are reported as unknown rather than claimed as data. Opcodes
+    are grouped by the same keys as CPU.opcodeTable.
+    """
+    ENTRY = 0x200
+
+    JUMP = 0x1000
+    CALL = 0x2000
+    RETURN = 0x00EE
+    COMPUTED_JUMP = 0xB000
+    LONG_LOAD = InstructionDecoder.LONG_LOAD
+    SKIP_KEYS = frozenset([0x3000, 0x4000, 0x5000, 0x9000, 0xE09E, 0xE0A1])
+    # Keys the analysis cannot continue past
+    STOP_KEYS = frozenset([None, 0x0000])
+
+    CODE = "code"
+    DATA = "data"
+    UNKNOWN = "unknown"
+
+    MNEMONICS = {
+        0x0000: "SYS 0x{nnn:03X}",
+        0x00C0: "SCD {n}",
+        0x00E0: "CLS",
+        0x00EE: "RET",
+        0x00FB: "SCR",
+        0x00FC: "SCL",
+        0x00FE: "LOW",
+        0x00FF: "HIGH",
+        0x1000: "JP 0x{nnn:03X}",
+        0x2000: "CALL 0x{nnn:03X}",
+        0x3000: "SE V{x:X}, 0x{nn:02X}",
+        0x4000: "SNE V{x:X}, 0x{nn:02X}",
+        0x5000: "SE V{x:X}, V{y:X}",
+        0x6000: "LD V{x:X}, 0x{nn:02X}",
+        0x7000: "ADD V{x:X}, 0x{nn:02X}",
+        0x8000: "LD V{x:X}, V{y:X}",
+        0x8001: "OR V{x:X}, V{y:X}",
+        0x8002: "AND V{x:X}, V{y:X}",
+        0x8003: "XOR V{x:X}, V{y:X}",
+        0x8004: "ADD V{x:X}, V{y:X}",
+        0x8005: "SUB V{x:X}, V{y:X}",
+        0x8006: "SHR V{x:X}, V{y:X}",
+        0x8007: "SUBN V{x:X}, V{y:X}",
+        0x800E: "SHL V{x:X}, V{y:X}",
+        0x9000: "SNE V{x:X}, V{y:X}",
+        0xA000: "LD I, 0x{nnn:03X}",
+        0xB000: "JP V0, 0x{nnn:03X}",
+        0xC000: "RND V{x:X}, 0x{nn:02X}",
+        0xD000: "DRW V{x:X}, V{y:X}, {n}",
+        0xE09E: "SKP V{x:X}",
+        0xE0A1: "SKNP V{x:X}",
+        0xF000: "LD I, LONG",
+        0xF001: "PLANE {x}",
+        0xF007: "LD V{x:X}, DT",
+        0xF00A: "LD V{x:X}, K",
+        0xF015: "LD DT, V{x:X}",
+        0xF018: "LD ST, V{x:X}",
+        0xF01E: "ADD I, V{x:X}",
+        0xF029: "LD F, V{x:X}",
+        0xF033: "LD B, V{x:X}",
+        0xF055: "LD [I], V{x:X}",
+        0xF065: "LD V{x:X}, [I]",
+    }
+
+    def __init__(self, memory, start=ENTRY, end=None, entry=None):
+        self.memory = memory
+        self.start = start
+        self.end = len(memory.memory) if end is None else end
+        self.entry = start if entry is None else entry
+
+        # Address to opcode of every instruction reached
+        self.instructions = {}
+        self.blocks = {}
+        # Caller function entry to the entries it calls
+        self.callGraph = {}
+        # Block start to the block starts control may pass to
+        self.jumpGraph = {}
+        self.functions = set()
+        # BNNN address to the first and last address it may jump to
+        self.computedJumps = {}
+        # Addresses loaded into I by ANNN, usually sprites or tables
+        self.dataReferences = set()
+
+    def analyse(self):
+        self.decode()
+        self.buildBlocks()
+        self.buildCallGraph()
+        return self
+
+    def decode(self):
+        """ Follow every path from the entry point, recording opcodes """
+        memory = self.memory.memory
+        keys = InstructionDecoder.keyTable()
+        instructions = self.instructions
+        last = len(memory) - 1
+        self.functions.add(self.entry)
+        pending = [self.entry]
+
+        while pending:
+            address = pending.pop()
+
+            while address < last and address not in instructions:
+                opcode = memory[address] << 8 | memory[address + 1]
+                key = keys[opcode]
+
+                if key in self.STOP_KEYS:
+                    break
+
+                instructions[address] = opcode
+                nnn = opcode & 0x0FFF
+
+                if key == self.JUMP:
+                    pending.append(nnn)
+                    break
+
+                if key == self.RETURN:
+                    break
+
+                if key == self.COMPUTED_JUMP:
+                    self.computedJumps[address] = (nnn, nnn + 0xFF)
+                    break
+
+                if key == self.CALL:
+                    self.functions.add(nnn)
+                    pending.append(nnn)
+                elif key in self.SKIP_KEYS:
+                    pending.append(self.skipTarget(address))
+                elif key == 0xA000:
+                    self.dataReferences.add(nnn)
+                elif key == self.LONG_LOAD:
+                    self.dataReferences.add(self.memory.getWord(address + 2))
+
+                address += self.length(key)
+
+    def length(self, key):
+        """ Bytes taken by an instruction, four for XO-CHIP F000 NNNN """
+        return 4 if key == self.LONG_LOAD else 2
+
+    def skipTarget(self, address):
+        """ Address a skip at address lands on, past F000 NNNN whole """
+        memory = self.memory.memory
+
+        if address + 3 < len(memory) and (
+            memory[address + 2] << 8 | memory[address + 3]
+        ) == self.LONG_LOAD:
+            return address + 6
+
+        return address + 4
+
+    def successors(self, address, opcode):
+        """ Addresses control may reach next, calls excluded """
+        key = InstructionDecoder.keyTable()[opcode]
+
+        if key == self.JUMP:
+            return [opcode & 0x0FFF]
+
+        if key in (self.RETURN, self.COMPUTED_JUMP):
+            return []
+
+        if key in self.SKIP_KEYS:
+            return [address + 2, self.skipTarget(address)]
+
+        return [address + self.length(key)]
+
+    def buildBlocks(self):
+        """ Split the decoded instructions into basic blocks """
+        keys = InstructionDecoder.keyTable()
+        instructions = self.instructions
+        leaders = {self.entry} | self.functions
+
+        for address, opcode in instructions.items():
+            key = keys[opcode]
+
+            if key == self.CALL or key == self.JUMP or key in self.SKIP_KEYS:
+                leaders.update(self.successors(address, opcode))
+                leaders.add(address + 2)
+
+        for start in sorted(leaders & instructions.keys()):
+            block = BasicBlock(start)
+            address = start
+
+            while True:
+                opcode = instructions[address]
+                key = keys[opcode]
+
+                if key == self.CALL:
+                    block.calls.append(opcode & 0x0FFF)
+
+                successors = self.successors(address, opcode)
+                address += self.length(key)
+
+                if successors != [address] or address in leaders:
+                    break
+
+                if address not in instructions:
+                    successors = []
+                    break
+
+            block.end = address
+            block.successors = [
+                target for target in successors if target in instructions
+            ]
+            self.blocks[start] = block
+            self.jumpGraph[start] = block.successors
+
+    def buildCallGraph(self):
+        """ Walk each function's blocks to find the functions it calls """
+        for function in self.functions:
+            if function not in self.blocks:
+                continue
+
+            callees = set()
+            seen = set()
+            pending = [function]
+
+            while pending:
+                start = pending.pop()
+
+                if start in seen or start not in self.blocks:
+                    continue
+
+                seen.add(start)
+                block = self.blocks[start]
+                callees.update(block.calls)
+                pending.extend(block.successors)
+
+            self.callGraph[function] = callees
+
+    def regions(self):
+        """ (start, end, kind) runs splitting the ROM into code and data """
+        kinds = [self.DATA] * (self.end - self.start)
+
+        for first, last in self.computedJumps.values():
+            for address in range(max(first, self.start),
+                                 min(last + 1, self.end)):
+                kinds[address - self.start] = self.UNKNOWN
+
+        keys = InstructionDecoder.keyTable()
+
+        for address, opcode in self.instructions.items():
+            length = self.length(keys[opcode])
+
+            for offset in range(address, address + length):
+                if self.start <= offset < self.end:
+                    kinds[offset - self.start] = self.CODE
+
+        regions = []
+
+        for offset, kind in enumerate(kinds):
+            if regions and regions[-1][2] == kind:
+                regions[-1][1] = self.start + offset + 1
+            else:
+                regions.append(
+                    [self.start + offset, self.start + offset + 1, kind]
+                )
+
+        return [tuple(region) for region in regions]
+
+    @classmethod
+    def mnemonic(cls, opcode):
+        key = InstructionDecoder.keyTable()[opcode]
+
+        if key is None:
+            return "DW 0x%04X" % opcode
+
+        x, y, n, nn, nnn = InstructionDecoder.operandTable()[opcode]
+        return cls.MNEMONICS[key].format(x=x, y=y, n=n, nn=nn, nnn=nnn)
+
+    def listing(self):
+        """ Human-readable lines covering the whole ROM """
+        memory = self.memory.memory
+        lines = []
+
+        for start, end, kind in self.regions():
+            address = start
+
+            while address < end:
+                if kind == self.CODE and address in self.instructions:
+                    opcode = self.instructions[address]
+                    label = ""
+
+                    if address in self.functions:
+                        label = "sub_%03X:" % address
+                    elif address in self.blocks:
+                        label = "loc_%03X:" % address
+
+                    if label:
+                        lines.append(label)
+
+                    if opcode == self.LONG_LOAD:
+                        word = memory[address + 2] << 8 | memory[address + 3]
+                        lines.append("0x%03X: F000 %04X    LD I, 0x%04X" % (
+                            address, word, word
+                        ))
+                        address += 4
+                        continue
+
+                    lines.append("0x%03X: %04X    %s" % (
+                        address, opcode, self.mnemonic(opcode)
+                    ))
+                    address += 2
+                else:
+                    chunk = memory[address:min(address + 8, end)]
+
+                    # A byte between instructions is never worth a row of 8
+                    if kind == self.CODE:
+                        chunk = memory[address:address + 1]
+
+                    lines.append("0x%03X: DB %s    ; %s" % (
+                        address, ", ".join("0x%02X" % b for b in chunk), kind
+                    ))
+                    address += len(chunk)
+
+        return lines
+
+    def prewarm(self, cpu):
+        """ Decode every reached instruction and translate every block """
+        cache = cpu.instructionCache
+
+        for address in self.instructions:
+            if cache.entries[address] is None:
+                cache.fill(address)
+
+        translator = cpu.blockTranslator
+
+        if translator is not None:
+            for start in self.blocks:
+                if start in translator.blocks:
+                    continue
+
+                # Left to raise when reached, as it would untranslated
+                try:
+                    translator.translate(start)
+                except UnknownOpcodeException:
+                    pass
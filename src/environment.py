@@ -0,0 +1,264 @@
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from cpu import CPU
+from memory import Memory
+from scheduler import Scheduler
+from screen import Screen
+
+
+class Environment(object):
+    """ Gym-style wrapper stepping one CHIP-8 machine a few frames at a time
+
+    Action 0 holds no key and action k holds key k - 1. Observations are
+    uint8 arrays over the screen's packed rows, eight pixels per byte,
+    sharing memory with the framebuffer, so they change as the machine
+    runs. reward(cpu) scores each step; an episode ends after maxSteps
+    or when the machine raises.
+    """
+    ACTIONS = 17
+    MEMORY_SIZE = 4096
+    ROM_ADDRESS = 0x200
+
+    def __init__(self, rom, frameSkip=4, instructionsPerFrame=10, seed=0,
+                 reward=None, maxSteps=None, width=64, height=32,
+                 engine=CPU.ENGINE_INTERPRETER, screenBuffer=None):
+        self.frameSkip = frameSkip
+        self.reward = reward
+        self.maxSteps = maxSteps
+        memory = Memory(self.MEMORY_SIZE)
+        memory.load(self.ROM_ADDRESS, rom)
+        self.screen = Screen(width, height, screenBuffer)
+        self.cpu = CPU(memory, self.screen, engine)
+        self.cpu.seedRandom(seed)
+        self.scheduler = Scheduler(
+            self.cpu, instructionsPerFrame, Scheduler.MODE_UNTHROTTLED
+        )
+        self.observation = np.frombuffer(
+            self.screen.screen, dtype=np.uint8
+        ).reshape(height, self.screen.rowBytes)
+        self.initialState = self.cpu.snapshot()
+        self.heldKey = None
+        self.steps = 0
+
+    def reset(self, seed=None):
+        """ Return to the state after loading the ROM """
+        self.cpu.restore(self.initialState)
+
+        if seed is not None:
+            self.cpu.seedRandom(seed)
+
+        self.heldKey = None
+        self.steps = 0
+        return self.observation
+
+    def holdKey(self, action):
+        key = action - 1 if action else None
+
+        if key == self.heldKey:
+            return
+
+        if self.heldKey is not None:
+            self.cpu.releaseKey(self.heldKey)
+
+        if key is not None:
+            self.cpu.pressKey(key)
+
+        self.heldKey = key
+
+    def step(self, action):
+        """ Hold the action's key for frameSkip frames
+
+        Returns (observation, reward, done, info).
+        """
+        self.holdKey(action)
+        scheduler = self.scheduler
+        error = None
+
+        try:
+            for frame in range(self.frameSkip):
+                scheduler.tick()
+        except Exception as exception:
+            error = exception
+
+        self.steps += 1
+        reward = 0.0 if self.reward is None else self.reward(self.cpu)
+        done = error is not None or (
+            self.maxSteps is not None and self.steps >= self.maxSteps
+        )
+        info = {"cycles": scheduler.cycles, "error": error}
+        return self.observation, reward, done, info
+
+    def pixels(self):
+        """ Unpacked copy of the screen, one 0 or 1 byte per pixel """
+        return np.unpackbits(self.observation, axis=1)
+
+    def close(self):
+        """ Let go of a given screen buffer so its memory can be freed """
+        del self.observation
+
+        if isinstance(self.screen.screen, memoryview):
+            self.screen.screen.release()
+
+
+class VectorEnvironment(object):
+    """ Steps count Environments at once
+
+    Every screen is drawn straight into one shared block, so the
+    observations array covering all of them is never copied. With
+    workers, the environments are split across that many processes that
+    draw into the block through shared memory; otherwise they run in
+    this process. Finished environments are reset automatically, and
+    their observation is then the first of the next episode. Arrays
+    returned by reset and step view the block, and must be dropped
+    before close.
+    """
+
+    def __init__(self, rom, count, workers=0, seed=0, width=64, height=32,
+                 **settings):
+        self.count = count
+        self.rowBytes = width // 8
+        frameBytes = height * self.rowBytes
+        self.block = shared_memory.SharedMemory(
+            create=True, size=count * frameBytes
+        )
+        self.observations = np.ndarray(
+            (count, height, self.rowBytes), dtype=np.uint8,
+            buffer=self.block.buf
+        )
+        self.environments = []
+        self.connections = []
+        self.processes = []
+        settings.update(width=width, height=height)
+
+        if not workers:
+            for index in range(count):
+                self.environments.append(createEnvironment(
+                    rom, seed, index, self.block.buf, frameBytes, settings
+                ))
+            return
+
+        for indices in np.array_split(np.arange(count), workers):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=serveEnvironments, daemon=True, args=(
+                    child, self.block.name, indices.tolist(), rom, seed,
+                    frameBytes, settings,
+                )
+            )
+            process.start()
+            child.close()
+            self.connections.append((parent, len(indices)))
+            self.processes.append(process)
+
+    def reset(self):
+        if self.environments:
+            for environment in self.environments:
+                environment.reset()
+        else:
+            for connection, size in self.connections:
+                connection.send(("reset", None))
+
+            for connection, size in self.connections:
+                connection.recv()
+
+        return self.observations
+
+    def step(self, actions):
+        """ Step every environment, returns (observations, rewards,
+        dones, infos) with one entry per environment
+        """
+        actions = list(actions)
+
+        if self.environments:
+            results = stepEnvironments(self.environments, actions)
+        else:
+            offset = 0
+
+            for connection, size in self.connections:
+                connection.send(("step", actions[offset:offset + size]))
+                offset += size
+
+            results = []
+
+            for connection, size in self.connections:
+                results.extend(connection.recv())
+
+        rewards = np.array([result[0] for result in results])
+        dones = np.array([result[1] for result in results], dtype=bool)
+        infos = [result[2] for result in results]
+        return self.observations, rewards, dones, infos
+
+    def close(self):
+        for connection, size in self.connections:
+            connection.send(("close", None))
+            connection.close()
+
+        for process in self.processes:
+            process.join()
+
+        for environment in self.environments:
+            environment.close()
+
+        self.environments = []
+        self.connections = []
+        self.processes = []
+        del self.observations
+        self.block.close()
+        self.block.unlink()
+
+
+def createEnvironment(rom, seed, index, buffer, frameBytes, settings):
+    """ Environment index drawing into its slot of buffer """
+    start = index * frameBytes
+    return Environment(
+        rom, seed=seed + index,
+        screenBuffer=buffer[start:start + frameBytes], **settings
+    )
+
+
+def stepEnvironments(environments, actions):
+    results = []
+
+    for environment, action in zip(environments, actions):
+        observation, reward, done, info = environment.step(action)
+
+        if done:
+            environment.reset()
+
+        if info["error"] is not None:
+            info["error"] = repr(info["error"])
+
+        results.append((reward, done, info))
+
+    return results
+
+
+def serveEnvironments(connection, blockName, indices, rom, seed, frameBytes,
+                      settings):
+    """ Worker process loop running the environments at indices """
+    block = shared_memory.SharedMemory(name=blockName)
+    # The parent owns the block and unlinks it
+    resource_tracker.unregister(block._name, "shared_memory")
+    environments = [
+        createEnvironment(rom, seed, index, block.buf, frameBytes, settings)
+        for index in indices
+    ]
+
+    while True:
+        command, argument = connection.recv()
+
+        if command == "step":
+            connection.send(stepEnvironments(environments, argument))
+        elif command == "reset":
+            for environment in environments:
+                environment.reset()
+
+            connection.send(None)
+        else:
+            break
+
+    for environment in environments:
+        environment.close()
+
+    block.close()
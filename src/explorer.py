@@ -0,0 +1,319 @@
+import collections
+import functools
+import hashlib
+import heapq
+from scheduler import Scheduler
+from snapshot import Snapshot
+
+
+class ExplorationNode(object):
+    """ One explored machine state and the input that led to it
+
+    Memory is held as a tuple of immutable pages. A child shares every
+    page its frame did not write with its parent, so forking costs only
+    the pages actually touched.
+    """
+
+    def __init__(self, registers, pages, digests, screen, parent=None,
+                 action=None, score=0):
+        self.registers = registers
+        self.pages = pages
+        self.digests = digests
+        self.screen = screen
+        self.parent = parent
+        self.action = action
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.score = score
+
+    def key(self):
+        """ 128-bit hash of the state, built from the page digests """
+        digest = hashlib.blake2b(self.registers, digest_size=16)
+        digest.update(self.screen)
+
+        for pageDigest in self.digests:
+            digest.update(pageDigest)
+
+        return digest.digest()
+
+    def inputs(self):
+        """ Actions taken from the root to reach this state """
+        actions = []
+        node = self
+
+        while node.parent is not None:
+            actions.append(node.action)
+            node = node.parent
+
+        actions.reverse()
+        return actions
+
+    def __repr__(self):
+        return "<ExplorationNode depth=%d inputs=%r>" % (
+            self.depth, self.inputs()
+        )
+
+
+class Finding(object):
+    """ A frame that ended the machine, and the inputs reproducing it """
+    CRASH = "crash"
+    STACK_OVERFLOW = "stackOverflow"
+    STACK_UNDERFLOW = "stackUnderflow"
+
+    def __init__(self, kind, inputs, address, error=None):
+        self.kind = kind
+        self.inputs = inputs
+        self.address = address
+        self.error = error
+
+    def __repr__(self):
+        return "<Finding %s at 0x%03X inputs=%r>" % (
+            self.kind, self.address, self.inputs
+        )
+
+
+class VisitedSet(object):
+    """ State keys seen so far, forgetting the oldest beyond capacity
+
+    A forgotten state may be explored again, which costs time but never
+    hides a state, so the set stays within a fixed memory budget.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.keys = set()
+        self.order = collections.deque()
+        self.forgotten = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def add(self, key):
+        """ Record key, return False if it was already present """
+        if key in self.keys:
+            return False
+
+        self.keys.add(key)
+        self.order.append(key)
+
+        if len(self.order) > self.capacity:
+            self.keys.discard(self.order.popleft())
+            self.forgotten += 1
+
+        return True
+
+
+class Explorer(object):
+    """ Searches the states a ROM reaches under every keypad input
+
+    From each state one frame is run per action: 0 holds no key and k
+    holds key k - 1. Each child is hashed and dropped if already
+    visited. Without a score the search is breadth-first; with
+    score(cpu) the highest scoring states are expanded first. Frames
+    that raise or leave the stack out of range become findings, one per
+    kind and address, and the addresses executed are kept as coverage.
+    """
+    ACTIONS = 17
+    PAGE_SIZE = 256
+
+    def __init__(self, cpu, instructionsPerFrame=10, score=None,
+                 maxVisited=1 << 20):
+        self.cpu = cpu
+        self.score = score
+        self.scheduler = Scheduler(
+            cpu, instructionsPerFrame, Scheduler.MODE_UNTHROTTLED
+        )
+        self.visited = VisitedSet(maxVisited)
+        self.findings = []
+        self.findingSites = set()
+        self.coverage = bytearray(len(cpu.memory.memory))
+        self.expanded = 0
+        self.duplicates = 0
+        self.root = None
+        self.best = None
+        self.dirtyPages = set()
+        self.loadedPages = None
+
+    def install(self):
+        """ Record coverage and page writes while exploring """
+        self.cpu.addInstrumentation(self, self.instrument)
+        self.cpu.memory.addWriteListener(self.recordWrite)
+
+    def uninstall(self):
+        self.cpu.memory.removeWriteListener(self.recordWrite)
+        self.cpu.removeInstrumentation(self)
+
+    def instrument(self, handler):
+        coverage = self.coverage
+
+        @functools.wraps(handler)
+        def covered(cpu, operands=None):
+            coverage[cpu.programCounter] = 1
+            return handler(cpu, operands)
+
+        return covered
+
+    def recordWrite(self, start, end):
+        size = self.PAGE_SIZE
+        self.dirtyPages.update(range(start // size, (end - 1) // size + 1))
+
+    def capturePages(self, parent):
+        """ Pages of memory as it is, sharing the clean ones with parent """
+        memory = self.cpu.memory.memory
+        size = self.PAGE_SIZE
+
+        if parent is None:
+            dirty = range((len(memory) + size - 1) // size)
+            pages = [None] * len(dirty)
+            digests = [None] * len(dirty)
+        else:
+            dirty = self.dirtyPages
+            pages = list(parent.pages)
+            digests = list(parent.digests)
+
+        for index in dirty:
+            page = bytes(memory[index * size:(index + 1) * size])
+
+            if page != pages[index]:
+                pages[index] = page
+                digests[index] = hashlib.blake2b(
+                    page, digest_size=16
+                ).digest()
+
+        self.dirtyPages.clear()
+        return tuple(pages), tuple(digests)
+
+    def capture(self, parent=None, action=None):
+        cpu = self.cpu
+        pages, digests = self.capturePages(parent)
+        self.loadedPages = pages
+        score = 0 if self.score is None else self.score(cpu)
+        return ExplorationNode(
+            Snapshot.captureRegisters(cpu), pages, digests,
+            cpu.screen.pixelBytes(), parent, action, score
+        )
+
+    def load(self, node):
+        """ Put the machine in node's state, rewriting only changed pages """
+        cpu = self.cpu
+        Snapshot.applyRegisters(cpu, node.registers)
+        memory = cpu.memory
+        size = self.PAGE_SIZE
+
+        for index, page in enumerate(node.pages):
+            if page is not self.loadedPages[index]:
+                memory.load(index * size, page)
+
+        self.loadedPages = node.pages
+        self.dirtyPages.clear()
+        cpu.screen.loadPixels(node.screen)
+
+    def runFrame(self, node, action):
+        """ Run one frame from node holding action's key
+
+        Returns the child node, or None after recording a finding.
+        """
+        cpu = self.cpu
+        self.load(node)
+        key = action - 1 if action else None
+        error = None
+
+        if key is not None:
+            cpu.pressKey(key)
+
+        try:
+            self.scheduler.tick()
+        except Exception as exception:
+            error = exception
+
+        if key is not None:
+            cpu.releaseKey(key)
+
+        if error is not None:
+            kind = Finding.CRASH
+
+            if (cpu.opcode & 0xF000 == 0x2000
+                    and cpu.stackPointer >= len(cpu.stack)):
+                kind = Finding.STACK_OVERFLOW
+            elif cpu.opcode == 0x00EE and cpu.stackPointer == 0:
+                kind = Finding.STACK_UNDERFLOW
+        else:
+            return self.capture(node, action)
+
+        # Pages the frame wrote match no node, so the next load rewrites them
+        loaded = list(node.pages)
+
+        for index in self.dirtyPages:
+            loaded[index] = None
+
+        self.loadedPages = loaded
+        site = (kind, cpu.programCounter)
+
+        # The first path found is kept, the shortest when breadth-first
+        if site not in self.findingSites:
+            self.findingSites.add(site)
+            self.findings.append(Finding(
+                kind, node.inputs() + [action], cpu.programCounter, error
+            ))
+
+        return None
+
+    def explore(self, budget=1000, maxDepth=None):
+        """ Expand up to budget states from the machine's current one """
+        self.install()
+
+        try:
+            self.search(budget, maxDepth)
+        finally:
+            self.uninstall()
+
+        return self
+
+    def search(self, budget, maxDepth):
+        self.root = self.best = self.capture()
+        self.visited.add(self.root.key())
+        bestFirst = self.score is not None
+        frontier = [(0, 0, self.root)] if bestFirst else collections.deque(
+            [self.root]
+        )
+        order = 1
+
+        while frontier and self.expanded < budget:
+            if bestFirst:
+                node = heapq.heappop(frontier)[2]
+            else:
+                node = frontier.popleft()
+
+            self.expanded += 1
+
+            if maxDepth is not None and node.depth >= maxDepth:
+                continue
+
+            for action in range(self.ACTIONS):
+                child = self.runFrame(node, action)
+
+                if child is None:
+                    continue
+
+                if not self.visited.add(child.key()):
+                    self.duplicates += 1
+                    continue
+
+                if child.score > self.best.score:
+                    self.best = child
+
+                if bestFirst:
+                    heapq.heappush(frontier, (-child.score, order, child))
+                    order += 1
+                else:
+                    frontier.append(child)
+
+    def unreached(self, disassembler):
+        """ Statically decoded instructions no explored path executed """
+        coverage = self.coverage
+        return sorted(
+            address for address in disassembler.instructions
+            if not coverage[address]
+        )
@@ -0,0 +1,119 @@
+import queue
+import threading
+
+
+class FramePipeline(object):
+    """ Emulates in one thread while another hands frames to a sink
+
+    Frames published by the scheduler's buffer swap go through a bounded
+    queue. When the sink falls behind, the oldest waiting frame is
+    dropped, so the emulation thread never waits on the sink.
+    """
+    # Queued after the last frame to end the sink thread
+    END = None
+
+    def __init__(self, scheduler, sink, maxQueue=2):
+        self.scheduler = scheduler
+        self.sink = sink
+        self.frames = queue.Queue(maxQueue)
+        self.framesQueued = 0
+        self.framesDropped = 0
+        self.framesDelivered = 0
+        self.error = None
+        self.stopRequested = False
+        self.sinkThread = None
+        self.emulationThread = None
+
+    def start(self, ticks=None):
+        """ Run in the background for ticks, or until stop is called """
+        self.emulationThread = threading.Thread(
+            target=self.run, args=(ticks,), name="emulation", daemon=True
+        )
+        self.emulationThread.start()
+
+    def join(self):
+        self.emulationThread.join()
+
+    def stop(self):
+        self.stopRequested = True
+
+    def run(self, ticks=None):
+        """ Emulate on this thread for ticks, return the ticks run
+
+        Ends early when a Debugger stop interrupts a tick. Re-raises an
+        exception from the sink once emulation has ended.
+        """
+        scheduler = self.scheduler
+        screen = scheduler.cpu.screen
+        unthrottled = scheduler.mode == scheduler.MODE_UNTHROTTLED
+        self.stopRequested = False
+        self.sinkThread = threading.Thread(
+            target=self.deliverFrames, name="sink", daemon=True
+        )
+        self.sinkThread.start()
+        lastFrame = screen.front
+        executed = 0
+
+        try:
+            while not self.stopRequested and (
+                ticks is None or executed < ticks
+            ):
+                if not scheduler.tick():
+                    break
+
+                executed += 1
+
+                if screen.front is not lastFrame:
+                    lastFrame = screen.front
+                    self.offer(lastFrame)
+
+                if not unthrottled:
+                    scheduler.waitForDeadline()
+        finally:
+            self.finish()
+
+        if self.error is not None:
+            raise self.error
+
+        return executed
+
+    def offer(self, frame):
+        """ Queue frame without blocking, dropping the oldest if full """
+        frames = self.frames
+
+        while True:
+            try:
+                frames.put_nowait(frame)
+                self.framesQueued += 1
+                return
+            except queue.Full:
+                pass
+
+            try:
+                frames.get_nowait()
+                self.framesDropped += 1
+            except queue.Empty:
+                pass
+
+    def finish(self):
+        self.offer(self.END)
+        self.framesQueued -= 1
+        self.sinkThread.join()
+
+    def deliverFrames(self):
+        frames = self.frames
+
+        while True:
+            frame = frames.get()
+
+            if frame is self.END:
+                return
+
+            if self.error is not None:
+                continue
+
+            try:
+                self.sink(frame)
+                self.framesDelivered += 1
+            except Exception as exception:
+                self.error = exception
@@ -0,0 +1,96 @@
+import struct
+
+
+class InputLog(object):
+    """ Key presses and releases stamped with the frame and cycle they hit
+
+    Together with the machine state it started from, including the CXNN
+    random state recorded here, a log replays a session exactly. Events
+    are stored as varint deltas, a few bytes each.
+    """
+    MAGIC = b"C8I"
+    VERSION = 1
+    PRESSED = 0x10
+
+    # magic, version, random state, event count
+    HEADER = struct.Struct(">3sBII")
+
+    def __init__(self, randomState):
+        self.randomState = randomState
+        # (frame, cycle, key, pressed) in the order they happened
+        self.events = []
+
+    def __len__(self):
+        return len(self.events)
+
+    def record(self, frame, cycle, key, pressed):
+        self.events.append((frame, cycle, key, pressed))
+
+    def encode(self):
+        """ Pack the log into bytes """
+        data = bytearray(self.HEADER.pack(
+            self.MAGIC, self.VERSION, self.randomState, len(self.events)
+        ))
+        frame = cycle = 0
+
+        for eventFrame, eventCycle, key, pressed in self.events:
+            self.encodeVarint(data, eventFrame - frame)
+            self.encodeVarint(data, eventCycle - cycle)
+            data.append(key | (self.PRESSED if pressed else 0))
+            frame, cycle = eventFrame, eventCycle
+
+        return bytes(data)
+
+    @classmethod
+    def decode(cls, blob):
+        """ Rebuild a log packed by encode """
+        magic, version, randomState, count = cls.HEADER.unpack_from(blob)
+
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError("Unsupported input log")
+
+        log = cls(randomState)
+        offset = cls.HEADER.size
+        frame = cycle = 0
+
+        for _ in range(count):
+            delta, offset = cls.decodeVarint(blob, offset)
+            frame += delta
+            delta, offset = cls.decodeVarint(blob, offset)
+            cycle += delta
+            flags = blob[offset]
+            offset += 1
+            log.record(frame, cycle, flags & 0x0F, bool(flags & cls.PRESSED))
+
+        return log
+
+    def save(self, path):
+        with open(path, "wb") as output:
+            output.write(self.encode())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as source:
+            return cls.decode(source.read())
+
+    @staticmethod
+    def encodeVarint(data, value):
+        while value > 0x7F:
+            data.append(value & 0x7F | 0x80)
+            value >>= 7
+
+        data.append(value)
+
+    @staticmethod
+    def decodeVarint(blob, offset):
+        value = shift = 0
+
+        while True:
+            byte = blob[offset]
+            offset += 1
+            value |= (byte & 0x7F) << shift
+
+            if byte < 0x80:
+                return value, offset
+
+            shift += 7
@@ -0,0 +1,57 @@
+from instruction_decoder import InstructionDecoder
+
+
+class InstructionCache(object):
+    """ Decoded instructions keyed by address, dropped on memory writes """
+
+    def __init__(self, memory, dispatchTable):
+        self.memory = memory
+        self.dispatchTable = dispatchTable
+        self.operands = InstructionDecoder.operandTable()
+        self.entries = [None] * len(memory.memory)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        memory.addWriteListener(self.invalidate)
+
+    def lookup(self, address):
+        """ Return the (opcode, handler, operands) entry at address """
+        entry = self.entries[address]
+
+        if entry is None:
+            return self.fill(address)
+
+        self.hits += 1
+        return entry
+
+    def fill(self, address):
+        self.misses += 1
+        opcode = self.memory.getWord(address)
+        entry = (opcode, self.dispatchTable[opcode], self.operands[opcode])
+        self.entries[address] = entry
+        return entry
+
+    def invalidate(self, start, end):
+        """ Drop every instruction overlapping the bytes start..end-1 """
+        entries = self.entries
+
+        # An instruction starting one byte earlier covers the first byte too
+        start = max(start - 1, 0)
+        dropped = end - start - entries[start:end].count(None)
+
+        if dropped:
+            entries[start:end] = [None] * (end - start)
+            self.invalidations += dropped
+
+    def flush(self, dispatchTable=None):
+        if dispatchTable is not None:
+            self.dispatchTable = dispatchTable
+
+        self.invalidate(0, len(self.entries))
+
+    def statistics(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,81 @@
+class InstructionDecoder(object):
+    """ Precomputed decoding of every 16-bit opcode, shared per process """
+    OPCODE_COUNT = 0x10000
+
+    ARITHMETIC_KEYS = frozenset([
+        0x8000, 0x8001, 0x8002, 0x8003, 0x8004,
+        0x8005, 0x8006, 0x8007, 0x800E,
+    ])
+    KEYPAD_KEYS = frozenset([0xE09E, 0xE0A1])
+    MISC_KEYS = frozenset([
+        0xF001, 0xF007, 0xF00A, 0xF015, 0xF018, 0xF01E,
+        0xF029, 0xF033, 0xF055, 0xF065,
+    ])
+    # SCHIP scrolling and resolution switches
+    SYSTEM_KEYS = frozenset([0x00E0, 0x00EE, 0x00FB, 0x00FC, 0x00FE, 0x00FF])
+    SCROLL_DOWN = 0x00C0
+    # XO-CHIP F000 NNNN, loading I from the word after it
+    LONG_LOAD = 0xF000
+
+    keys = None
+    operands = None
+
+    @classmethod
+    def decodeKey(cls, opcode):
+        """ Map an opcode to its opcode table key, None if unknown """
+        family = opcode & 0xF000
+
+        if family == 0x0000:
+            if opcode & 0xFFF0 == cls.SCROLL_DOWN:
+                return cls.SCROLL_DOWN
+
+            return opcode if opcode in cls.SYSTEM_KEYS else 0x0000
+
+        if family in (0x5000, 0x9000):
+            return family if opcode & 0x000F == 0 else None
+
+        if family == 0x8000:
+            key = opcode & 0xF00F
+            return key if key in cls.ARITHMETIC_KEYS else None
+
+        if family == 0xE000:
+            key = opcode & 0xF0FF
+            return key if key in cls.KEYPAD_KEYS else None
+
+        if opcode == cls.LONG_LOAD:
+            return cls.LONG_LOAD
+
+        if family == 0xF000:
+            key = opcode & 0xF0FF
+            return key if key in cls.MISC_KEYS else None
+
+        return family
+
+    @staticmethod
+    def extractOperands(opcode):
+        """ Split an opcode into its X, Y, N, NN and NNN fields """
+        return (
+            (opcode & 0x0F00) >> 8,
+            (opcode & 0x00F0) >> 4,
+            opcode & 0x000F,
+            opcode & 0x00FF,
+            opcode & 0x0FFF,
+        )
+
+    @classmethod
+    def keyTable(cls):
+        """ Table key of every opcode, built on first use """
+        if cls.keys is None:
+            cls.keys = [cls.decodeKey(op) for op in range(cls.OPCODE_COUNT)]
+
+        return cls.keys
+
+    @classmethod
+    def operandTable(cls):
+        """ X, Y, N, NN, NNN fields of every opcode, built on first use """
+        if cls.operands is None:
+            cls.operands = [
+                cls.extractOperands(op) for op in range(cls.OPCODE_COUNT)
+            ]
+
+        return cls.operands
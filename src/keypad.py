@@ -0,0 +1,40 @@
+class Keypad(object):
+    """ State of the sixteen hex keys, one bit per key """
+    KEY_COUNT = 16
+
+    def __init__(self):
+        self.keys = 0
+        self.listeners = []
+
+    def addListener(self, listener):
+        """ Call listener(key, pressed) whenever a key changes """
+        self.listeners.append(listener)
+
+    def removeListener(self, listener):
+        self.listeners.remove(listener)
+
+    def checkKey(self, key):
+        if not 0 <= key < self.KEY_COUNT:
+            raise ValueError("No such key: %r" % key)
+
+    def press(self, key):
+        self.checkKey(key)
+        self.keys |= 1 << key
+
+        for listener in self.listeners:
+            listener(key, True)
+
+    def release(self, key):
+        self.checkKey(key)
+        self.keys &= ~(1 << key)
+
+        for listener in self.listeners:
+            listener(key, False)
+
+    def isPressed(self, key):
+        return self.keys >> (key & 0x0F) & 1 == 1
+
+    def releaseAll(self):
+        for key in range(self.KEY_COUNT):
+            if self.keys >> key & 1:
+                self.release(key)
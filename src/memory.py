@@ -1,16 +1,75 @@
+import os
+
+
 class Memory(object):
 
     def __init__(self, size):
-        self.memory = [0x00] * size
+        self.memory = bytearray(size)
+        self.view = memoryview(self.memory)
+        self.writeListeners = []
+
+    def addWriteListener(self, listener):
+        """ Call listener(start, end) after bytes start..end-1 change """
+        self.writeListeners.append(listener)
+
+    def removeWriteListener(self, listener):
+        self.writeListeners.remove(listener)
+
+    def notifyWrite(self, start, end):
+        for listener in self.writeListeners:
+            listener(start, end)
+
+    def checkRange(self, position, length):
+        if position < 0 or position + length > len(self.memory):
+            raise IndexError
 
     def setByte(self, position, newByte):
         if position < 0:
             raise IndexError
 
-        self.memory[position] = newByte
+        self.memory[position] = newByte & 0xFF
+        self.notifyWrite(position, position + 1)
 
     def getByte(self, position):
         if position < 0:
             raise IndexError
 
         return self.memory[position]
+
+    def getWord(self, position):
+        """ Read the big-endian 16-bit word at position """
+        if position < 0:
+            raise IndexError
+
+        memory = self.memory
+        return memory[position] << 8 | memory[position + 1]
+
+    def read(self, position, length):
+        """ Return a zero-copy view of length bytes at position """
+        self.checkRange(position, length)
+        return self.view[position:position + length]
+
+    def write(self, position, data):
+        """ Copy a bytes-like object into memory at position """
+        length = len(data)
+        self.checkRange(position, length)
+        self.memory[position:position + length] = data
+        self.notifyWrite(position, position + length)
+
+    def load(self, position, data):
+        """ Load a program image, e.g. a ROM already held in memory
+
+        Loads come from the host, not the program, so they skip any
+        accessors a debugger has put on the instance.
+        """
+        Memory.write(self, position, data)
+
+    def loadRom(self, path, position=0x200):
+        """ Read a ROM file straight into memory, return its size """
+        with open(path, "rb") as rom:
+            length = os.fstat(rom.fileno()).st_size
+            self.checkRange(position, length)
+            length = rom.readinto(self.view[position:position + length])
+
+        self.notifyWrite(position, position + length)
+        return length
@@ -0,0 +1,137 @@
+import functools
+import time
+from collections import defaultdict
+
+
+class Profiler(object):
+    """ Counts and times instructions through an instrumented dispatch table
+
+    Installing wraps every handler in the CPU's dispatch path in a
+    counting layer, and uninstalling removes just that layer, so an
+    unprofiled CPU runs exactly the code it always did. While installed
+    the CPU interprets, since translated blocks bypass the handlers.
+    """
+    CALL = "2NNN"
+    RETURN = "00EE"
+    # Handlers that move the program counter back without looping
+    NOT_LOOPS = frozenset([CALL, RETURN, "FX0A"])
+    ROOT_FRAME = "main"
+
+    def __init__(self, cpu):
+        self.cpu = cpu
+        self.reset()
+
+    def reset(self):
+        self.opcodeCounts = defaultdict(int)
+        self.opcodeTimes = defaultdict(int)
+        self.addressCounts = defaultdict(int)
+        self.stackCounts = defaultdict(int)
+        self.backEdges = defaultdict(int)
+        self.callStack = ()
+
+    def install(self):
+        self.cpu.addInstrumentation(self, self.instrument)
+
+    def uninstall(self):
+        self.cpu.removeInstrumentation(self)
+
+    @staticmethod
+    def handlerName(handler):
+        return handler.__name__.replace("executeOpcode", "")
+
+    def instrument(self, handler):
+        """ Wrap handler to count, time and follow the call stack """
+        name = self.handlerName(handler)
+        isCall = name == self.CALL
+        isReturn = name == self.RETURN
+        canLoop = name not in self.NOT_LOOPS
+        opcodeCounts = self.opcodeCounts
+        opcodeTimes = self.opcodeTimes
+        addressCounts = self.addressCounts
+        stackCounts = self.stackCounts
+        backEdges = self.backEdges
+        clock = time.perf_counter_ns
+        profiler = self
+
+        @functools.wraps(handler)
+        def profiled(cpu, operands=None):
+            address = cpu.programCounter
+            started = clock()
+            event = handler(cpu, operands)
+            opcodeTimes[name] += clock() - started
+            opcodeCounts[name] += 1
+            addressCounts[address] += 1
+            stack = profiler.callStack
+            stackCounts[stack] += 1
+
+            if isCall:
+                profiler.callStack = stack + (cpu.programCounter,)
+            elif isReturn:
+                profiler.callStack = stack[:-1]
+            elif canLoop and cpu.programCounter <= address:
+                backEdges[(address, cpu.programCounter)] += 1
+
+            return event
+
+        return profiled
+
+    def instructionCount(self):
+        return sum(self.opcodeCounts.values())
+
+    def loops(self):
+        """ Backward jumps seen, as dicts sorted by work done inside them """
+        loops = []
+
+        for (end, start), iterations in self.backEdges.items():
+            instructions = sum(
+                self.addressCounts.get(address, 0)
+                for address in range(start, end + 1)
+            )
+            loops.append({
+                "start": start, "end": end,
+                "iterations": iterations, "instructions": instructions,
+            })
+
+        loops.sort(key=lambda loop: loop["instructions"], reverse=True)
+        return loops
+
+    def report(self, top=10):
+        """ Hot spots as a JSON-ready dict """
+        addresses = sorted(
+            self.addressCounts.items(), key=lambda item: item[1],
+            reverse=True
+        )
+        opcodes = sorted(
+            self.opcodeCounts.items(), key=lambda item: item[1],
+            reverse=True
+        )
+        return {
+            "instructions": self.instructionCount(),
+            "addresses": [
+                {"address": address, "count": count}
+                for address, count in addresses[:top]
+            ],
+            "opcodes": [
+                {
+                    "opcode": name, "count": count,
+                    "seconds": self.opcodeTimes[name] / 1e9,
+                }
+                for name, count in opcodes[:top]
+            ],
+            "loops": self.loops()[:top],
+        }
+
+    def collapsedStacks(self):
+        """ Instruction counts per call stack, one flamegraph line each """
+        lines = []
+
+        for stack, count in sorted(self.stackCounts.items()):
+            frames = [self.ROOT_FRAME] + ["0x%03X" % a for a in stack]
+            lines.append("%s %d" % (";".join(frames), count))
+
+        return lines
+
+    def writeCollapsed(self, path):
+        with open(path, "w") as output:
+            for line in self.collapsedStacks():
+                output.write(line + "\n")
@@ -0,0 +1,120 @@
+class QuirkProfile(object):
+    """ How one family of interpreters runs the opcodes they disagree on,
+    and which extensions to the instruction set it adds
+
+    A CPU resolves its profile into handlers once, when its dispatch
+    table is built, so no instruction ever tests a quirk flag.
+    """
+    COSMAC_VIP = "cosmacVip"
+    CHIP_48 = "chip48"
+    SCHIP = "schip"
+    XO_CHIP = "xoChip"
+    MODERN = "modern"
+
+    # How far FX55 and FX65 move I
+    INDEX_UNCHANGED = "unchanged"
+    INDEX_PLUS_X = "plusX"
+    INDEX_PLUS_X_PLUS_1 = "plusXPlus1"
+
+    profiles = {}
+
+    def __init__(self, name, shiftVY=False, indexIncrement=INDEX_UNCHANGED,
+                 jumpVX=False, logicResetsVF=False, superChip=False,
+                 xoChip=False):
+        self.name = name
+        # 8XY6 and 8XYE shift VY into VX rather than VX in place
+        self.shiftVY = shiftVY
+        self.indexIncrement = indexIncrement
+        # BNNN reads as BXNN, jumping to VX + XNN rather than V0 + NNN
+        self.jumpVX = jumpVX
+        # 8XY1, 8XY2 and 8XY3 clear VF
+        self.logicResetsVF = logicResetsVF
+        # Hi-res, scrolling and 16x16 sprites
+        self.superChip = superChip
+        # Bitplanes, F000 NNNN and skips over it
+        self.xoChip = xoChip
+
+    def __repr__(self):
+        return "QuirkProfile(%s)" % self.name
+
+    @classmethod
+    def register(cls, profile):
+        cls.profiles[profile.name] = profile
+        return profile
+
+    @classmethod
+    def resolve(cls, profile):
+        """ Return the profile registered under a name, or profile itself """
+        if isinstance(profile, QuirkProfile):
+            return profile
+
+        if profile not in cls.profiles:
+            raise ValueError("Unknown quirk profile: %s" % profile)
+
+        return cls.profiles[profile]
+
+    def flags(self):
+        """ Every setting, equal for profiles that run code the same way
+        whatever they are named
+        """
+        return (
+            self.shiftVY, self.indexIncrement, self.jumpVX,
+            self.logicResetsVF, self.superChip, self.xoChip,
+        )
+
+    def handlerNames(self):
+        """ Opcode keys this profile runs with a variant handler """
+        names = {}
+
+        if self.shiftVY:
+            names[0x8006] = "executeOpcode8XY6ShiftVY"
+            names[0x800E] = "executeOpcode8XYEShiftVY"
+
+        if self.indexIncrement == self.INDEX_PLUS_X:
+            names[0xF055] = "executeOpcodeFX55IncrementX"
+            names[0xF065] = "executeOpcodeFX65IncrementX"
+        elif self.indexIncrement == self.INDEX_PLUS_X_PLUS_1:
+            names[0xF055] = "executeOpcodeFX55IncrementXPlus1"
+            names[0xF065] = "executeOpcodeFX65IncrementXPlus1"
+
+        if self.jumpVX:
+            names[0xB000] = "executeOpcodeBXNN"
+
+        if self.logicResetsVF:
+            names[0x8001] = "executeOpcode8XY1ResetVF"
+            names[0x8002] = "executeOpcode8XY2ResetVF"
+            names[0x8003] = "executeOpcode8XY3ResetVF"
+
+        if self.superChip:
+            names[0x00C0] = "executeOpcode00CN"
+            names[0x00FB] = "executeOpcode00FB"
+            names[0x00FC] = "executeOpcode00FC"
+            names[0x00FE] = "executeOpcode00FE"
+            names[0x00FF] = "executeOpcode00FF"
+            names[0xD000] = "executeOpcodeDXYNWide"
+
+        if self.xoChip:
+            names[0xD000] = "executeOpcodeDXYNPlanes"
+            names[0xF000] = "executeOpcodeF000"
+            names[0xF001] = "executeOpcodeFN01"
+
+        return names
+
+
+QuirkProfile.register(QuirkProfile(
+    QuirkProfile.COSMAC_VIP, shiftVY=True,
+    indexIncrement=QuirkProfile.INDEX_PLUS_X_PLUS_1, logicResetsVF=True
+))
+QuirkProfile.register(QuirkProfile(
+    QuirkProfile.CHIP_48, indexIncrement=QuirkProfile.INDEX_PLUS_X,
+    jumpVX=True
+))
+QuirkProfile.register(QuirkProfile(
+    QuirkProfile.SCHIP, jumpVX=True, superChip=True
+))
+QuirkProfile.register(QuirkProfile(
+    QuirkProfile.XO_CHIP, shiftVY=True,
+    indexIncrement=QuirkProfile.INDEX_PLUS_X_PLUS_1, superChip=True,
+    xoChip=True
+))
+QuirkProfile.register(QuirkProfile(QuirkProfile.MODERN))
@@ -0,0 +1,101 @@
+import collections
+import zlib
+
+
+class Rewind(object):
+    """ Ring buffer of past machine states for stepping back frame by frame
+
+    Every keyframeInterval-th recorded state is kept whole. The states in
+    between are stored as the compressed XOR against their keyframe, which
+    is mostly zero bytes, so any state needs at most one delta applied.
+    Whole keyframe groups are evicted, oldest first, to stay within budget.
+    """
+    COMPRESSION_LEVEL = 1
+
+    def __init__(self, cpu, interval=1, keyframeInterval=60,
+                 budget=4 * 1024 * 1024):
+        self.cpu = cpu
+        self.interval = interval
+        self.keyframeInterval = keyframeInterval
+        self.budget = budget
+        # Each group is [compressed keyframe, [compressed deltas], size]
+        self.groups = collections.deque()
+        self.keyframe = None
+        self.frames = 0
+        self.size = 0
+
+    def __len__(self):
+        return sum(1 + len(group[1]) for group in self.groups)
+
+    def record(self):
+        """ Call once per frame, every interval-th frame is stored """
+        self.frames += 1
+
+        if self.frames % self.interval:
+            return
+
+        state = self.cpu.snapshot()
+        groups = self.groups
+
+        # A resolution switch changes the state size, so starts a group
+        if (not groups or len(groups[-1][1]) + 1 >= self.keyframeInterval
+                or len(state) != len(self.newestKeyframe())):
+            self.keyframe = state
+            entry = zlib.compress(state, self.COMPRESSION_LEVEL)
+            groups.append([entry, [], 0])
+        else:
+            delta = self.xor(state, self.keyframe)
+            entry = zlib.compress(delta, self.COMPRESSION_LEVEL)
+            groups[-1][1].append(entry)
+
+        groups[-1][2] += len(entry)
+        self.size += len(entry)
+        self.evict()
+
+    def stepBack(self):
+        """ Drop the newest state and restore the one before it """
+        if len(self) < 2:
+            return False
+
+        self.dropNewest()
+        self.cpu.restore(self.newestState())
+        return True
+
+    def dropNewest(self):
+        group = self.groups[-1]
+
+        if group[1]:
+            entry = group[1].pop()
+        else:
+            entry = group[0]
+            self.groups.pop()
+            self.keyframe = None
+
+        group[2] -= len(entry)
+        self.size -= len(entry)
+
+    def newestKeyframe(self):
+        if self.keyframe is None:
+            self.keyframe = zlib.decompress(self.groups[-1][0])
+
+        return self.keyframe
+
+    def newestState(self):
+        group = self.groups[-1]
+        self.newestKeyframe()
+
+        if not group[1]:
+            return self.keyframe
+
+        return self.xor(zlib.decompress(group[1][-1]), self.keyframe)
+
+    def evict(self):
+        """ Drop the oldest groups while over budget, keeping the newest """
+        while self.size > self.budget and len(self.groups) > 1:
+            self.size -= self.groups.popleft()[2]
+
+    @staticmethod
+    def xor(first, second):
+        length = len(first)
+        value = int.from_bytes(first, "big") ^ int.from_bytes(second, "big")
+        return value.to_bytes(length, "big")
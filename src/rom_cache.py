@@ -0,0 +1,119 @@
+import hashlib
+import importlib.util
+import marshal
+import os
+import tempfile
+
+
+class RomCache(object):
+    """ On-disk store of per-ROM analysis and translated blocks
+
+    Entries are marshalled dicts named after a hash of the ROM and of the
+    emulator version, so a changed ROM, emulator or Python never reads a
+    stale entry. Every entry records the bytes its parts were derived
+    from, and only parts still matching memory are installed. The
+    directory is kept under maxBytes by evicting least recently used
+    entries.
+    """
+    FORMAT_VERSION = 1
+    EXTENSION = ".c8c"
+
+    # Sources deciding what an entry holds, next to this module
+    VERSIONED_SOURCES = (
+        "block_translator.py", "cpu.py", "instruction_decoder.py",
+        "quirks.py",
+    )
+
+    version = None
+
+    def __init__(self, directory, maxBytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def emulatorVersion(cls):
+        """ Digest of the format, the Python bytecode and emulator sources """
+        if cls.version is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(b"%d" % cls.FORMAT_VERSION)
+            digest.update(importlib.util.MAGIC_NUMBER)
+
+            for name in cls.VERSIONED_SOURCES:
+                path = os.path.join(os.path.dirname(__file__), name)
+
+                with open(path, "rb") as source:
+                    digest.update(source.read())
+
+            cls.version = digest.digest()
+
+        return cls.version
+
+    def key(self, rom):
+        digest = hashlib.blake2b(rom, digest_size=16)
+        digest.update(self.emulatorVersion())
+        return digest.hexdigest()
+
+    def path(self, rom):
+        return os.path.join(self.directory, self.key(rom) + self.EXTENSION)
+
+    def load(self, rom):
+        """ Return the entry stored for rom, or None """
+        path = self.path(rom)
+
+        try:
+            with open(path, "rb") as source:
+                entry = marshal.load(source)
+        except (OSError, EOFError, ValueError, TypeError):
+            self.misses += 1
+            return None
+
+        # Reading counts as use for LRU eviction
+        os.utime(path)
+        self.hits += 1
+        return entry
+
+    def store(self, rom, entry):
+        """ Write entry for rom, then evict down to maxBytes """
+        handle, temporary = tempfile.mkstemp(dir=self.directory)
+
+        with os.fdopen(handle, "wb") as output:
+            marshal.dump(entry, output)
+
+        os.replace(temporary, self.path(rom))
+        self.evict()
+
+    def evict(self):
+        """ Delete least recently used entries until under maxBytes """
+        entries = []
+
+        for name in os.listdir(self.directory):
+            if name.endswith(self.EXTENSION):
+                status = os.stat(os.path.join(self.directory, name))
+                entries.append((status.st_mtime, status.st_size, name))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, name in entries:
+            if total <= self.maxBytes:
+                break
+
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+    def warm(self, cpu, rom):
+        """ Install what is cached for rom into cpu, return True on a hit """
+        entry = self.load(rom)
+
+        if entry is None:
+            return False
+
+        cpu.importAnalysis(entry)
+        return True
+
+    def save(self, cpu, rom):
+        """ Store what cpu has worked out about rom so far """
+        self.store(rom, cpu.exportAnalysis())
@@ -0,0 +1,19 @@
+class RunResult(object):
+    """ Why CPU.run stopped and how many instructions it executed """
+    BUDGET = "budget"
+    BREAKPOINT = "breakpoint"
+    WATCHPOINT = "watchpoint"
+    DRAW = "draw"
+    WAIT_KEY = "waitKey"
+    ERROR = "error"
+
+    def __init__(self, reason, cycles, address, exception=None):
+        self.reason = reason
+        self.cycles = cycles
+        self.address = address
+        self.exception = exception
+
+    def __repr__(self):
+        return "RunResult(%s, cycles=%d, address=0x%03X)" % (
+            self.reason, self.cycles, self.address
+        )
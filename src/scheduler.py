@@ -0,0 +1,177 @@
+import time
+from input_log import InputLog
+from run_result import RunResult
+
+
+class Scheduler(object):
+    """ Drives a CPU in 60 Hz ticks, decoupled from the instruction rate """
+    TICK_RATE = 60
+    MODE_REALTIME = "realtime"
+    MODE_FAST_FORWARD = "fastForward"
+    MODE_UNTHROTTLED = "unthrottled"
+
+    # Sleep this long short of a deadline, then spin for accuracy
+    SPIN_MARGIN = 0.002
+    # Give up catching up when this many ticks behind
+    MAX_LAG_TICKS = 5
+    DEBUGGER_STOPS = frozenset([RunResult.BREAKPOINT, RunResult.WATCHPOINT])
+
+    def __init__(self, cpu, instructionsPerTick=10, mode=MODE_REALTIME,
+                 speed=1, clock=time.perf_counter, sleep=time.sleep):
+        if mode not in (
+            self.MODE_REALTIME, self.MODE_FAST_FORWARD, self.MODE_UNTHROTTLED
+        ):
+            raise ValueError("Unknown scheduler mode: %s" % mode)
+
+        self.cpu = cpu
+        self.instructionsPerTick = instructionsPerTick
+        self.mode = mode
+        self.speed = speed if mode == self.MODE_FAST_FORWARD else 1
+        self.clock = clock
+        self.sleep = sleep
+        self.ticks = 0
+        # Virtual cycles, including those spent waiting for a key
+        self.cycles = 0
+        self.deadline = None
+        self.stopRequested = False
+        self.inputLog = None
+        self.replayLog = None
+        self.replayPosition = 0
+        # Instructions left of a tick a Debugger stop interrupted
+        self.interruptedCycles = None
+
+    def tickPeriod(self):
+        return 1.0 / (self.TICK_RATE * self.speed)
+
+    def tick(self):
+        """ Run one tick of instructions, count timers down, swap frames
+
+        Returns False if a Debugger stop interrupted the tick, which the
+        next call then finishes.
+        """
+        cpu = self.cpu
+        remaining = self.interruptedCycles
+
+        if remaining is None:
+            remaining = self.instructionsPerTick
+
+            if self.replayLog is not None:
+                self.replayInput()
+        else:
+            self.interruptedCycles = None
+
+        while remaining:
+            result = cpu.run(remaining)
+            remaining -= result.cycles
+            self.cycles += result.cycles
+
+            if result.reason == RunResult.ERROR:
+                raise result.exception
+
+            if result.reason in self.DEBUGGER_STOPS:
+                self.interruptedCycles = remaining
+                return False
+
+            # Waiting for a key idles through the rest of the tick
+            if result.reason == RunResult.WAIT_KEY:
+                cpu.cyclesSkipped += remaining
+                self.cycles += remaining
+                break
+
+        cpu.decrementTimers()
+        cpu.screen.swapBuffers()
+        self.ticks += 1
+        return True
+
+    def runTicks(self, count):
+        """ Run count ticks paced according to the mode, return ticks run """
+        self.stopRequested = False
+        executed = 0
+
+        while executed < count and not self.stopRequested:
+            if not self.tick():
+                break
+
+            executed += 1
+
+            if self.mode != self.MODE_UNTHROTTLED:
+                self.waitForDeadline()
+
+        return executed
+
+    def startRecording(self):
+        """ Log every key change from now on, return the InputLog """
+        self.stopRecording()
+        self.inputLog = InputLog(self.cpu.randomState)
+        self.cpu.keypad.addListener(self.recordKey)
+        return self.inputLog
+
+    def stopRecording(self):
+        inputLog = self.inputLog
+
+        if inputLog is not None:
+            self.cpu.keypad.removeListener(self.recordKey)
+            self.inputLog = None
+
+        return inputLog
+
+    def recordKey(self, key, pressed):
+        self.inputLog.record(self.ticks, self.cycles, key, pressed)
+
+    def replay(self, inputLog):
+        """ Feed inputLog back in, from the state its recording began in """
+        self.cpu.randomState = inputLog.randomState
+        self.replayLog = inputLog
+        self.replayPosition = 0
+
+    def isReplaying(self):
+        return (
+            self.replayLog is not None
+            and self.replayPosition < len(self.replayLog.events)
+        )
+
+    def replayInput(self):
+        """ Apply the logged key changes due before this tick """
+        events = self.replayLog.events
+        cpu = self.cpu
+
+        while self.replayPosition < len(events):
+            frame, cycle, key, pressed = events[self.replayPosition]
+
+            if frame > self.ticks:
+                return
+
+            if frame != self.ticks or cycle != self.cycles:
+                raise ValueError(
+                    "Replay diverged at frame %d, cycle %d" % (frame, cycle)
+                )
+
+            self.replayPosition += 1
+
+            if pressed:
+                cpu.pressKey(key)
+            else:
+                cpu.releaseKey(key)
+
+    def stop(self):
+        self.stopRequested = True
+
+    def waitForDeadline(self):
+        period = self.tickPeriod()
+        now = self.clock()
+
+        if self.deadline is None:
+            self.deadline = now
+
+        self.deadline += period
+        delay = self.deadline - now
+
+        if delay < -self.MAX_LAG_TICKS * period:
+            self.deadline = now
+            return
+
+        if delay > self.SPIN_MARGIN:
+            self.sleep(delay - self.SPIN_MARGIN)
+
+        while self.clock() < self.deadline:
+            pass
@@ -1,16 +1,298 @@
-class Screen(object):
-    def __init__(self, width, height):
+class Frame(object):
+    """ Immutable copy of a completed frame, safe to read from any thread
+
+    pixels holds the first plane; planes holds every plane.
+    """
+
+    def __init__(self, number, width, height, pixels, planes=None):
+        self.number = number
         self.width = width
         self.height = height
+        self.pixels = pixels
+        self.planes = planes if planes is not None else (pixels,)
+
+    def getPixel(self, x, y):
+        """ Colour index of a pixel, one bit per plane, 0 or 1 for one """
+        index = y * (self.width // 8) + (x >> 3)
+        mask = 0x80 >> (x & 0x07)
+        colour = 0
+
+        for plane, pixels in enumerate(self.planes):
+            if pixels[index] & mask:
+                colour |= 1 << plane
+
+        return colour
+
+
+class Screen(object):
+    """ Framebuffer of bitplanes, each packed eight pixels per byte, MSB
+    leftmost
+
+    screen is the first plane. SCHIP and XO-CHIP switch between
+    LOW_RESOLUTION and HIGH_RESOLUTION, and XO-CHIP draws into a second
+    plane. Drawing, clearing and scrolling act on the selected planes.
+    """
+    LOW_RESOLUTION = (64, 32)
+    HIGH_RESOLUTION = (128, 64)
+
+    def __init__(self, width, height, buffer=None, planes=1):
+        """ Draw the first plane into buffer, e.g. a view of shared
+        memory, if given
+        """
+        self.wrapSprites = False
+        self.planeCount = planes
+        self.fixedBuffer = buffer is not None
+        self.allocate(width, height, buffer)
+        self.selectPlanes(0x01)
+        self.dirtyRows = 0
+        # Last completed frame; drawing only ever touches the back buffer
+        self.front = Frame(
+            0, width, height, bytes(len(self.screen)),
+            tuple(bytes(len(self.screen)) for plane in self.planes)
+        )
         self.clear()
 
+    def allocate(self, width, height, buffer=None):
+        if width % 8:
+            raise ValueError("Screen width must be a multiple of 8")
+
+        self.width = width
+        self.height = height
+        self.rowBytes = width // 8
+        size = self.rowBytes * height
+
+        if buffer is None:
+            buffer = bytearray(size)
+        elif len(buffer) != size:
+            raise ValueError("Screen buffer has the wrong size")
+
+        self.screen = buffer
+        self.planes = [buffer] + [
+            bytearray(size) for plane in range(1, self.planeCount)
+        ]
+        # Masks keeping each row's own bits when rows shift, by shift
+        self.rowMasks = {}
+
+    def setResolution(self, width, height):
+        """ Switch resolution, e.g. to SCHIP hi-res, blanking every plane """
+        if self.fixedBuffer and (width, height) != (self.width, self.height):
+            raise ValueError("A screen on a given buffer cannot be resized")
+
+        if (width, height) != (self.width, self.height):
+            self.allocate(width, height)
+        else:
+            for plane in self.planes:
+                plane[:] = bytes(len(plane))
+
+        self.dirtyRows = (1 << height) - 1
+
+    def selectPlanes(self, mask):
+        """ Make drawing act on the planes whose bits are set in mask """
+        self.selectedPlanes = mask
+        self.activePlanes = [
+            plane for plane in range(self.planeCount) if mask >> plane & 1
+        ]
+
+    def pixelBytes(self):
+        """ Every plane, one after another """
+        return b"".join(self.planes)
+
+    def loadPixels(self, data):
+        """ Restore planes saved with pixelBytes """
+        size = len(self.screen)
+
+        for index, plane in enumerate(self.planes):
+            image = data[index * size:(index + 1) * size]
+
+            if plane != image:
+                plane[:] = image
+                self.dirtyRows = (1 << self.height) - 1
+
+    def swapBuffers(self):
+        """ Publish the back buffer as the front frame if it changed
+
+        The new Frame is installed with a single reference store, so a
+        reader on another thread sees either the old or the new frame,
+        never a mix. Returns True if a frame was published.
+        """
+        front = self.front
+
+        if self.planeCount == 1:
+            if self.screen == front.pixels:
+                return False
+        elif all(
+            plane == pixels for plane, pixels in zip(self.planes, front.planes)
+        ):
+            return False
+
+        planes = tuple(bytes(plane) for plane in self.planes)
+        self.front = Frame(
+            front.number + 1, self.width, self.height, planes[0], planes
+        )
+        return True
+
     def clear(self):
-        self.screen = [0] * self.width * self.height
+        rowBytes = self.rowBytes
+
+        for index in self.activePlanes:
+            plane = self.planes[index]
+
+            if any(plane):
+                for y in range(self.height):
+                    if any(plane[y * rowBytes:(y + 1) * rowBytes]):
+                        self.dirtyRows |= 1 << y
+
+            plane[:] = bytes(len(plane))
+
+    def scrollDown(self, rows):
+        """ Move the selected planes down rows, blanking rows at the top """
+        offset = min(rows, self.height) * self.rowBytes
+
+        if not offset:
+            return
+
+        for index in self.activePlanes:
+            plane = self.planes[index]
+            plane[offset:] = plane[:len(plane) - offset]
+            plane[:offset] = bytes(offset)
+
+        self.dirtyRows = (1 << self.height) - 1
+
+    def scrollRight(self, pixels=4):
+        self.shiftRows(pixels)
+
+    def scrollLeft(self, pixels=4):
+        self.shiftRows(-pixels)
+
+    def shiftRows(self, pixels):
+        """ Shift every row of the selected planes right by pixels, or
+        left if negative, blanking the pixels uncovered
+
+        Each plane is shifted as a single integer, and a mask drops the
+        bits that crossed from one row into the next.
+        """
+        mask = self.rowMasks.get(pixels)
+
+        if mask is None:
+            mask = self.rowMasks[pixels] = self.rowMask(pixels)
+
+        size = len(self.screen)
+
+        for index in self.activePlanes:
+            plane = self.planes[index]
+            value = int.from_bytes(plane, "big")
+
+            if pixels > 0:
+                value >>= pixels
+            else:
+                value <<= -pixels
+
+            plane[:] = (value & mask).to_bytes(size, "big")
+
+        self.dirtyRows = (1 << self.height) - 1
+
+    def rowMask(self, pixels):
+        width = self.width
+        full = (1 << width) - 1
+
+        if pixels > 0:
+            row = full >> pixels
+        else:
+            row = full ^ ((1 << -pixels) - 1)
+
+        mask = 0
+
+        for y in range(self.height):
+            mask = mask << width | row
+
+        return mask
+
+    def isDirty(self):
+        """ True if anything was drawn since the last popDirtyRows """
+        return self.dirtyRows != 0
+
+    def popDirtyRows(self):
+        """ Return the rows changed since the last call and reset them """
+        dirtyRows = self.dirtyRows
+
+        if not dirtyRows:
+            return []
+
+        self.dirtyRows = 0
+        return [y for y in range(self.height) if dirtyRows >> y & 1]
+
+    def getRow(self, y):
+        """ Zero-copy view of the packed bytes of row y """
+        offset = y * self.rowBytes
+        return memoryview(self.screen)[offset:offset + self.rowBytes]
 
     def setPixel(self, x, y, isOn):
-        self.screen[x + y * self.width] = isOn
+        index = y * self.rowBytes + (x >> 3)
+        mask = 0x80 >> (x & 0x07)
+        self.dirtyRows |= 1 << y
+
+        if isOn:
+            self.screen[index] |= mask
+        else:
+            self.screen[index] &= ~mask & 0xFF
 
     def getPixel(self, x, y):
-        return self.screen[x + y * self.width]
+        index = y * self.rowBytes + (x >> 3)
+        return 1 if self.screen[index] & (0x80 >> (x & 0x07)) else 0
+
+    def drawWideSprite(self, x, y, data, plane=0):
+        """ XOR a 16x16 sprite of two bytes per row in at x, y """
+        collision = self.drawSprite(x, y, data[0::2], plane)
+        x = x % self.width + 8
+
+        if x < self.width or self.wrapSprites:
+            collision |= self.drawSprite(x, y, data[1::2], plane)
+
+        return collision
+
+    def drawSprite(self, x, y, rows, plane=0):
+        """ XOR sprite bytes in at x, y. Return True if a pixel turned off """
+        screen = self.planes[plane]
+        rowBytes = self.rowBytes
+        x %= self.width
+        y %= self.height
+        shift = x & 0x07
+        column = x >> 3
+
+        # A sprite not aligned to a byte spills into the next column
+        spillColumn = column + 1
+
+        if spillColumn == rowBytes:
+            spillColumn = 0 if self.wrapSprites else None
+
+        height = self.height
+        wrapSprites = self.wrapSprites
+        collision = 0
+        dirtyRows = 0
+
+        for line, row in enumerate(rows, y):
+            if line >= height:
+                if not wrapSprites:
+                    break
+
+                line -= height
+
+            if not row:
+                continue
+
+            offset = line * rowBytes
+            dirtyRows |= 1 << line
+
+            index = offset + column
+            bits = row >> shift
+            collision |= screen[index] & bits
+            screen[index] ^= bits
 
+            if shift and spillColumn is not None:
+                index = offset + spillColumn
+                bits = (row << (8 - shift)) & 0xFF
+                collision |= screen[index] & bits
+                screen[index] ^= bits
 
+        self.dirtyRows |= dirtyRows
+        return collision != 0
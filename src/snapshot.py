@@ -0,0 +1,99 @@
+import hashlib
+import struct
+
+
+class Snapshot(object):
+    """ Compact fixed-layout image of a CPU with its memory and screen """
+    MAGIC = b"C8S"
+    VERSION = 3
+    NOT_WAITING = 0xFF
+    # Memory is compared and rewritten a page at a time on apply
+    PAGE_SIZE = 256
+
+    # magic, version, memory size, screen width and height, PC, I, opcode,
+    # stack pointer, delay and sound timers, FX0A register, CXNN random
+    # state, held keys, V0-VF, stack, screen planes and the selected ones
+    HEADER = struct.Struct(">3sBIHHHHHBBBBIH16B16HBB")
+
+    @classmethod
+    def capture(cls, cpu):
+        """ Pack the machine state into bytes """
+        return b"".join((
+            cls.captureRegisters(cpu), cpu.memory.memory,
+            cpu.screen.pixelBytes()
+        ))
+
+    @classmethod
+    def captureRegisters(cls, cpu):
+        """ Pack just the header, everything but memory and screen """
+        return cls.HEADER.pack(
+            cls.MAGIC, cls.VERSION,
+            len(cpu.memory.memory), cpu.screen.width, cpu.screen.height,
+            cpu.programCounter, cpu.indexRegister, cpu.opcode,
+            cpu.stackPointer, cpu.delayTimer, cpu.soundTimer,
+            cls.NOT_WAITING if cpu.waitingRegister is None
+            else cpu.waitingRegister,
+            cpu.randomState, cpu.keypad.keys,
+            *cpu.vRegister, *cpu.stack,
+            cpu.screen.planeCount, cpu.screen.selectedPlanes
+        )
+
+    @classmethod
+    def apply(cls, cpu, blob):
+        """ Load a state packed by capture into cpu """
+        memorySize = cls.applyRegisters(cpu, blob)
+        memory = cpu.memory
+        screen = cpu.screen
+        view = memoryview(blob)
+        offset = cls.HEADER.size
+        image = view[offset:offset + memorySize]
+
+        # Untouched pages keep their decoded instructions and blocks
+        if memory.memory != image:
+            current = memory.memory
+            size = cls.PAGE_SIZE
+
+            for start in range(0, memorySize, size):
+                page = image[start:start + size]
+
+                if current[start:start + size] != page:
+                    memory.load(start, page)
+
+        screen.loadPixels(view[offset + memorySize:])
+
+    @classmethod
+    def applyRegisters(cls, cpu, blob):
+        """ Load the header of blob into cpu, return the memory size """
+        fields = cls.HEADER.unpack_from(blob)
+        magic, version, memorySize, width, height = fields[:5]
+
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError("Unsupported snapshot")
+
+        screen = cpu.screen
+        planeCount, selectedPlanes = fields[46:48]
+
+        if (memorySize, planeCount) != (
+            len(cpu.memory.memory), screen.planeCount
+        ):
+            raise ValueError("Snapshot does not fit this machine")
+
+        if (width, height) != (screen.width, screen.height):
+            screen.setResolution(width, height)
+
+        screen.selectPlanes(selectedPlanes)
+
+        (
+            cpu.programCounter, cpu.indexRegister, cpu.opcode,
+            cpu.stackPointer, cpu.delayTimer, cpu.soundTimer, waiting
+        ) = fields[5:12]
+        cpu.waitingRegister = None if waiting == cls.NOT_WAITING else waiting
+        cpu.randomState, cpu.keypad.keys = fields[12:14]
+        cpu.vRegister[:] = fields[14:30]
+        cpu.stack[:] = fields[30:46]
+        return memorySize
+
+    @staticmethod
+    def digest(blob):
+        """ Stable 128-bit hash of a snapshot for deduplication """
+        return hashlib.blake2b(blob, digest_size=16).digest()
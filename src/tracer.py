@@ -0,0 +1,261 @@
+import argparse
+import functools
+import struct
+import sys
+import zlib
+
+
+class Tracer(object):
+    """ Streams one fixed-width record per executed instruction to a file
+
+    Like the Profiler it wraps the handlers in the dispatch table, so
+    nothing is checked when tracing is off. Each record holds the state
+    after the instruction: cycle, the instruction's address and opcode,
+    I, SP, both timers, V0-VF and the range of memory written. Written
+    bytes are not stored since FX33 and FX55 derive them from registers.
+    Records are packed in place into a chunk buffer, which is written out,
+    optionally zlib compressed, whenever it fills.
+    """
+    MAGIC = b"C8T"
+    VERSION = 1
+    FLAG_COMPRESSED = 0x01
+    CHUNK_RECORDS = 4096
+
+    # magic, version, flags, record size
+    FILE_HEADER = struct.Struct(">3sBBH")
+    # stored length, record count
+    CHUNK_HEADER = struct.Struct(">II")
+    # cycle, PC, opcode, I, SP, delay and sound timers, then V0-VF at
+    # REGISTERS_OFFSET, then write start and length
+    RECORD_HEAD = struct.Struct(">IHHHBBB")
+    REGISTERS_OFFSET = RECORD_HEAD.size
+    RECORD_TAIL = struct.Struct(">HB")
+    TAIL_OFFSET = REGISTERS_OFFSET + 16
+    RECORD_SIZE = TAIL_OFFSET + RECORD_TAIL.size
+
+    def __init__(self, cpu, path, compress=False):
+        self.cpu = cpu
+        self.compress = compress
+        self.output = open(path, "wb")
+        self.output.write(self.FILE_HEADER.pack(
+            self.MAGIC, self.VERSION,
+            self.FLAG_COMPRESSED if compress else 0, self.RECORD_SIZE
+        ))
+        self.buffer = bytearray(self.RECORD_SIZE * self.CHUNK_RECORDS)
+        self.offset = 0
+        self.records = 0
+        self.writeStart = 0
+        self.writeLength = 0
+        self.skippedAtStart = cpu.cyclesSkipped
+
+    def install(self):
+        self.cpu.addInstrumentation(self, self.instrument)
+        self.cpu.memory.addWriteListener(self.recordWrite)
+
+    def uninstall(self):
+        self.cpu.memory.removeWriteListener(self.recordWrite)
+        self.cpu.removeInstrumentation(self)
+        self.flush()
+        self.output.close()
+
+    def recordWrite(self, start, end):
+        self.writeStart = start
+        self.writeLength = end - start
+
+    def instrument(self, handler):
+        buffer = self.buffer
+        packHead = self.RECORD_HEAD.pack_into
+        packTail = self.RECORD_TAIL.pack_into
+        registersOffset = self.REGISTERS_OFFSET
+        tailOffset = self.TAIL_OFFSET
+        recordSize = self.RECORD_SIZE
+        tracer = self
+
+        @functools.wraps(handler)
+        def traced(cpu, operands=None):
+            address = cpu.programCounter
+            tracer.writeStart = tracer.writeLength = 0
+            event = handler(cpu, operands)
+            offset = tracer.offset
+            packHead(
+                buffer, offset,
+                tracer.records + cpu.cyclesSkipped - tracer.skippedAtStart,
+                address, cpu.opcode, cpu.indexRegister, cpu.stackPointer,
+                cpu.delayTimer, cpu.soundTimer
+            )
+            start = offset + registersOffset
+            buffer[start:start + 16] = cpu.vRegister
+            packTail(
+                buffer, offset + tailOffset,
+                tracer.writeStart, tracer.writeLength
+            )
+            tracer.records += 1
+            tracer.offset = offset + recordSize
+
+            if tracer.offset == len(buffer):
+                tracer.flush()
+
+            return event
+
+        return traced
+
+    def flush(self):
+        """ Write out the records buffered so far as one chunk """
+        if not self.offset:
+            return
+
+        chunk = bytes(self.buffer[:self.offset])
+
+        if self.compress:
+            chunk = zlib.compress(chunk, 1)
+
+        self.output.write(self.CHUNK_HEADER.pack(
+            len(chunk), self.offset // self.RECORD_SIZE
+        ))
+        self.output.write(chunk)
+        self.offset = 0
+
+
+class TraceRecord(object):
+    """ One decoded trace record """
+
+    def __init__(self, raw):
+        (
+            self.cycle, self.programCounter, self.opcode,
+            self.indexRegister, self.stackPointer,
+            self.delayTimer, self.soundTimer
+        ) = Tracer.RECORD_HEAD.unpack_from(raw)
+        start = Tracer.REGISTERS_OFFSET
+        self.vRegister = list(raw[start:start + 16])
+        self.writeStart, self.writeLength = Tracer.RECORD_TAIL.unpack_from(
+            raw, Tracer.TAIL_OFFSET
+        )
+
+    def __repr__(self):
+        return "<TraceRecord cycle=%d pc=0x%03X opcode=0x%04X>" % (
+            self.cycle, self.programCounter, self.opcode
+        )
+
+
+class TraceReader(object):
+    """ Lazily streams the records of a trace file, a chunk at a time """
+
+    def __init__(self, path):
+        self.path = path
+
+    def chunks(self):
+        with open(self.path, "rb") as trace:
+            header = trace.read(Tracer.FILE_HEADER.size)
+            magic, version, flags, recordSize = Tracer.FILE_HEADER.unpack(
+                header
+            )
+
+            if magic != Tracer.MAGIC or version != Tracer.VERSION:
+                raise ValueError("Unsupported trace")
+
+            while True:
+                header = trace.read(Tracer.CHUNK_HEADER.size)
+
+                if not header:
+                    return
+
+                length, count = Tracer.CHUNK_HEADER.unpack(header)
+                chunk = trace.read(length)
+
+                if flags & Tracer.FLAG_COMPRESSED:
+                    chunk = zlib.decompress(chunk)
+
+                yield chunk
+
+    def rawRecords(self):
+        """ Zero-copy views of each record's bytes """
+        size = Tracer.RECORD_SIZE
+
+        for chunk in self.chunks():
+            view = memoryview(chunk)
+
+            for offset in range(0, len(chunk), size):
+                yield view[offset:offset + size]
+
+    def __iter__(self):
+        for raw in self.rawRecords():
+            yield TraceRecord(raw)
+
+    @staticmethod
+    def firstDivergence(pathA, pathB):
+        """ Return (index, recordA, recordB) where two traces first differ
+
+        A record is None when its trace ended first. Returns None if the
+        traces are identical. Whole runs of chunks are compared as bytes
+        and only the differing record is decoded.
+        """
+        size = Tracer.RECORD_SIZE
+        chunksA = TraceReader(pathA).chunks()
+        chunksB = TraceReader(pathB).chunks()
+        bufferA = bufferB = memoryview(b"")
+        index = 0
+
+        while True:
+            if not bufferA:
+                bufferA = memoryview(next(chunksA, b""))
+
+            if not bufferB:
+                bufferB = memoryview(next(chunksB, b""))
+
+            if not bufferA and not bufferB:
+                return None
+
+            length = min(len(bufferA), len(bufferB))
+
+            if not length or bufferA[:length] != bufferB[:length]:
+                offset = 0
+
+                while bufferA[offset:offset + size] == bufferB[
+                    offset:offset + size
+                ]:
+                    offset += size
+
+                rawA = bufferA[offset:offset + size]
+                rawB = bufferB[offset:offset + size]
+                return (
+                    index + offset // size,
+                    TraceRecord(rawA) if rawA else None,
+                    TraceRecord(rawB) if rawB else None,
+                )
+
+            index += length // size
+            bufferA = bufferA[length:]
+            bufferB = bufferB[length:]
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description="Find where two execution traces diverge"
+    )
+    parser.add_argument("traceA")
+    parser.add_argument("traceB")
+    options = parser.parse_args(arguments)
+
+    divergence = TraceReader.firstDivergence(options.traceA, options.traceB)
+
+    if divergence is None:
+        print("Traces are identical")
+        return 0
+
+    index, recordA, recordB = divergence
+    print("First divergence at record %d" % index)
+
+    for name, record in (("A", recordA), ("B", recordB)):
+        if record is None:
+            print("%s: <end of trace>" % name)
+        else:
+            print("%s: %r V=%s I=0x%03X" % (
+                name, record, bytes(record.vRegister).hex(),
+                record.indexRegister
+            ))
+
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,14 @@
+from cpu import CPU
+from memory import Memory
+from quirks import QuirkProfile
+from screen import Screen
+
+
 class CpuConstants(object):
     OPCODE = 0xA2F0
     DECODED_OPCODE = 0xA000
     INVALID_OPCODE = 0xFFFF
+    UNIMPLEMENTED_OPCODE = 0x0123
     V_CARRY = 0x0F
     PC_BEFORE = 0x200
     PC_AFTER = 0x202
@@ -29,6 +36,12 @@ class CpuConstants(object):
     SP_2NNN = 0x01
     PC_ON_STACK_2NNN = 0x200
 
+    # 00EE #
+    OPCODE_00EE = 0x00EE
+    SP_00EE = 0x01
+    PC_ON_STACK_00EE = 0x0ABC
+    PC_00EE = 0x0ABE
+
     # 3XNN #
     OPCODE_3XNN = 0x3456
     X_3XNN = 4
@@ -139,6 +152,19 @@ class CpuConstants(object):
     VX_8XYE_MSB0_AFTER = 0x04
     VX_8XYE_MSB1_AFTER = 0x00
 
+    # DXYN #
+    OPCODE_DXYN = 0xD122
+    X_DXYN = 1
+    Y_DXYN = 2
+    VX_DXYN = 0x0A
+    VY_DXYN = 0x05
+    SPRITE_DXYN = bytes([0xC0, 0x80])
+
+    # FX07 #
+    OPCODE_FX07 = 0xF507
+    DT_FX07 = 0x3C
+    X_FX07 = 5
+
     # FX15 #
     OPCODE_FX15 = 0xF415
     DT_FX15 = 0x1234
@@ -153,3 +179,51 @@ class CpuConstants(object):
 
     # 00E0 #
     OPCODE_00E0 = 0x00E0
+
+    # FX33 #
+    OPCODE_FX33 = 0xF333
+    X_FX33 = 3
+    VX_FX33 = 254
+    BCD_FX33 = bytes([2, 5, 4])
+
+    # FX55 #
+    OPCODE_FX55 = 0xF255
+    V_FX55 = list(range(0x10, 0x20))
+    MEM_FX55 = bytes([0x10, 0x11, 0x12]) + bytes(13)
+
+    # FX65 #
+    OPCODE_FX65 = 0xF365
+    V_FX65 = [1, 2, 3, 4] + [0] * 12
+
+    # CXNN #
+    OPCODE_CXNN = 0xC30F
+    X_CXNN = 3
+    SEED_CXNN = 1234
+
+    # EX9E / EXA1 #
+    OPCODE_EX9E = 0xE29E
+    OPCODE_EXA1 = 0xE2A1
+    X_EXKK = 2
+    KEY_EXKK = 0x0B
+
+
+def assemble(program):
+    """ The big-endian bytes of a list of opcodes """
+    return b"".join(opcode.to_bytes(2, "big") for opcode in program)
+
+
+def loadProgram(memory, program, address=CpuConstants.PC_BEFORE):
+    """ Write a list of opcodes into memory from address """
+    memory.write(address, assemble(program))
+
+
+def createCpu(program=(), engine=CPU.ENGINE_INTERPRETER,
+              quirks=QuirkProfile.MODERN, memorySize=CpuConstants.MEM_SIZE,
+              planes=1):
+    """ A CPU on fresh memory and screen with program loaded at 0x200 """
+    memory = Memory(memorySize)
+    loadProgram(memory, program)
+    screen = Screen(
+        CpuConstants.SCREEN_W, CpuConstants.SCREEN_H, planes=planes
+    )
+    return CPU(memory, screen, engine, quirks=quirks)
@@ -0,0 +1,158 @@
+import random
+import unittest
+from cpu_constants import CpuConstants, createCpu
+
+try:
+    import numpy
+    from batch_cpu import BatchCPU
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class BatchCpuTest(unittest.TestCase):
+    MACHINES = 64
+    CYCLES = 200
+
+    # Opcode patterns the random programs are built from
+    TEMPLATES = [
+        0x00E0, 0x1000, 0x3000, 0x4000, 0x5000, 0x6000, 0x7000, 0x8000,
+        0x8001, 0x8002, 0x8003, 0x8004, 0x8005, 0x8006, 0x8007, 0x800E,
+        0xA000, 0xC000, 0xD000, 0xE09E, 0xE0A1, 0xF007, 0xF015, 0xF018,
+        0xF033, 0xF055, 0xF065,
+    ]
+
+    # Calls a subroutine at 0x20A recursing until V2 is a multiple of 8
+    CALL_PROGRAM = bytes.fromhex(
+        "220a 7101 1200 0000 0000 7201 6307 8322 3300 220a 00ee"
+    )
+    # Jumps through a table of four adds indexed by V0 AND 6
+    JUMP_PROGRAM = bytes.fromhex(
+        "6106 8012 b206 7301 7302 7304 7308 120e"
+    )
+
+    def setUp(self):
+        self.random = random.Random(4)
+
+    def tearDown(self):
+        pass
+
+    def randomProgram(self, length=24):
+        program = bytearray()
+
+        for position in range(length):
+            template = self.random.choice(self.TEMPLATES)
+            operand = self.random.randrange(0x1000)
+
+            if template == 0x1000:
+                operand = 0x200 + 2 * self.random.randrange(length)
+            elif template in (0x5000, 0x00E0):
+                operand = 0
+            elif template & 0xF000 == 0x8000:
+                operand &= 0xFF0
+            elif template == 0xA000:
+                operand = 0x300 + self.random.randrange(0x100)
+            elif template & 0xF000 in (0xE000, 0xF000):
+                operand &= 0xF00
+
+            program += (template | operand).to_bytes(2, "big")
+
+        # Skips at the end land on the second jump
+        return bytes(program) + bytes.fromhex("1200 1200")
+
+    def createCpu(self, program, seed):
+        cpu = createCpu()
+        cpu.memory.write(CpuConstants.PC_BEFORE, program)
+        cpu.vRegister = [(seed * 37 + r * 11) & 0xFF for r in range(16)]
+        cpu.delayTimer = seed & 0x0F
+        cpu.keypad.keys = seed * 0x9E37 & 0xFFFF
+        cpu.seedRandom(seed)
+        return cpu
+
+    def testShouldMatchSingleCpusExactly(self, program=None):
+        program = program or self.randomProgram()
+        batch = BatchCPU(self.MACHINES)
+        cpus = [self.createCpu(program, seed) for seed in range(self.MACHINES)]
+        faulted = []
+
+        for index, cpu in enumerate(cpus):
+            batch.restore(index, cpu.snapshot())
+
+        for cpu in cpus:
+            result = cpu.run(self.CYCLES, until=0)
+            faulted.append(result.exception is not None)
+
+        batch.run(self.CYCLES)
+
+        for index, cpu in enumerate(cpus):
+            self.assertEqual(bool(batch.faulted[index]), faulted[index])
+
+            if not faulted[index]:
+                self.assertEqual(batch.snapshot(index), cpu.snapshot())
+
+    def testShouldMatchOnManyRandomPrograms(self):
+        for attempt in range(10):
+            self.testShouldMatchSingleCpusExactly()
+
+    def testShouldMatchSingleCpusOnCallsAndReturns(self):
+        self.testShouldMatchSingleCpusExactly(self.CALL_PROGRAM)
+
+    def testShouldMatchSingleCpusOnJumpTables(self):
+        self.testShouldMatchSingleCpusExactly(self.JUMP_PROGRAM)
+        self.testShouldMatchSingleCpusExactly(
+            bytes.fromhex("6002 b204 0000 6107 1208")
+        )
+
+    def testShouldLoadRomIntoEveryMachine(self):
+        batch = BatchCPU(3)
+        batch.loadRom(b"\x61\x23\x12\x02")
+        batch.run(5)
+
+        self.assertEqual(batch.vRegister[:, 1].tolist(), [0x23] * 3)
+        self.assertEqual(batch.programCounter.tolist(), [0x202] * 3)
+
+    def testShouldFaultOnUnknownOpcode(self):
+        batch = BatchCPU(2)
+        batch.loadRom(b"\x61\x23\xFF\xFF")
+        batch.run(3)
+
+        self.assertTrue(batch.faulted.all())
+        self.assertEqual(batch.programCounter.tolist(), [0x202] * 2)
+
+    def testShouldFaultOnReturnWithEmptyStack(self):
+        batch = BatchCPU(2)
+        batch.loadRom(b"\x61\x23\x00\xEE")
+        batch.run(3)
+
+        self.assertTrue(batch.faulted.all())
+        self.assertEqual(batch.programCounter.tolist(), [0x202] * 2)
+        self.assertEqual(batch.stackPointer.tolist(), [0] * 2)
+
+    def testShouldCompleteKeyWaitsOnPress(self):
+        batch = BatchCPU(2)
+        batch.loadRom(b"\xF3\x0A\xE3\x9E\x12\x02")
+        batch.run(3)
+        self.assertEqual(batch.programCounter.tolist(), [0x200] * 2)
+
+        batch.pressKey(0x0C)
+        batch.run(1)
+        self.assertEqual(batch.vRegister[:, 3].tolist(), [0x0C] * 2)
+        self.assertEqual(batch.programCounter.tolist(), [0x206] * 2)
+
+        batch.releaseKey(0x0C)
+        batch.programCounter[:] = 0x202
+        batch.run(1)
+        self.assertEqual(batch.programCounter.tolist(), [0x204] * 2)
+
+    def testShouldDecrementTimers(self):
+        batch = BatchCPU(2)
+        batch.delayTimer[:] = [0, 2]
+        batch.soundTimer[:] = [1, 0]
+        batch.decrementTimers()
+
+        self.assertEqual(batch.delayTimer.tolist(), [0, 1])
+        self.assertEqual(batch.soundTimer.tolist(), [0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
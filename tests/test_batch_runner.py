@@ -0,0 +1,52 @@
+import unittest
+from batch_runner import BatchRunner, RunSpec, runRom
+
+
+class BatchRunnerTest(unittest.TestCase):
+    # Moves a sprite one pixel down per pass, forever
+    COUNT_PROGRAM = bytes.fromhex("7101 a208 d015 1200 f090 90f0 9000")
+    # Waits for a key into V2, adds it to V3 and waits again
+    KEY_PROGRAM = bytes.fromhex("f20a 8324 1200")
+
+    def setUp(self):
+        self.roms = [self.COUNT_PROGRAM, self.KEY_PROGRAM]
+
+    def tearDown(self):
+        pass
+
+    def testRunRomHonoursTheCycleBudget(self):
+        outcome = runRom(self.KEY_PROGRAM, 0, RunSpec(1, 25))
+        self.assertEqual(outcome.cycles, 25)
+        self.assertIsNone(outcome.error)
+
+    def testRunRomDeliversScriptedKeys(self):
+        spec = RunSpec(1, 100, inputScript=[(2, 5), (4, 7)])
+        outcome = runRom(self.KEY_PROGRAM, 0, spec)
+        self.assertEqual(outcome.vRegister[3], 12)
+
+    def testRunRomReportsErrors(self):
+        outcome = runRom(bytes.fromhex("0123"), 0, RunSpec(0, 10))
+        self.assertIn("UnknownOpcodeException", outcome.error)
+
+    def testPoolMatchesInProcessRuns(self):
+        specs = [
+            RunSpec(0, 40),
+            RunSpec(1, 100, inputScript=[(1, 3)]),
+            RunSpec(0, 55, instructionsPerTick=7),
+        ]
+        outcomes = list(BatchRunner(workers=2).run(self.roms, specs))
+        self.assertEqual(
+            sorted(outcome.specIndex for outcome in outcomes), [0, 1, 2]
+        )
+
+        for outcome in outcomes:
+            spec = specs[outcome.specIndex]
+            expected = runRom(self.roms[spec.romIndex], 0, spec)
+            self.assertEqual(outcome.screenHash, expected.screenHash)
+            self.assertEqual(outcome.vRegister, expected.vRegister)
+            self.assertEqual(outcome.programCounter, expected.programCounter)
+            self.assertEqual(outcome.cycles, spec.cycles)
+
+
+if __name__ == "__main__":
+    unittest.main()
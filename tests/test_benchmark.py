@@ -0,0 +1,54 @@
+import unittest
+from benchmark import Benchmark
+from instruction_decoder import InstructionDecoder
+
+
+class BenchmarkTest(unittest.TestCase):
+
+    def setUp(self):
+        self.benchmark = Benchmark(repeat=1, number=20, ticks=2,
+                                   instructionsPerTick=10)
+
+    def tearDown(self):
+        pass
+
+    def report(self, **values):
+        results = {}
+
+        for name, (value, higherIsBetter) in values.items():
+            results[name] = {
+                "value": value, "unit": "", "higherIsBetter": higherIsBetter,
+            }
+
+        return {"version": Benchmark.VERSION, "results": results}
+
+    def testSampleOpcodeDecodesToItsKey(self):
+        keys = InstructionDecoder.keyTable()
+
+        for key in (0x00E0, 0x1000, 0x5000, 0x8004, 0xD000, 0xF065):
+            self.assertEqual(keys[Benchmark.sampleOpcode(key)], key)
+
+    def testRunAllCoversEveryImplementedHandler(self):
+        results = self.benchmark.runAll()["results"]
+        self.assertIn("micro.opcode.D000", results)
+        self.assertIn("micro.opcode.F065", results)
+        self.assertNotIn("micro.opcode.F029", results)
+        self.assertIn("macro.draw.interpreter.fps", results)
+        self.assertIn("macro.call.translator.ips", results)
+        self.assertTrue(all(r["value"] > 0 for r in results.values()))
+
+    def testCompareFlagsSlowerResultsBeyondThreshold(self):
+        baseline = self.report(a=(100.0, False), b=(1000.0, True))
+        current = self.report(a=(125.0, False), b=(950.0, True))
+        regressions = Benchmark.compare(baseline, current, 0.1)
+        self.assertEqual([r[0] for r in regressions], ["a"])
+        self.assertAlmostEqual(regressions[0][3], 0.25)
+
+    def testCompareIgnoresImprovementsAndNewResults(self):
+        baseline = self.report(a=(100.0, False))
+        current = self.report(a=(50.0, False), b=(1.0, True))
+        self.assertEqual(Benchmark.compare(baseline, current), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+from cpu import CPU
+from cpu_constants import CpuConstants, createCpu, loadProgram
+from unknown_opcode_exception import UnknownOpcodeException
+
+
+class BlockTranslatorTest(unittest.TestCase):
+    # Counts V1 down from 0x10 in a subroutine, mixing ALU opcodes
+    PROGRAM = [
+        0x6110,  # 0x200: V1 = 0x10
+        0x6201,  # 0x202: V2 = 0x01
+        0xA123,  # 0x204: I = 0x123
+        0x220E,  # 0x206: call 0x20E
+        0x3100,  # 0x208: skip if V1 == 0
+        0x1206,  # 0x20A: jump 0x206
+        0x120C,  # 0x20C: halt
+        0x8125,  # 0x20E: V1 -= V2
+        0x8314,  # 0x210: V3 += V1
+        0x00EE,  # 0x212: return
+    ]
+
+    def setUp(self):
+        self.interpreter = createCpu(engine=CPU.ENGINE_INTERPRETER)
+        self.translated = createCpu(engine=CPU.ENGINE_TRANSLATOR)
+
+    def tearDown(self):
+        pass
+
+    def runCycles(self, cpu, cycles):
+        executed = 0
+
+        while executed < cycles:
+            executed += cpu.nextCycle()
+
+        return executed
+
+    def assertSameState(self, first, second):
+        self.assertEqual(first.vRegister, second.vRegister)
+        self.assertEqual(first.indexRegister, second.indexRegister)
+        self.assertEqual(first.programCounter, second.programCounter)
+        self.assertEqual(first.stack, second.stack)
+        self.assertEqual(first.stackPointer, second.stackPointer)
+
+    def testShouldRejectUnknownEngine(self):
+        with self.assertRaises(ValueError):
+            createCpu(engine="jit")
+
+    def testShouldMatchInterpreterOnProgram(self):
+        loadProgram(self.interpreter.memory, self.PROGRAM)
+        loadProgram(self.translated.memory, self.PROGRAM)
+
+        cycles = self.runCycles(self.translated, 40)
+        self.runCycles(self.interpreter, cycles)
+        self.assertSameState(self.interpreter, self.translated)
+
+    def testShouldMatchInterpreterOnEveryTemplate(self):
+        opcodes = [
+            0x6123, 0x7133, 0x71F0, 0x8120, 0x8121, 0x8342, 0x8673, 0x8124,
+            0x8235, 0x8676, 0x8347, 0x812E, 0x8F14, 0x8F16, 0xABCD, 0xF415,
+            0xF618, 0xF307,
+        ]
+
+        for opcode in opcodes:
+            interpreter = createCpu(engine=CPU.ENGINE_INTERPRETER)
+            translated = createCpu(engine=CPU.ENGINE_TRANSLATOR)
+
+            for cpu in (interpreter, translated):
+                cpu.vRegister = [0x11 * r for r in range(16)]
+                cpu.delayTimer = 0x2A
+                loadProgram(cpu.memory, [opcode, 0x1200])
+
+            self.runCycles(translated, 2)
+            self.runCycles(interpreter, 2)
+            self.assertSameState(interpreter, translated)
+            self.assertEqual(interpreter.delayTimer, translated.delayTimer)
+            self.assertEqual(interpreter.soundTimer, translated.soundTimer)
+
+    def testShouldCallHandlerForUntranslatedOpcode(self):
+        loadProgram(self.translated.memory, [0x6123, 0x00E0])
+        self.translated.screen.setPixel(1, 1, True)
+
+        self.assertEqual(self.translated.nextCycle(), 2)
+        self.assertFalse(self.translated.screen.getPixel(1, 1))
+        self.assertEqual(self.translated.programCounter, 0x204)
+        self.assertEqual(self.translated.opcode, 0x00E0)
+
+    def testShouldRaiseExceptionOnUnknownOpcode(self):
+        loadProgram(self.translated.memory, [CpuConstants.INVALID_OPCODE])
+
+        with self.assertRaises(UnknownOpcodeException):
+            self.translated.nextCycle()
+
+    def testShouldStopBlockBeforeUnknownOpcode(self):
+        loadProgram(
+            self.translated.memory, [0x6123, CpuConstants.INVALID_OPCODE]
+        )
+        self.assertEqual(self.translated.nextCycle(), 1)
+
+        with self.assertRaises(UnknownOpcodeException):
+            self.translated.nextCycle()
+
+    def testShouldDropBlockWhenCoveredMemoryIsWritten(self):
+        translator = self.translated.blockTranslator
+        loadProgram(self.translated.memory, [0x6123, 0x1200])
+        self.translated.nextCycle()
+        self.assertEqual(self.translated.vRegister[1], 0x23)
+
+        loadProgram(self.translated.memory, [0x6145])
+        self.assertNotIn(CpuConstants.PC_BEFORE, translator.blocks)
+        self.translated.nextCycle()
+        self.assertEqual(self.translated.vRegister[1], 0x45)
+        self.assertEqual(translator.invalidations, 1)
+
+    def testShouldForgetCoverageOfDroppedBlocks(self):
+        translator = self.translated.blockTranslator
+        # Rewrites the NN of its own 6XNN on every pass
+        loadProgram(self.translated.memory, [
+            0x7001,  # 0x200: V0 += 1
+            0xA207,  # 0x202: I = 0x207
+            0xF055,  # 0x204: store V0 at I
+            0x6100,  # 0x206: V1 = NN
+            0x1200,  # 0x208: jump 0x200
+        ])
+        self.translated.run(1000)
+        covered = sum(len(blocks) for blocks in translator.coverage.values())
+        self.translated.run(10000)
+
+        self.assertEqual(
+            sum(len(blocks) for blocks in translator.coverage.values()),
+            covered
+        )
+        self.assertEqual(self.translated.vRegister[1], 2200 & 0xFF)
+
+        for address, blocks in translator.coverage.items():
+            for block in blocks:
+                self.assertLessEqual(block, address)
+                self.assertLess(address, translator.codes[block][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
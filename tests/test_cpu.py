@@ -1,9 +1,9 @@
 import unittest
-from unittest.mock import call, Mock
+from unittest.mock import Mock
 from cpu import CPU
 from memory import Memory
 from screen import Screen
-from cpu_constants import CpuConstants
+from cpu_constants import CpuConstants, loadProgram
 from unknown_opcode_exception import UnknownOpcodeException
 
 
@@ -36,6 +36,9 @@ class CpuTest(unittest.TestCase):
     def assertCarryIsSet(self):
         self.assertTrue(self.cpu.vRegister[CpuConstants.V_CARRY] == 0x01)
 
+    def loadOpcode(self, opcode, address=CpuConstants.PC_BEFORE):
+        loadProgram(self.memory, [opcode], address)
+
     def testShouldHaveMemory(self):
         self.assertIsInstance(self.cpu.memory, Memory)
 
@@ -58,12 +61,10 @@ class CpuTest(unittest.TestCase):
         self.assertRegisterIsZero(self.cpu.stackPointer)
 
     def testShouldFetchCorrectOpcode(self):
-        self.memory.getByte = Mock(return_value=CpuConstants.OPCODE)
-        self.cpu.fetchOpcode(CpuConstants.MEM_ADDRESS)
-        self.memory.getByte.assert_has_calls([
-            call(CpuConstants.MEM_ADDRESS),
-            call(CpuConstants.MEM_ADDRESS + 1)
-        ])
+        self.memory.getWord = Mock(return_value=CpuConstants.OPCODE)
+        opcode = self.cpu.fetchOpcode(CpuConstants.MEM_ADDRESS)
+        self.memory.getWord.assert_called_once_with(CpuConstants.MEM_ADDRESS)
+        self.assertEqual(opcode, CpuConstants.OPCODE)
 
     def testShouldDecodeOpcodeCorrectly(self):
         self.cpu.opcode = CpuConstants.OPCODE
@@ -75,6 +76,32 @@ class CpuTest(unittest.TestCase):
             self.cpu.opcode = CpuConstants.INVALID_OPCODE
             self.cpu.decodeOpcode()
 
+    def testShouldDecodeClearScreenOpcodeExactly(self):
+        self.cpu.opcode = CpuConstants.OPCODE_00E0
+        decodedOpcode = self.cpu.decodeOpcode()
+        self.assertEqual(decodedOpcode, CpuConstants.OPCODE_00E0)
+
+    def testShouldShareDispatchTableBetweenCpus(self):
+        otherCpu = CPU(Memory(CpuConstants.MEM_SIZE), self.screen)
+        self.assertIs(self.cpu.dispatchTable, otherCpu.dispatchTable)
+
+    def testShouldExecuteNextCycleThroughDispatchTable(self):
+        self.loadOpcode(CpuConstants.OPCODE)
+        self.cpu.nextCycle()
+        self.assertEqual(self.cpu.opcode, CpuConstants.OPCODE)
+        self.assertEqual(self.cpu.indexRegister, CpuConstants.OPCODE & 0xFFF)
+        self.assertProgramCounterIncreased()
+
+    def testShouldRaiseExceptionOnUnimplementedOpcodeInNextCycle(self):
+        for opcode in (
+            CpuConstants.INVALID_OPCODE,
+            CpuConstants.UNIMPLEMENTED_OPCODE
+        ):
+            self.loadOpcode(opcode)
+
+            with self.assertRaises(UnknownOpcodeException):
+                self.cpu.nextCycle()
+
     def testShouldDelegateOpcodeExecutionCorrectly(self):
         """ How? """
         pass
@@ -124,6 +151,23 @@ class CpuTest(unittest.TestCase):
         self.assertEqual(self.cpu.programCounter, CpuConstants.PC_2NNN)
         self.assertEqual(self.cpu.stack[oldSp], CpuConstants.PC_ON_STACK_2NNN)
 
+    def testShouldExecuteOpcode00EECorrectly(self):
+        self.cpu.opcode = CpuConstants.OPCODE_00EE
+        self.cpu.stack[0] = CpuConstants.PC_ON_STACK_00EE
+        self.cpu.stackPointer = CpuConstants.SP_00EE
+        self.cpu.executeOpcode00EE()
+        self.assertRegisterIsZero(self.cpu.stackPointer)
+        self.assertEqual(self.cpu.programCounter, CpuConstants.PC_00EE)
+
+    def testShouldRaiseForOpcode00EEWithEmptyStack(self):
+        self.cpu.opcode = CpuConstants.OPCODE_00EE
+
+        with self.assertRaises(IndexError):
+            self.cpu.executeOpcode00EE()
+
+        self.assertRegisterIsZero(self.cpu.stackPointer)
+        self.assertEqual(self.cpu.programCounter, CpuConstants.PC_BEFORE)
+
     def testShouldSkipInstructionForOpcode3XNN(self):
         self.cpu.opcode = CpuConstants.OPCODE_3XNN
         self.cpu.vRegister[CpuConstants.X_3XNN] = CpuConstants.VX_3XNN_EQ
@@ -365,6 +409,51 @@ class CpuTest(unittest.TestCase):
         self.assertCarryIsSet()
         self.assertProgramCounterIncreased()
 
+    def testShouldExecuteOpcodeDXYNWithoutCollision(self):
+        self.cpu.opcode = CpuConstants.OPCODE_DXYN
+        self.cpu.indexRegister = CpuConstants.MEM_ADDRESS
+        self.cpu.vRegister[CpuConstants.X_DXYN] = CpuConstants.VX_DXYN
+        self.cpu.vRegister[CpuConstants.Y_DXYN] = CpuConstants.VY_DXYN
+        self.cpu.vRegister[CpuConstants.V_CARRY] = 0x01
+        self.memory.write(CpuConstants.MEM_ADDRESS, CpuConstants.SPRITE_DXYN)
+        self.cpu.executeOpcodeDXYN()
+        self.assertTrue(self.screen.getPixel(
+            CpuConstants.VX_DXYN, CpuConstants.VY_DXYN
+        ))
+        self.assertCarryIsNotSet()
+        self.assertProgramCounterIncreased()
+
+    def testShouldExecuteOpcodeDXYNWithCollision(self):
+        self.cpu.opcode = CpuConstants.OPCODE_DXYN
+        self.cpu.indexRegister = CpuConstants.MEM_ADDRESS
+        self.cpu.vRegister[CpuConstants.X_DXYN] = CpuConstants.VX_DXYN
+        self.cpu.vRegister[CpuConstants.Y_DXYN] = CpuConstants.VY_DXYN
+        self.memory.write(CpuConstants.MEM_ADDRESS, CpuConstants.SPRITE_DXYN)
+        self.screen.setPixel(CpuConstants.VX_DXYN, CpuConstants.VY_DXYN, True)
+        self.cpu.executeOpcodeDXYN()
+        self.assertFalse(self.screen.getPixel(
+            CpuConstants.VX_DXYN, CpuConstants.VY_DXYN
+        ))
+        self.assertCarryIsSet()
+        self.assertProgramCounterIncreased()
+
+    def testShouldExecuteOpcodeFX07Correctly(self):
+        self.cpu.opcode = CpuConstants.OPCODE_FX07
+        self.cpu.delayTimer = CpuConstants.DT_FX07
+        self.cpu.executeOpcodeFX07()
+        self.assertEqual(
+            self.cpu.vRegister[CpuConstants.X_FX07], CpuConstants.DT_FX07
+        )
+        self.assertProgramCounterIncreased()
+
+    def testShouldDecrementTimersDownToZero(self):
+        self.cpu.delayTimer = 0x01
+        self.cpu.soundTimer = 0x02
+        self.cpu.decrementTimers()
+        self.cpu.decrementTimers()
+        self.assertRegisterIsZero(self.cpu.delayTimer)
+        self.assertRegisterIsZero(self.cpu.soundTimer)
+
     def testShouldExecuteOpcodeFX15Correctly(self):
         self.cpu.opcode = CpuConstants.OPCODE_FX15
         self.cpu.vRegister[CpuConstants.X_FX15] = CpuConstants.VX_FX15
@@ -378,3 +467,85 @@ class CpuTest(unittest.TestCase):
         self.cpu.executeOpcodeFX18()
         self.assertEqual(self.cpu.soundTimer, CpuConstants.ST_FX18)
         self.assertProgramCounterIncreased()
+
+    def testShouldExecuteOpcodeFX33Correctly(self):
+        self.cpu.opcode = CpuConstants.OPCODE_FX33
+        self.cpu.indexRegister = CpuConstants.MEM_ADDRESS
+        self.cpu.vRegister[CpuConstants.X_FX33] = CpuConstants.VX_FX33
+        self.cpu.executeOpcodeFX33()
+        self.assertEqual(
+            bytes(self.memory.read(CpuConstants.MEM_ADDRESS, 3)),
+            CpuConstants.BCD_FX33
+        )
+        self.assertProgramCounterIncreased()
+
+    def testShouldExecuteOpcodeFX55Correctly(self):
+        self.cpu.opcode = CpuConstants.OPCODE_FX55
+        self.cpu.indexRegister = CpuConstants.MEM_ADDRESS
+        self.cpu.vRegister = list(CpuConstants.V_FX55)
+        self.cpu.executeOpcodeFX55()
+        self.assertEqual(
+            bytes(self.memory.read(CpuConstants.MEM_ADDRESS, 16)),
+            CpuConstants.MEM_FX55
+        )
+        self.assertEqual(self.cpu.indexRegister, CpuConstants.MEM_ADDRESS)
+        self.assertProgramCounterIncreased()
+
+    def testShouldExecuteOpcodeFX65Correctly(self):
+        self.cpu.opcode = CpuConstants.OPCODE_FX65
+        self.cpu.indexRegister = CpuConstants.MEM_ADDRESS
+        self.memory.write(CpuConstants.MEM_ADDRESS, bytes(range(1, 17)))
+        self.cpu.executeOpcodeFX65()
+        self.assertEqual(self.cpu.vRegister, CpuConstants.V_FX65)
+        self.assertEqual(self.cpu.indexRegister, CpuConstants.MEM_ADDRESS)
+        self.assertProgramCounterIncreased()
+
+    def testShouldExecuteOpcodeCXNNCorrectly(self):
+        self.cpu.opcode = CpuConstants.OPCODE_CXNN
+        self.cpu.seedRandom(CpuConstants.SEED_CXNN)
+        values = []
+
+        for _ in range(64):
+            self.cpu.programCounter = CpuConstants.PC_BEFORE
+            self.cpu.executeOpcodeCXNN()
+            values.append(self.cpu.vRegister[CpuConstants.X_CXNN])
+            self.assertProgramCounterIncreased()
+
+        self.assertTrue(all(value <= 0x0F for value in values))
+        self.assertGreater(len(set(values)), 8)
+
+        self.cpu.seedRandom(CpuConstants.SEED_CXNN)
+        replayed = []
+
+        for _ in range(64):
+            self.cpu.executeOpcodeCXNN()
+            replayed.append(self.cpu.vRegister[CpuConstants.X_CXNN])
+
+        self.assertEqual(replayed, values)
+
+    def testShouldExecuteOpcodeEX9ECorrectly(self):
+        self.cpu.opcode = CpuConstants.OPCODE_EX9E
+        self.cpu.vRegister[CpuConstants.X_EXKK] = CpuConstants.KEY_EXKK
+        self.cpu.executeOpcodeEX9E()
+        self.assertProgramCounterIncreased()
+
+        self.cpu.programCounter = CpuConstants.PC_BEFORE
+        self.cpu.pressKey(CpuConstants.KEY_EXKK)
+        self.cpu.executeOpcodeEX9E()
+        self.assertInstructionSkipped()
+
+    def testShouldExecuteOpcodeEXA1Correctly(self):
+        self.cpu.opcode = CpuConstants.OPCODE_EXA1
+        self.cpu.vRegister[CpuConstants.X_EXKK] = CpuConstants.KEY_EXKK
+        self.cpu.executeOpcodeEXA1()
+        self.assertInstructionSkipped()
+
+        self.cpu.programCounter = CpuConstants.PC_BEFORE
+        self.cpu.pressKey(CpuConstants.KEY_EXKK)
+        self.cpu.executeOpcodeEXA1()
+        self.assertProgramCounterIncreased()
+
+        self.cpu.programCounter = CpuConstants.PC_BEFORE
+        self.cpu.releaseKey(CpuConstants.KEY_EXKK)
+        self.cpu.executeOpcodeEXA1()
+        self.assertInstructionSkipped()
@@ -0,0 +1,133 @@
+import unittest
+from cpu import CPU
+from run_result import RunResult
+from cpu_constants import CpuConstants, createCpu
+from unknown_opcode_exception import UnknownOpcodeException
+
+
+class CpuRunTest(unittest.TestCase):
+    ENGINES = (CPU.ENGINE_INTERPRETER, CPU.ENGINE_TRANSLATOR)
+
+    # Increments V1 and V2 forever, drawing the byte at I on each pass
+    DRAW_LOOP = [
+        0x7101,  # 0x200: V1 += 1
+        0x7201,  # 0x202: V2 += 1
+        0xD001,  # 0x204: draw 1 row at V0, V0
+        0x1200,  # 0x206: jump 0x200
+    ]
+
+    def tearDown(self):
+        pass
+
+    def testShouldStopOnCycleBudget(self):
+        for engine in self.ENGINES:
+            with self.subTest(engine=engine):
+                cpu = createCpu(self.DRAW_LOOP, engine)
+                result = cpu.run(10)
+
+                self.assertEqual(result.reason, RunResult.BUDGET)
+                self.assertEqual(result.cycles, 10)
+                self.assertEqual(cpu.vRegister[1], 3)
+                self.assertEqual(cpu.vRegister[2], 3)
+                self.assertEqual(result.address, 0x204)
+
+    def testShouldStopOnDrawWhenRequested(self):
+        for engine in self.ENGINES:
+            with self.subTest(engine=engine):
+                cpu = createCpu(self.DRAW_LOOP, engine)
+                result = cpu.run(100, until=CPU.EVENT_DRAW)
+
+                self.assertEqual(result.reason, RunResult.DRAW)
+                self.assertEqual(result.cycles, 3)
+                self.assertEqual(result.address, 0x206)
+
+    def testShouldStopBeforeBreakpoint(self):
+        for engine in self.ENGINES:
+            with self.subTest(engine=engine):
+                cpu = createCpu(self.DRAW_LOOP, engine)
+                result = cpu.run(100, breakpoints={0x204})
+
+                self.assertEqual(result.reason, RunResult.BREAKPOINT)
+                self.assertEqual(result.cycles, 2)
+
+                result = cpu.run(100, breakpoints={0x204})
+                self.assertEqual(result.cycles, 4)
+
+    def testShouldStopWhileWaitingForKey(self):
+        for engine in self.ENGINES:
+            with self.subTest(engine=engine):
+                cpu = createCpu([0x6001, 0xF30A, 0x1204], engine)
+                result = cpu.run(100)
+
+                self.assertEqual(result.reason, RunResult.WAIT_KEY)
+                self.assertEqual(result.cycles, 2)
+                self.assertEqual(result.address, 0x202)
+
+                cpu.pressKey(0x0C)
+                self.assertEqual(cpu.vRegister[3], 0x0C)
+                self.assertEqual(cpu.run(1).address, 0x204)
+
+    def testShouldStopOnException(self):
+        for engine in self.ENGINES:
+            with self.subTest(engine=engine):
+                program = [0x6001, CpuConstants.INVALID_OPCODE]
+                cpu = createCpu(program, engine)
+                result = cpu.run(100)
+
+                self.assertEqual(result.reason, RunResult.ERROR)
+                self.assertEqual(result.cycles, 1)
+                self.assertIsInstance(result.exception, UnknownOpcodeException)
+
+    def testShouldStopOnReturnWithEmptyStack(self):
+        for engine in self.ENGINES:
+            with self.subTest(engine=engine):
+                cpu = createCpu([0x00EE], engine)
+                result = cpu.run(100)
+
+                self.assertEqual(result.reason, RunResult.ERROR)
+                self.assertIsInstance(result.exception, IndexError)
+                self.assertEqual(result.address, 0x200)
+                self.assertEqual(cpu.stackPointer, 0)
+                cpu.restore(cpu.snapshot())
+
+    def testEnginesShouldStopInTheSameStateOnErrors(self):
+        programs = [
+            [0x7001, 0x7101, 0x2200],
+            [0x7001, 0x2206, 0x0000, 0x00EE, 0x00EE],
+            [0x7001, CpuConstants.UNIMPLEMENTED_OPCODE],
+        ]
+
+        for program in programs:
+            states = []
+
+            for engine in self.ENGINES:
+                cpu = createCpu(program, engine)
+                result = cpu.run(100)
+                states.append((
+                    result.reason, result.cycles, result.address, cpu.opcode,
+                    cpu.stackPointer, cpu.snapshot()
+                ))
+
+            self.assertEqual(states[0][0], RunResult.ERROR)
+            self.assertEqual(states[1], states[0])
+
+    def testShouldNotStopOnIdleLoops(self):
+        for engine in self.ENGINES:
+            with self.subTest(engine=engine):
+                cpu = createCpu([0x6001, 0x1202], engine)
+                result = cpu.run(100, until=0xFF)
+
+                self.assertEqual(result.reason, RunResult.BUDGET)
+                self.assertEqual(result.cycles, 100)
+                self.assertIsNone(result.exception)
+
+    def testShouldCountInstructionCacheHits(self):
+        cpu = createCpu(self.DRAW_LOOP)
+        cpu.run(12)
+
+        self.assertEqual(cpu.instructionCache.misses, 4)
+        self.assertEqual(cpu.instructionCache.hits, 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import os
+import tempfile
+import unittest
+from cpu import CPU
+from run_result import RunResult
+from scheduler import Scheduler
+from cpu_constants import CpuConstants, createCpu
+
+
+class DebuggerTest(unittest.TestCase):
+    ENGINES = (CPU.ENGINE_INTERPRETER, CPU.ENGINE_TRANSLATOR)
+
+    # Counts V0 up, storing it at 0x300 and reading it back on each pass
+    COUNTER = [
+        0x7001,  # 0x200: V0 += 1
+        0xA300,  # 0x202: I = 0x300
+        0xF055,  # 0x204: store V0 at I
+        0x6100,  # 0x206: V1 = 0
+        0xF165,  # 0x208: load V0, V1 from I
+        0x1200,  # 0x20A: jump 0x200
+    ]
+
+    def tearDown(self):
+        pass
+
+    def testShouldStopBeforeBreakpointAndResume(self):
+        for engine in self.ENGINES:
+            with self.subTest(engine=engine):
+                cpu = createCpu(self.COUNTER, engine)
+                debugger = cpu.enableDebugging()
+                debugger.addBreakpoint(0x204)
+
+                result = cpu.run(100)
+                self.assertEqual(result.reason, RunResult.BREAKPOINT)
+                self.assertEqual(result.cycles, 2)
+                self.assertEqual(result.address, 0x204)
+                self.assertEqual(debugger.lastStop.programCounter, 0x204)
+                self.assertEqual(cpu.memory.getByte(0x300), 0)
+
+                # Resuming steps over the breakpoint, then stops on the
+                # next pass
+                result = cpu.run(100)
+                self.assertEqual(result.reason, RunResult.BREAKPOINT)
+                self.assertEqual(result.cycles, 6)
+                self.assertEqual(cpu.memory.getByte(0x300), 1)
+                self.assertEqual(cpu.vRegister[0], 2)
+
+    def testShouldStopOnlyWhenConditionHolds(self):
+        for engine in self.ENGINES:
+            with self.subTest(engine=engine):
+                cpu = createCpu(self.COUNTER, engine)
+                cpu.enableDebugging().addBreakpoint(
+                    0x202, lambda cpu: cpu.vRegister[0] == 3
+                )
+
+                result = cpu.run(100)
+                self.assertEqual(result.reason, RunResult.BREAKPOINT)
+                self.assertEqual(result.cycles, 13)
+                self.assertEqual(cpu.vRegister[0], 3)
+
+    def testShouldStopBeforeWatchedWrite(self):
+        for engine in self.ENGINES:
+            with self.subTest(engine=engine):
+                cpu = createCpu(self.COUNTER, engine)
+                debugger = cpu.enableDebugging()
+                debugger.addWatchpoint(0x300)
+
+                result = cpu.run(100)
+                stop = debugger.lastStop
+                self.assertEqual(result.reason, RunResult.WATCHPOINT)
+                self.assertEqual(result.address, 0x204)
+                self.assertEqual(result.cycles, 2)
+                self.assertEqual(
+                    (stop.address, stop.length, stop.access),
+                    (0x300, 1, debugger.WRITE)
+                )
+                self.assertEqual(cpu.memory.getByte(0x300), 0)
+
+                result = cpu.run(3)
+                self.assertEqual(result.reason, RunResult.BUDGET)
+                self.assertEqual(cpu.memory.getByte(0x300), 1)
+
+    def testShouldStopBeforeWatchedRead(self):
+        for engine in self.ENGINES:
+            with self.subTest(engine=engine):
+                cpu = createCpu(self.COUNTER, engine)
+                debugger = cpu.enableDebugging()
+                debugger.addWatchpoint(0x301, read=True, write=False)
+
+                result = cpu.run(100)
+                self.assertEqual(result.reason, RunResult.WATCHPOINT)
+                self.assertEqual(result.address, 0x208)
+                self.assertEqual(debugger.lastStop.access, debugger.READ)
+
+                debugger.removeWatchpoint(0x301)
+                self.assertEqual(cpu.run(100).reason, RunResult.BUDGET)
+
+    def testHostLoadsShouldPassWatchpoints(self):
+        cpu = createCpu(self.COUNTER, CPU.ENGINE_INTERPRETER)
+        snapshot = cpu.snapshot()
+        cpu.run(10)
+        debugger = cpu.enableDebugging()
+        debugger.addWatchpoint(0, CpuConstants.MEM_SIZE, read=True)
+
+        cpu.restore(snapshot)
+        cpu.memory.load(0x300, b"\x01")
+        self.assertIsNone(debugger.resumeAddress)
+        self.assertEqual(cpu.memory.memory[0x300], 1)
+        self.assertEqual(cpu.run(100).reason, RunResult.WATCHPOINT)
+
+    def testShouldCostNothingOnceCleared(self):
+        cpu = createCpu(self.COUNTER, CPU.ENGINE_TRANSLATOR)
+        translator = cpu.blockTranslator
+        debugger = cpu.enableDebugging()
+        debugger.addBreakpoint(0x204)
+        debugger.addWatchpoint(0x300, 0x310, read=True)
+
+        self.assertIsNone(cpu.blockTranslator)
+        self.assertFalse(cpu.idleSkipping)
+        self.assertEqual(cpu.run(100).reason, RunResult.BREAKPOINT)
+
+        self.assertIs(cpu.disableDebugging(), debugger)
+        cpu.run(100)
+        cache = cpu.instructionCache
+        self.assertIs(cpu.blockTranslator, translator)
+        self.assertTrue(cpu.idleSkipping)
+        self.assertNotIn("fill", vars(cache))
+        self.assertEqual(
+            set(vars(cpu.memory)), {"memory", "view", "writeListeners"}
+        )
+        self.assertTrue(all(
+            entry is None or entry[1] is cpu.dispatchTable[entry[0]]
+            for entry in cache.entries
+        ))
+
+    def testShouldLeaveOtherLayersInPlaceWhenCleared(self):
+        cpu = createCpu(self.COUNTER, CPU.ENGINE_TRANSLATOR)
+        translator = cpu.blockTranslator
+        debugger = cpu.enableDebugging()
+        debugger.addBreakpoint(0x204)
+
+        with tempfile.TemporaryDirectory() as directory:
+            tracer = cpu.enableTracing(os.path.join(directory, "trace.bin"))
+            debugger.removeBreakpoint(0x204)
+
+            # The tracer still sees every instruction, none translated
+            self.assertIsNone(cpu.blockTranslator)
+            self.assertEqual(cpu.run(40).reason, RunResult.BUDGET)
+            self.assertEqual(tracer.records, 40)
+
+            cpu.disableTracing()
+            self.assertIs(cpu.blockTranslator, translator)
+
+    def testSchedulerShouldFinishAnInterruptedTick(self):
+        cpu = createCpu(self.COUNTER, CPU.ENGINE_INTERPRETER)
+        cpu.enableDebugging().addBreakpoint(0x208)
+        scheduler = Scheduler(cpu, 10, Scheduler.MODE_UNTHROTTLED)
+
+        self.assertEqual(scheduler.runTicks(3), 0)
+        self.assertEqual((scheduler.ticks, scheduler.cycles), (0, 4))
+
+        # The rest of the first tick steps over the breakpoint
+        self.assertTrue(scheduler.tick())
+        self.assertEqual((scheduler.ticks, scheduler.cycles), (1, 10))
+
+        # The second tick starts at the breakpoint again
+        self.assertFalse(scheduler.tick())
+        self.assertEqual((scheduler.ticks, scheduler.cycles), (1, 10))
+
+        cpu.disableDebugging()
+        self.assertEqual(scheduler.runTicks(2), 2)
+        self.assertEqual((scheduler.ticks, scheduler.cycles), (3, 30))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from cpu import CPU
+from disassembler import Disassembler
+from memory import Memory
+from cpu_constants import CpuConstants, createCpu, loadProgram
+
+
+class DisassemblerTest(unittest.TestCase):
+    # Main loop calling a drawing subroutine, a sprite and a jump table
+    ROM = [
+        0x6000,  # 0x200: V0 = 0
+        0x2210,  # 0x202: call 0x210
+        0x3005,  # 0x204: skip if V0 == 5
+        0x1202,  # 0x206: jump 0x202
+        0xB21A,  # 0x208: jump to 0x21A + V0
+        0xF090,  # 0x20A: sprite data
+        0x90F0,  # 0x20C
+        0x0000,  # 0x20E
+        0xA20A,  # 0x210: I = 0x20A
+        0xD013,  # 0x212: draw 3 rows
+        0x7001,  # 0x214: V0 += 1
+        0x00EE,  # 0x216: return
+        0xFFFF,  # 0x218: padding
+        0x120A,  # 0x21A: jump table entry
+    ]
+    END = 0x200 + 2 * len(ROM)
+
+    def setUp(self):
+        self.memory = Memory(CpuConstants.MEM_SIZE)
+        loadProgram(self.memory, self.ROM)
+        self.analysis = Disassembler(self.memory, end=self.END).analyse()
+
+    def tearDown(self):
+        pass
+
+    def testShouldOnlyDecodeReachableCode(self):
+        self.assertEqual(
+            sorted(self.analysis.instructions),
+            [0x200, 0x202, 0x204, 0x206, 0x208,
+             0x210, 0x212, 0x214, 0x216],
+        )
+
+    def testShouldSplitBasicBlocks(self):
+        blocks = self.analysis.blocks
+        self.assertEqual(
+            sorted(blocks), [0x200, 0x202, 0x204, 0x206, 0x208, 0x210]
+        )
+        self.assertEqual(blocks[0x202].calls, [0x210])
+        self.assertEqual(blocks[0x204].successors, [0x206, 0x208])
+        self.assertEqual(blocks[0x206].successors, [0x202])
+        self.assertEqual(blocks[0x210].end, 0x218)
+        self.assertEqual(blocks[0x210].successors, [])
+
+    def testShouldBuildCallAndJumpGraphs(self):
+        self.assertEqual(self.analysis.functions, {0x200, 0x210})
+        self.assertEqual(
+            self.analysis.callGraph, {0x200: {0x210}, 0x210: set()}
+        )
+        self.assertEqual(self.analysis.jumpGraph[0x200], [0x202])
+        self.assertEqual(self.analysis.dataReferences, {0x20A})
+
+    def testShouldTreatComputedJumpTargetsAsUnknown(self):
+        self.assertEqual(self.analysis.computedJumps, {0x208: (0x21A, 0x319)})
+        self.assertEqual(self.analysis.regions(), [
+            (0x200, 0x20A, Disassembler.CODE),
+            (0x20A, 0x210, Disassembler.DATA),
+            (0x210, 0x218, Disassembler.CODE),
+            (0x218, 0x21A, Disassembler.DATA),
+            (0x21A, 0x21C, Disassembler.UNKNOWN),
+        ])
+
+    def testShouldProduceAListing(self):
+        listing = self.analysis.listing()
+        self.assertEqual(listing[0], "sub_200:")
+        self.assertIn("0x202: 2210    CALL 0x210", listing)
+        self.assertIn("loc_206:", listing)
+        self.assertIn("0x212: D013    DRW V0, V1, 3", listing)
+        self.assertIn("0x20A: DB 0xF0, 0x90, 0x90, 0xF0, 0x00, 0x00"
+                      "    ; data", listing)
+
+    def testPrewarmShouldFillCachesAheadOfExecution(self):
+        for engine in (CPU.ENGINE_INTERPRETER, CPU.ENGINE_TRANSLATOR):
+            with self.subTest(engine=engine):
+                cpu = createCpu(self.ROM, engine)
+                self.analysis.prewarm(cpu)
+                misses = cpu.instructionCache.misses
+                self.assertEqual(misses, len(self.analysis.instructions))
+
+                if engine == CPU.ENGINE_TRANSLATOR:
+                    self.assertEqual(cpu.blockTranslator.translations, 6)
+                else:
+                    # Up to the BNNN, whose targets are known only at run time
+                    cpu.run(30)
+                    self.assertEqual(cpu.instructionCache.misses, misses)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+from cpu_constants import assemble
+
+try:
+    import numpy
+    from environment import Environment, VectorEnvironment
+except ImportError:
+    numpy = None
+
+
+def positionReward(cpu):
+    return float(cpu.vRegister[2])
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class EnvironmentTest(unittest.TestCase):
+    # Moves a dot right, one pixel per pass, while key 5 is held
+    ROM = assemble([
+        0x6105,  # 0x200: V1 = 5
+        0xE19E,  # 0x202: skip if key V1 is down
+        0x1200,  # 0x204: jump 0x200
+        0x00E0,  # 0x206: clear
+        0x7201,  # 0x208: V2 += 1
+        0xA210,  # 0x20A: I = 0x210
+        0xD231,  # 0x20C: draw one row at V2, V3
+        0x1200,  # 0x20E: jump 0x200
+        0x8000,  # 0x210: a single pixel
+    ])
+    # Action holding key 5
+    MOVE = 6
+
+    def setUp(self):
+        self.environment = Environment(
+            self.ROM, frameSkip=2, instructionsPerFrame=8,
+            reward=positionReward, maxSteps=5
+        )
+
+    def tearDown(self):
+        pass
+
+    def testObservationShouldViewTheFramebuffer(self):
+        observation = self.environment.reset()
+        self.assertEqual(observation.shape, (32, 8))
+        self.assertEqual(observation.dtype, numpy.uint8)
+        self.environment.screen.setPixel(9, 4, True)
+        self.assertEqual(observation[4, 1], 0x40)
+        self.assertEqual(self.environment.pixels()[4, 9], 1)
+
+    def testStepShouldHoldTheActionKey(self):
+        self.environment.reset()
+        observation, reward, done, info = self.environment.step(0)
+        self.assertEqual(reward, 0.0)
+        self.assertFalse(observation.any())
+
+        observation, reward, done, info = self.environment.step(self.MOVE)
+        # Two frames of eight instructions, seven per pass
+        self.assertEqual(reward, 2.0)
+        self.assertEqual(info["cycles"], 32)
+        self.assertTrue(self.environment.cpu.keypad.isPressed(5))
+
+        self.environment.step(0)
+        self.assertFalse(self.environment.cpu.keypad.isPressed(5))
+
+    def testEpisodeShouldEndAfterMaxSteps(self):
+        self.environment.reset()
+        dones = [self.environment.step(self.MOVE)[2] for _ in range(5)]
+        self.assertEqual(dones, [False] * 4 + [True])
+
+        observation = self.environment.reset()
+        self.assertFalse(observation.any())
+        self.assertEqual(self.environment.cpu.vRegister[2], 0)
+
+    def testVectorShouldMatchAcrossProcesses(self):
+        actions = [[self.MOVE, 0, self.MOVE], [0, self.MOVE, self.MOVE]] * 4
+        runs = []
+
+        for workers in (0, 2):
+            vector = VectorEnvironment(
+                self.ROM, 3, workers=workers, frameSkip=2,
+                instructionsPerFrame=8, reward=positionReward, maxSteps=5
+            )
+
+            try:
+                observations = vector.reset()
+                steps = []
+
+                for stepActions in actions:
+                    observations, rewards, dones, infos = vector.step(
+                        stepActions
+                    )
+                    steps.append((
+                        observations.copy(), rewards.tolist(),
+                        dones.tolist()
+                    ))
+
+                runs.append(steps)
+                # The block cannot close while views into it remain
+                del observations
+            finally:
+                vector.close()
+
+        for (observationsA, rewardsA, donesA), (
+            observationsB, rewardsB, donesB
+        ) in zip(*runs):
+            self.assertTrue((observationsA == observationsB).all())
+            self.assertEqual(rewardsA, rewardsB)
+            self.assertEqual(donesA, donesB)
+
+        self.assertTrue(any(any(step[2]) for step in runs[0]))
+        self.assertTrue(any(step[0].any() for step in runs[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
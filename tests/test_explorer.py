@@ -0,0 +1,139 @@
+import unittest
+from disassembler import Disassembler
+from explorer import Explorer, Finding, VisitedSet
+from cpu_constants import createCpu
+
+
+class ExplorerTest(unittest.TestCase):
+    # Crashes with key 5 held, recurses forever with key 3 held
+    FAULTY = [
+        0x6105,  # 0x200: V1 = 5
+        0xE19E,  # 0x202: skip if key 5 is down
+        0x1208,  # 0x204: jump 0x208
+        0x0000,  # 0x206: not an instruction
+        0x6103,  # 0x208: V1 = 3
+        0x3107,  # 0x20A: skip if V1 == 7, which it never is
+        0x1210,  # 0x20C: jump 0x210
+        0x00E0,  # 0x20E: clear, never executed
+        0xE19E,  # 0x210: skip if key 3 is down
+        0x1200,  # 0x212: jump 0x200
+        0x2214,  # 0x214: call 0x214
+    ]
+    # Counts the frames key 1 is held and stores the count at 0x300
+    COUNTER = [
+        0x6101,  # 0x200: V1 = 1
+        0xE1A1,  # 0x202: skip if key 1 is up
+        0x7201,  # 0x204: V2 += 1
+        0xA300,  # 0x206: I = 0x300
+        0xF255,  # 0x208: store V0-V2
+        0x1200,  # 0x20A: jump 0x200
+    ]
+
+    def tearDown(self):
+        pass
+
+    def testShouldFindCrashesWithTheirInputs(self):
+        cpu = createCpu(self.FAULTY)
+        explorer = Explorer(cpu, instructionsPerFrame=32).explore(100)
+        findings = {
+            finding.kind: finding for finding in explorer.findings
+        }
+
+        self.assertEqual(findings[Finding.CRASH].inputs, [6])
+        self.assertEqual(findings[Finding.CRASH].address, 0x206)
+        self.assertEqual(findings[Finding.STACK_OVERFLOW].inputs, [4])
+        self.assertEqual(findings[Finding.STACK_OVERFLOW].address, 0x214)
+
+    def testShouldFindStackUnderflowAtTheReturn(self):
+        cpu = createCpu([0x6101, 0x00EE])
+        explorer = Explorer(cpu, instructionsPerFrame=32).explore(100)
+
+        self.assertEqual(
+            [(finding.kind, finding.address) for finding in explorer.findings],
+            [(Finding.STACK_UNDERFLOW, 0x202)]
+        )
+
+    def testShouldDeduplicateStates(self):
+        cpu = createCpu(self.FAULTY)
+        explorer = Explorer(cpu, instructionsPerFrame=32).explore(100)
+
+        # Every key but 3 and 5 leaves the same state as no key at all
+        self.assertEqual(len(explorer.visited), 2)
+        self.assertEqual(explorer.expanded, 2)
+        self.assertEqual(explorer.duplicates, 14 + 15)
+        self.assertEqual(len(explorer.findings), 2)
+
+    def testShouldReportUnreachedCode(self):
+        cpu = createCpu(self.FAULTY)
+        explorer = Explorer(cpu, instructionsPerFrame=32).explore(100)
+        disassembler = Disassembler(
+            cpu.memory, end=0x200 + 2 * len(self.FAULTY)
+        ).analyse()
+
+        self.assertEqual(explorer.unreached(disassembler), [0x20E])
+
+    def testShouldRestoreTheDispatchPath(self):
+        cpu = createCpu(self.FAULTY)
+        table = cpu.dispatchTable
+        Explorer(cpu, instructionsPerFrame=32).explore(10)
+
+        self.assertIs(cpu.dispatchTable, table)
+        self.assertEqual(cpu.memory.writeListeners[-1], cpu.forgetIdleLoops)
+
+    def testShouldKeepAProfilerInstalledAround(self):
+        cpu = createCpu(self.FAULTY)
+        profiler = cpu.enableProfiling()
+        Explorer(cpu, instructionsPerFrame=32).explore(10)
+        counted = profiler.instructionCount()
+        cpu.run(5)
+
+        self.assertGreater(counted, 0)
+        self.assertEqual(profiler.instructionCount(), counted + 5)
+        cpu.disableProfiling()
+        self.assertIs(cpu.dispatchTable, cpu.plainDispatchTable)
+
+    def testChildrenShouldShareCleanPages(self):
+        cpu = createCpu(self.COUNTER)
+        explorer = Explorer(
+            cpu, instructionsPerFrame=6,
+            score=lambda cpu: cpu.vRegister[2]
+        ).explore(1)
+        root = explorer.root
+        child = explorer.best
+
+        self.assertEqual(child.inputs(), [2])
+        self.assertIsNot(child.pages[3], root.pages[3])
+        self.assertEqual(child.pages[3][:3], bytes([0, 1, 1]))
+
+        for index in (0, 1, 2, 4, 15):
+            self.assertIs(child.pages[index], root.pages[index])
+
+    def testBestFirstShouldFollowTheScore(self):
+        cpu = createCpu(self.COUNTER)
+        explorer = Explorer(
+            cpu, instructionsPerFrame=6,
+            score=lambda cpu: cpu.vRegister[2]
+        ).explore(5)
+
+        self.assertEqual(explorer.best.score, 5)
+        self.assertEqual(explorer.best.inputs(), [2] * 5)
+
+        explorer.load(explorer.best)
+        self.assertEqual(cpu.memory.getByte(0x302), 5)
+
+    def testVisitedSetShouldForgetTheOldest(self):
+        visited = VisitedSet(2)
+
+        self.assertTrue(visited.add(b"a"))
+        self.assertFalse(visited.add(b"a"))
+        visited.add(b"b")
+        visited.add(b"c")
+
+        self.assertEqual(len(visited), 2)
+        self.assertNotIn(b"a", visited)
+        self.assertIn(b"c", visited)
+        self.assertEqual(visited.forgotten, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
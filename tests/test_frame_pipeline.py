@@ -0,0 +1,92 @@
+import threading
+import time
+import unittest
+from frame_pipeline import FramePipeline
+from scheduler import Scheduler
+from cpu_constants import createCpu
+
+
+class FramePipelineTest(unittest.TestCase):
+    # Draws a moving byte every pass, so every tick makes a new frame
+    DRAW_LOOP = [0x7101, 0xA200, 0xD011, 0x1200]
+
+    def setUp(self):
+        cpu = createCpu(self.DRAW_LOOP)
+        self.screen = cpu.screen
+        self.scheduler = Scheduler(cpu, 4, Scheduler.MODE_UNTHROTTLED)
+
+    def tearDown(self):
+        pass
+
+    def testSwapShouldPublishAnImmutableFrame(self):
+        self.assertFalse(self.screen.swapBuffers())
+        self.screen.setPixel(3, 2, True)
+        self.assertTrue(self.screen.swapBuffers())
+        front = self.screen.front
+        self.assertEqual(front.number, 1)
+        self.assertEqual(front.getPixel(3, 2), 1)
+
+        self.screen.setPixel(3, 2, False)
+        self.assertEqual(front.getPixel(3, 2), 1)
+        self.assertTrue(self.screen.swapBuffers())
+        self.assertEqual(self.screen.front.getPixel(3, 2), 0)
+
+    def testSchedulerShouldSwapOnEveryTick(self):
+        self.scheduler.runTicks(5)
+        self.assertEqual(self.screen.front.number, 5)
+        self.assertEqual(bytes(self.screen.screen), self.screen.front.pixels)
+
+    def testShouldDeliverFramesInOrder(self):
+        frames = []
+        pipeline = FramePipeline(self.scheduler, frames.append, maxQueue=200)
+        self.assertEqual(pipeline.run(100), 100)
+        self.assertEqual([frame.number for frame in frames],
+                         list(range(1, 101)))
+        self.assertEqual(pipeline.framesDropped, 0)
+
+    def testSlowSinkShouldDropFramesNotStallEmulation(self):
+        release = threading.Event()
+        frames = []
+
+        def sink(frame):
+            release.wait()
+            frames.append(frame.number)
+
+        pipeline = FramePipeline(self.scheduler, sink)
+        pipeline.start(200)
+        deadline = time.monotonic() + 5
+
+        while self.scheduler.ticks < 200 and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        # Emulation got ahead while the sink was still stuck
+        self.assertEqual(self.scheduler.ticks, 200)
+        self.assertEqual(frames, [])
+        release.set()
+        pipeline.join()
+
+        self.assertGreater(pipeline.framesDropped, 0)
+        self.assertEqual(
+            pipeline.framesDelivered + pipeline.framesDropped, 200
+        )
+        self.assertEqual(frames[-1], 200)
+        self.assertEqual(frames, sorted(frames))
+
+    def testShouldReraiseSinkErrors(self):
+        def sink(frame):
+            raise RuntimeError("encoder failed")
+
+        pipeline = FramePipeline(self.scheduler, sink)
+        self.assertRaises(RuntimeError, pipeline.run, 10)
+        self.assertEqual(self.scheduler.ticks, 10)
+
+    def testShouldStopFromAnotherThread(self):
+        pipeline = FramePipeline(self.scheduler, lambda frame: None)
+        pipeline.start()
+        pipeline.stop()
+        pipeline.join()
+        self.assertFalse(pipeline.emulationThread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from cpu import CPU
+from scheduler import Scheduler
+from cpu_constants import createCpu
+
+
+class IdleLoopTest(unittest.TestCase):
+    ENGINES = (CPU.ENGINE_INTERPRETER, CPU.ENGINE_TRANSLATOR)
+
+    HALT = [0x6105, 0x1202]
+
+    # Waits for the delay timer, then counts V2 up and waits again
+    DELAY_LOOP = [
+        0x6003,  # 0x200: V0 = 3
+        0xF015,  # 0x202: DT = V0
+        0xF107,  # 0x204: V1 = DT
+        0x3100,  # 0x206: skip if V1 == 0
+        0x1204,  # 0x208: jump 0x204
+        0x7201,  # 0x20A: V2 += 1
+        0x1200,  # 0x20C: jump 0x200
+    ]
+
+    def tearDown(self):
+        pass
+
+    def assertSameState(self, first, second):
+        self.assertEqual(first.vRegister, second.vRegister)
+        self.assertEqual(first.programCounter, second.programCounter)
+        self.assertEqual(first.delayTimer, second.delayTimer)
+
+    def testShouldSkipJumpToSelf(self):
+        for engine in self.ENGINES:
+            with self.subTest(engine=engine):
+                cpu = createCpu(self.HALT, engine)
+                result = cpu.run(1000)
+
+                self.assertEqual(result.cycles, 1000)
+                self.assertEqual(cpu.programCounter, 0x202)
+                self.assertEqual(cpu.vRegister[1], 0x05)
+                self.assertGreater(cpu.cyclesSkipped, 990)
+
+    def testShouldNotCountSkippedCyclesAsCacheHits(self):
+        cpu = createCpu([0x1200])
+        cpu.run(100000)
+        cache = cpu.instructionCache
+
+        self.assertEqual(cpu.cyclesSkipped, 99998)
+        self.assertEqual((cache.misses, cache.hits), (1, 1))
+
+    def testShouldMeasureDelayTimerPollingLoop(self):
+        cpu = createCpu(self.DELAY_LOOP)
+        self.assertEqual(cpu.measureIdleLoop(0x204, 0x208), 3)
+        self.assertEqual(cpu.measureIdleLoop(0x200, 0x20C), 0)
+
+    def testShouldMatchSpinningStateAcrossTicks(self):
+        for engine in self.ENGINES:
+            with self.subTest(engine=engine):
+                for budget in (7, 10, 11):
+                    skipping = Scheduler(
+                        createCpu(self.DELAY_LOOP, engine), budget,
+                        Scheduler.MODE_UNTHROTTLED
+                    )
+                    spinning = Scheduler(
+                        createCpu(self.DELAY_LOOP),
+                        budget, Scheduler.MODE_UNTHROTTLED
+                    )
+                    spinning.cpu.idleSkipping = False
+
+                    for tick in range(20):
+                        skipping.tick()
+                        spinning.tick()
+                        self.assertSameState(skipping.cpu, spinning.cpu)
+
+                    self.assertGreater(skipping.cpu.cyclesSkipped, 0)
+                    self.assertEqual(spinning.cpu.cyclesSkipped, 0)
+
+    def testShouldForgetIdleLoopsOnMemoryWrite(self):
+        cpu = createCpu(self.HALT)
+        cpu.run(10)
+        self.assertTrue(cpu.idleLoops)
+
+        cpu.memory.setByte(0x100, 0x00)
+        self.assertFalse(cpu.idleLoops)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import random
+import tempfile
+import unittest
+from input_log import InputLog
+from scheduler import Scheduler
+from cpu_constants import createCpu
+
+
+class InputLogTest(unittest.TestCase):
+    # Mixes random numbers with key polling and waiting
+    PROGRAM = [
+        0xC0FF,  # 0x200: V0 = random
+        0xE19E,  # 0x202: skip if key V1 is down
+        0x1208,  # 0x204: jump 0x208
+        0x7201,  # 0x206: V2 += 1
+        0x8304,  # 0x208: V3 += V0
+        0x4205,  # 0x20A: skip unless V2 == 5
+        0xF40A,  # 0x20C: wait for a key into V4
+        0x1200,  # 0x20E: jump 0x200
+    ]
+    TICKS = 120
+
+    def setUp(self):
+        self.random = random.Random(7)
+
+    def tearDown(self):
+        pass
+
+    def createScheduler(self, instructionsPerTick=20):
+        return Scheduler(
+            createCpu(self.PROGRAM), instructionsPerTick,
+            Scheduler.MODE_UNTHROTTLED
+        )
+
+    def recordSession(self):
+        scheduler = self.createScheduler()
+        scheduler.cpu.seedRandom(99)
+        log = scheduler.startRecording()
+
+        for tick in range(self.TICKS):
+            if self.random.random() < 0.3:
+                key = self.random.randrange(2)
+
+                if scheduler.cpu.keypad.isPressed(key):
+                    scheduler.cpu.releaseKey(key)
+                else:
+                    scheduler.cpu.pressKey(key)
+
+            scheduler.tick()
+
+        self.assertIs(scheduler.stopRecording(), log)
+        return log, scheduler.cpu.snapshot()
+
+    def testShouldRoundTripThroughBytes(self):
+        log = InputLog(0xDEADBEEF)
+        log.record(0, 0, 0x1, True)
+        log.record(3, 60, 0xF, False)
+        log.record(70000, 1 << 33, 0x2, True)
+        decoded = InputLog.decode(log.encode())
+        self.assertEqual(decoded.randomState, 0xDEADBEEF)
+        self.assertEqual(decoded.events, log.events)
+        self.assertLess(len(log.encode()), InputLog.HEADER.size + 20)
+
+    def testShouldRejectOtherData(self):
+        self.assertRaises(ValueError, InputLog.decode, b"XXX" + bytes(9))
+
+    def testReplayShouldReproduceTheSessionExactly(self):
+        log, expected = self.recordSession()
+        self.assertGreater(len(log), 10)
+
+        scheduler = self.createScheduler()
+        scheduler.replay(InputLog.decode(log.encode()))
+        scheduler.runTicks(self.TICKS)
+        self.assertFalse(scheduler.isReplaying())
+        self.assertEqual(scheduler.cpu.snapshot(), expected)
+
+    def testReplayShouldDetectDivergence(self):
+        log, expected = self.recordSession()
+        scheduler = self.createScheduler(instructionsPerTick=21)
+        scheduler.replay(log)
+        self.assertRaises(ValueError, scheduler.runTicks, self.TICKS)
+
+    def testShouldSaveAndLoad(self):
+        log, expected = self.recordSession()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "session.log")
+            log.save(path)
+            loaded = InputLog.load(path)
+
+        self.assertEqual(loaded.randomState, log.randomState)
+        self.assertEqual(loaded.events, log.events)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from cpu import CPU
+from cpu_constants import CpuConstants, createCpu, loadProgram
+
+
+class InstructionCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cpu = createCpu()
+        self.memory = self.cpu.memory
+        self.cache = self.cpu.instructionCache
+
+    def tearDown(self):
+        pass
+
+    def loadOpcode(self, address, opcode):
+        loadProgram(self.memory, [opcode], address)
+
+    def testShouldCountMissThenHit(self):
+        self.loadOpcode(CpuConstants.PC_BEFORE, CpuConstants.OPCODE_ANNN)
+        first = self.cache.lookup(CpuConstants.PC_BEFORE)
+        second = self.cache.lookup(CpuConstants.PC_BEFORE)
+
+        self.assertIs(first, second)
+        self.assertEqual(first[0], CpuConstants.OPCODE_ANNN)
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    def testShouldCarryPrecomputedOperands(self):
+        self.loadOpcode(CpuConstants.PC_BEFORE, 0x8125)
+        opcode, handler, operands = self.cache.lookup(CpuConstants.PC_BEFORE)
+
+        self.assertIs(handler, CPU.executeOpcode8XY5)
+        self.assertEqual(operands, (0x1, 0x2, 0x5, 0x25, 0x125))
+
+    def testShouldInvalidateOnBothBytesOfInstruction(self):
+        self.loadOpcode(CpuConstants.PC_BEFORE, CpuConstants.OPCODE_ANNN)
+
+        for offset in (0, 1):
+            self.cache.lookup(CpuConstants.PC_BEFORE)
+            self.memory.setByte(CpuConstants.PC_BEFORE + offset, 0x00)
+            self.assertIsNone(self.cache.entries[CpuConstants.PC_BEFORE])
+
+        self.assertEqual(self.cache.invalidations, 2)
+
+    def testShouldExecuteSelfModifiedCode(self):
+        self.loadOpcode(CpuConstants.PC_BEFORE, CpuConstants.OPCODE_6XNN)
+        self.cpu.nextCycle()
+        self.assertEqual(
+            self.cpu.vRegister[CpuConstants.X_6XNN],
+            CpuConstants.VX_6XNN
+        )
+
+        self.loadOpcode(CpuConstants.PC_BEFORE, CpuConstants.OPCODE_ANNN)
+        self.cpu.programCounter = CpuConstants.PC_BEFORE
+        self.cpu.nextCycle()
+        self.assertEqual(self.cpu.indexRegister, CpuConstants.IR_ANNN)
+
+    def testShouldReportStatistics(self):
+        self.assertEqual(
+            self.cache.statistics(),
+            {"hits": 0, "misses": 0, "invalidations": 0}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
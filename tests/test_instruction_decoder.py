@@ -0,0 +1,42 @@
+import unittest
+from instruction_decoder import InstructionDecoder
+
+
+class InstructionDecoderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = InstructionDecoder.keyTable()
+        self.operands = InstructionDecoder.operandTable()
+
+    def tearDown(self):
+        pass
+
+    def testShouldCoverEveryOpcode(self):
+        self.assertEqual(len(self.keys), InstructionDecoder.OPCODE_COUNT)
+        self.assertEqual(len(self.operands), InstructionDecoder.OPCODE_COUNT)
+
+    def testShouldBuildTablesOnlyOnce(self):
+        self.assertIs(InstructionDecoder.keyTable(), self.keys)
+        self.assertIs(InstructionDecoder.operandTable(), self.operands)
+
+    def testShouldDecodeExactSystemOpcodes(self):
+        self.assertEqual(self.keys[0x00E0], 0x00E0)
+        self.assertEqual(self.keys[0x00EE], 0x00EE)
+        self.assertEqual(self.keys[0x01E0], 0x0000)
+
+    def testShouldDecodeOpcodeGroups(self):
+        self.assertEqual(self.keys[0xA2F0], 0xA000)
+        self.assertEqual(self.keys[0x8124], 0x8004)
+        self.assertEqual(self.keys[0xE39E], 0xE09E)
+        self.assertEqual(self.keys[0xF533], 0xF033)
+
+    def testShouldRejectUnknownOpcodes(self):
+        for opcode in (0xFFFF, 0x5671, 0x8128, 0xE123, 0xF0FF):
+            self.assertIsNone(self.keys[opcode])
+
+    def testShouldExtractOperands(self):
+        self.assertEqual(self.operands[0xD4A7], (0x4, 0xA, 0x7, 0xA7, 0x4A7))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from keypad import Keypad
+
+
+class KeypadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.keypad = Keypad()
+        self.changes = []
+        self.keypad.addListener(
+            lambda key, pressed: self.changes.append((key, pressed))
+        )
+
+    def tearDown(self):
+        pass
+
+    def testShouldTrackHeldKeys(self):
+        self.keypad.press(0x0)
+        self.keypad.press(0xF)
+        self.assertTrue(self.keypad.isPressed(0x0))
+        self.assertTrue(self.keypad.isPressed(0xF))
+        self.assertFalse(self.keypad.isPressed(0x7))
+
+        self.keypad.release(0x0)
+        self.assertFalse(self.keypad.isPressed(0x0))
+        self.assertEqual(self.keypad.keys, 0x8000)
+
+    def testShouldOnlyLookAtTheLowNibble(self):
+        self.keypad.press(0x3)
+        self.assertTrue(self.keypad.isPressed(0x13))
+
+    def testShouldNotifyListeners(self):
+        self.keypad.press(0x5)
+        self.keypad.press(0x6)
+        self.keypad.releaseAll()
+        self.assertEqual(self.changes, [
+            (0x5, True), (0x6, True), (0x5, False), (0x6, False),
+        ])
+
+    def testShouldRejectUnknownKeys(self):
+        self.assertRaises(ValueError, self.keypad.press, 16)
+        self.assertRaises(ValueError, self.keypad.release, -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 from memory import Memory
 
@@ -39,6 +41,60 @@ class MemoryTest(unittest.TestCase):
         with self.assertRaises(IndexError):
             self.memory.getByte(self.MEM_ADDRESS_WRONG_HIGH)
 
+    def testShouldNotifyWriteListeners(self):
+        writes = []
+        self.memory.addWriteListener(lambda *span: writes.append(span))
+        self.memory.setByte(self.MEM_ADDRESS, self.MEM_VALUE)
+        self.assertEqual(writes, [(self.MEM_ADDRESS, self.MEM_ADDRESS + 1)])
+
+    def testShouldWrapBytesToEightBits(self):
+        self.memory.setByte(self.MEM_ADDRESS, 0x1FF)
+        self.assertEqual(self.memory.getByte(self.MEM_ADDRESS), 0xFF)
+
+    def testShouldReadBigEndianWord(self):
+        self.memory.write(self.MEM_ADDRESS, b"\xA2\xF0")
+        self.assertEqual(self.memory.getWord(self.MEM_ADDRESS), 0xA2F0)
+
+    def testShouldReadWithoutCopying(self):
+        view = self.memory.read(self.MEM_ADDRESS, 2)
+        self.memory.setByte(self.MEM_ADDRESS, self.MEM_VALUE)
+        self.assertEqual(view[0], self.MEM_VALUE)
+
+    def testShouldWriteAndLoadBulkData(self):
+        writes = []
+        self.memory.addWriteListener(lambda *span: writes.append(span))
+        self.memory.write(self.MEM_ADDRESS, b"\x01\x02\x03")
+        self.memory.load(0, bytearray(b"\x04"))
+
+        self.assertEqual(
+            bytes(self.memory.read(self.MEM_ADDRESS, 3)), b"\x01\x02\x03"
+        )
+        self.assertEqual(self.memory.getByte(0), 0x04)
+        self.assertEqual(
+            writes, [(self.MEM_ADDRESS, self.MEM_ADDRESS + 3), (0, 1)]
+        )
+
+    def testShouldRaiseErrorOnIllegalBulkAccess(self):
+        with self.assertRaises(IndexError):
+            self.memory.write(self.MEM_SIZE - 1, b"\x01\x02")
+
+        with self.assertRaises(IndexError):
+            self.memory.read(self.MEM_ADDRESS_WRONG_LOW, 1)
+
+        self.assertEqual(len(self.memory.memory), self.MEM_SIZE)
+
+    def testShouldLoadRomFromFile(self):
+        with tempfile.NamedTemporaryFile(delete=False) as rom:
+            rom.write(b"\x12\x00")
+
+        try:
+            length = self.memory.loadRom(rom.name)
+        finally:
+            os.remove(rom.name)
+
+        self.assertEqual(length, 2)
+        self.assertEqual(self.memory.getWord(0x200), 0x1200)
+
     def testShouldReserveEnoughMemory(self):
         self.assertEqual(len(self.memory.memory), self.MEM_SIZE)
 
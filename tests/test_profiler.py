@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from cpu import CPU
+from cpu_constants import createCpu
+
+
+class ProfilerTest(unittest.TestCase):
+    # Calls a subroutine three times from a counted loop, then halts
+    CALL_LOOP = [
+        0x6003,  # 0x200: V0 = 3
+        0x220C,  # 0x202: call 0x20C
+        0x70FF,  # 0x204: V0 -= 1
+        0x3000,  # 0x206: skip if V0 == 0
+        0x1202,  # 0x208: jump 0x202
+        0x120A,  # 0x20A: halt
+        0x7101,  # 0x20C: V1 += 1
+        0x00EE,  # 0x20E: return
+    ]
+
+    def tearDown(self):
+        pass
+
+    def profile(self, engine=CPU.ENGINE_INTERPRETER, cycles=20):
+        cpu = createCpu(self.CALL_LOOP, engine)
+        cpu.idleSkipping = False
+        profiler = cpu.enableProfiling()
+        cpu.run(cycles)
+        return cpu, profiler
+
+    def testShouldCountOpcodesAndAddresses(self):
+        cpu, profiler = self.profile()
+        self.assertEqual(profiler.instructionCount(), 20)
+        self.assertEqual(profiler.opcodeCounts["2NNN"], 3)
+        self.assertEqual(profiler.opcodeCounts["7XNN"], 6)
+        self.assertEqual(profiler.opcodeCounts["1NNN"], 4)
+        self.assertEqual(profiler.addressCounts[0x202], 3)
+        self.assertEqual(profiler.addressCounts[0x20A], 2)
+        self.assertEqual(cpu.vRegister[1], 3)
+
+    def testShouldReportHotSpotsAndLoops(self):
+        cpu, profiler = self.profile()
+        report = profiler.report(top=2)
+        self.assertEqual(report["instructions"], 20)
+        self.assertEqual(len(report["addresses"]), 2)
+        self.assertEqual(report["opcodes"][0]["opcode"], "7XNN")
+        self.assertEqual(report["loops"][0], {
+            "start": 0x202, "end": 0x208,
+            "iterations": 2, "instructions": 11,
+        })
+        self.assertEqual(report["loops"][1]["start"], 0x20A)
+
+    def testShouldExportCollapsedStacks(self):
+        cpu, profiler = self.profile()
+        self.assertEqual(
+            profiler.collapsedStacks(), ["main 14", "main;0x20C 6"]
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.folded")
+            profiler.writeCollapsed(path)
+
+            with open(path) as folded:
+                self.assertEqual(folded.read(), "main 14\nmain;0x20C 6\n")
+
+    def testDisablingShouldRestoreThePlainDispatchPath(self):
+        cpu, profiler = self.profile(CPU.ENGINE_TRANSLATOR)
+        table = cpu.plainDispatchTable
+        self.assertIsNone(cpu.blockTranslator)
+        self.assertIs(cpu.disableProfiling(), profiler)
+        self.assertIs(cpu.dispatchTable, table)
+        self.assertIsNotNone(cpu.blockTranslator)
+        self.assertIsNone(cpu.profiler)
+        cpu.run(10)
+        self.assertEqual(profiler.instructionCount(), 20)
+
+        for entry in cpu.instructionCache.entries:
+            if entry is not None:
+                self.assertIs(entry[1], table[entry[0]])
+
+    def testShouldMatchAnUnprofiledRun(self):
+        cpu, profiler = self.profile(cycles=17)
+        plain = createCpu(self.CALL_LOOP)
+        plain.idleSkipping = False
+        plain.run(17)
+        self.assertEqual(cpu.vRegister, plain.vRegister)
+        self.assertEqual(cpu.programCounter, plain.programCounter)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+from cpu import CPU
+from quirks import QuirkProfile
+from cpu_constants import createCpu
+
+
+class QuirksTest(unittest.TestCase):
+    # Exercises every quirk, leaving the results in V0-V3 and I
+    PROGRAM = [
+        0x6181,  # 0x200: V1 = 0x81
+        0x6203,  # 0x202: V2 = 3
+        0x6F07,  # 0x204: VF = 7
+        0x8321,  # 0x206: V3 = V3 | V2
+        0x8016,  # 0x208: V0 = shift right V0 or V1
+        0x801E,  # 0x20A: V0 = shift left V0 or V1
+        0xA300,  # 0x20C: I = 0x300
+        0xF255,  # 0x20E: store V0-V2
+        0xB212,  # 0x210: jump 0x212 + V0, or 0x212 + V2
+    ]
+
+    def tearDown(self):
+        pass
+
+    def testDefaultShouldBeTheModernProfile(self):
+        cpu = createCpu(self.PROGRAM)
+        cpu.run(len(self.PROGRAM))
+
+        self.assertIs(cpu.quirks, QuirkProfile.resolve(QuirkProfile.MODERN))
+        self.assertEqual(cpu.vRegister[:4], [0x00, 0x81, 0x03, 0x03])
+        self.assertEqual(cpu.indexRegister, 0x300)
+        self.assertEqual(cpu.programCounter, 0x212)
+
+    def testCosmacVipShouldUseVYAndAdvanceI(self):
+        cpu = createCpu(self.PROGRAM, quirks=QuirkProfile.COSMAC_VIP)
+        cpu.run(len(self.PROGRAM))
+
+        # V0 = 0x81 << 1 with the MSB of V1 left in VF
+        self.assertEqual(cpu.vRegister[0], 0x02)
+        self.assertEqual(cpu.vRegister[0x0F], 0x01)
+        self.assertEqual(cpu.indexRegister, 0x303)
+        self.assertEqual(cpu.programCounter, 0x214)
+
+    def testLogicShouldResetVFOnlyOnTheVip(self):
+        for quirks, flag in (
+            (QuirkProfile.COSMAC_VIP, 0x00), (QuirkProfile.MODERN, 0x07)
+        ):
+            cpu = createCpu(self.PROGRAM, quirks=quirks)
+            cpu.run(4)
+            self.assertEqual(cpu.vRegister[0x0F], flag)
+
+    def testChip48ShouldAdvanceIByXAndJumpFromVX(self):
+        cpu = createCpu(self.PROGRAM, quirks=QuirkProfile.CHIP_48)
+        cpu.run(len(self.PROGRAM))
+
+        self.assertEqual(cpu.indexRegister, 0x302)
+        self.assertEqual(cpu.programCounter, 0x215)
+
+    def testSchipShouldJumpFromVXAndKeepI(self):
+        cpu = createCpu(self.PROGRAM, quirks=QuirkProfile.SCHIP)
+        cpu.run(len(self.PROGRAM))
+
+        self.assertEqual(cpu.indexRegister, 0x300)
+        self.assertEqual(cpu.programCounter, 0x215)
+
+    def testProfilesShouldBeResolvedIntoSharedTables(self):
+        vip = createCpu(self.PROGRAM, quirks=QuirkProfile.COSMAC_VIP)
+        otherVip = createCpu(self.PROGRAM, quirks=QuirkProfile.COSMAC_VIP)
+        modern = createCpu(self.PROGRAM)
+
+        self.assertIs(vip.dispatchTable, otherVip.dispatchTable)
+        self.assertIsNot(vip.dispatchTable, modern.dispatchTable)
+        self.assertIs(vip.dispatchTable[0x8016], CPU.executeOpcode8XY6ShiftVY)
+        self.assertIs(modern.dispatchTable[0x8016], CPU.executeOpcode8XY6)
+
+    def testProfilesShouldShareTablesBySettingsNotName(self):
+        custom = QuirkProfile(QuirkProfile.MODERN, shiftVY=True)
+        renamed = QuirkProfile(
+            "renamedVip", shiftVY=True,
+            indexIncrement=QuirkProfile.INDEX_PLUS_X_PLUS_1,
+            logicResetsVF=True
+        )
+        modern = createCpu(self.PROGRAM)
+        vip = createCpu(self.PROGRAM, quirks=QuirkProfile.COSMAC_VIP)
+
+        self.assertIsNot(
+            createCpu(self.PROGRAM, quirks=custom).dispatchTable,
+            modern.dispatchTable
+        )
+        self.assertIs(
+            createCpu(self.PROGRAM, quirks=renamed).dispatchTable,
+            vip.dispatchTable
+        )
+
+    def testTranslatorShouldMatchTheInterpreter(self):
+        for quirks in QuirkProfile.profiles:
+            interpreted = createCpu(self.PROGRAM, quirks=quirks)
+            translated = createCpu(self.PROGRAM, CPU.ENGINE_TRANSLATOR, quirks)
+            interpreted.run(len(self.PROGRAM))
+            translated.run(len(self.PROGRAM))
+            self.assertEqual(translated.snapshot(), interpreted.snapshot())
+
+    def testCachedBlocksShouldOnlyLoadUnderTheirProfile(self):
+        vip = createCpu(
+            self.PROGRAM, CPU.ENGINE_TRANSLATOR, QuirkProfile.COSMAC_VIP
+        )
+        vip.run(len(self.PROGRAM))
+        analysis = vip.exportAnalysis()
+        modern = createCpu(self.PROGRAM, CPU.ENGINE_TRANSLATOR)
+        modern.importAnalysis(analysis)
+        self.assertEqual(modern.blockTranslator.blocks, {})
+
+        otherVip = createCpu(
+            self.PROGRAM, CPU.ENGINE_TRANSLATOR, QuirkProfile.COSMAC_VIP
+        )
+        otherVip.importAnalysis(analysis)
+        self.assertNotEqual(otherVip.blockTranslator.blocks, {})
+
+    def testUnknownProfileShouldRaise(self):
+        with self.assertRaises(ValueError):
+            createCpu(self.PROGRAM, quirks="chip9")
+
+
+if __name__ == "__main__":
+    unittest.main()
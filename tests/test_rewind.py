@@ -0,0 +1,74 @@
+import unittest
+from rewind import Rewind
+from cpu_constants import createCpu
+
+
+class RewindTest(unittest.TestCase):
+    # Draws a moving sprite and stores V1 in memory on every pass
+    PROGRAM = [
+        0x7101,  # 0x200: V1 += 1
+        0xA300,  # 0x202: I = 0x300
+        0xF155,  # 0x204: store V0, V1
+        0xD011,  # 0x206: draw 1 row at V0, V1
+        0x1200,  # 0x208: jump 0x200
+    ]
+
+    def setUp(self):
+        self.cpu = createCpu(self.PROGRAM)
+
+    def tearDown(self):
+        pass
+
+    def runFrames(self, rewind, count):
+        states = []
+
+        for frame in range(count):
+            self.cpu.run(5)
+            rewind.record()
+            states.append(self.cpu.snapshot())
+
+        return states
+
+    def testShouldStepBackFrameByFrame(self):
+        rewind = Rewind(self.cpu, keyframeInterval=4)
+        states = self.runFrames(rewind, 10)
+
+        for expected in reversed(states[:-1]):
+            self.assertTrue(rewind.stepBack())
+            self.assertEqual(self.cpu.snapshot(), expected)
+
+        self.assertFalse(rewind.stepBack())
+
+    def testShouldRecordEveryIntervalFrames(self):
+        rewind = Rewind(self.cpu, interval=3)
+        states = self.runFrames(rewind, 9)
+
+        self.assertEqual(len(rewind), 3)
+        rewind.stepBack()
+        self.assertEqual(self.cpu.snapshot(), states[5])
+
+    def testShouldContinueRecordingAfterStepBack(self):
+        rewind = Rewind(self.cpu, keyframeInterval=3)
+        self.runFrames(rewind, 5)
+        rewind.stepBack()
+        rewind.stepBack()
+        states = self.runFrames(rewind, 4)
+
+        rewind.stepBack()
+        self.assertEqual(self.cpu.snapshot(), states[-2])
+
+    def testShouldStoreDeltasCompactly(self):
+        rewind = Rewind(self.cpu)
+        states = self.runFrames(rewind, 60)
+        self.assertLess(rewind.size, len(states[0]) * 2)
+
+    def testShouldEvictOldestGroupsOverBudget(self):
+        rewind = Rewind(self.cpu, keyframeInterval=2, budget=1)
+        self.runFrames(rewind, 10)
+
+        self.assertEqual(len(rewind.groups), 1)
+        self.assertLessEqual(len(rewind), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
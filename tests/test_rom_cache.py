@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import unittest
+from cpu import CPU
+from rom_cache import RomCache
+from cpu_constants import CpuConstants, assemble, createCpu
+
+
+class RomCacheTest(unittest.TestCase):
+    # Counts and draws, then waits on the delay timer in an idle loop
+    ROM = assemble([
+        0x7101,  # 0x200: V1 += 1
+        0xA20E,  # 0x202: I = 0x20E
+        0xD011,  # 0x204: draw 1 row at V0, V1
+        0x6F05,  # 0x206: VF = 5
+        0xFF15,  # 0x208: delay timer = VF
+        0xF007,  # 0x20A: V0 = delay timer
+        0x3000,  # 0x20C: skip if V0 == 0
+        0x120A,  # 0x20E: jump 0x20A
+        0x1200,  # 0x210: jump 0x200
+    ])
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = RomCache(self.directory)
+
+    def tearDown(self):
+        pass
+
+    def createCpu(self, rom=ROM):
+        cpu = createCpu(engine=CPU.ENGINE_TRANSLATOR)
+        cpu.memory.load(CpuConstants.PC_BEFORE, rom)
+        return cpu
+
+    def runTicks(self, cpu, ticks=20):
+        for tick in range(ticks):
+            cpu.run(50)
+            cpu.decrementTimers()
+
+    def testWarmStartShouldSkipTranslation(self):
+        cold = self.createCpu()
+        self.assertFalse(self.cache.warm(cold, self.ROM))
+        self.runTicks(cold)
+        self.cache.save(cold, self.ROM)
+        self.assertGreater(cold.blockTranslator.translations, 0)
+
+        warm = self.createCpu()
+        self.assertTrue(self.cache.warm(warm, self.ROM))
+        self.assertEqual(warm.idleLoops, {0x20E: 3})
+        self.runTicks(warm)
+        self.assertEqual(warm.blockTranslator.translations, 0)
+        self.assertEqual(warm.snapshot(), cold.snapshot())
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def testShouldOnlyInstallBlocksMatchingMemory(self):
+        cold = self.createCpu()
+        self.runTicks(cold)
+        self.cache.save(cold, self.ROM)
+
+        warm = self.createCpu()
+        warm.memory.write(0x200, b"\x71\x02")
+        self.cache.warm(warm, self.ROM)
+        self.assertNotIn(0x200, warm.blockTranslator.blocks)
+        self.assertIn(0x206, warm.blockTranslator.blocks)
+
+    def testShouldKeyEntriesByRom(self):
+        cpu = self.createCpu()
+        self.runTicks(cpu)
+        self.cache.save(cpu, self.ROM)
+        other = self.ROM[:-2] + b"\x12\x02"
+        self.assertFalse(self.cache.warm(self.createCpu(other), other))
+
+    def testShouldEvictLeastRecentlyUsedEntries(self):
+        roms = [bytes([index]) * 64 for index in range(3)]
+
+        for age, rom in enumerate(roms):
+            self.cache.store(rom, {"blocks": [], "padding": bytes(1000)})
+            os.utime(self.cache.path(rom), (1000 + age, 1000 + age))
+
+        self.cache.load(roms[0])
+        self.cache.maxBytes = 2500
+        self.cache.evict()
+        self.assertTrue(os.path.exists(self.cache.path(roms[0])))
+        self.assertFalse(os.path.exists(self.cache.path(roms[1])))
+        self.assertTrue(os.path.exists(self.cache.path(roms[2])))
+
+
+if __name__ == "__main__":
+    unittest.main()
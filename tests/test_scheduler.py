@@ -0,0 +1,88 @@
+import unittest
+from scheduler import Scheduler
+from cpu_constants import CpuConstants, createCpu
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        # Every reading moves time on a little, like a real clock
+        self.now += 0.0001
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class SchedulerTest(unittest.TestCase):
+    # Sets the delay timer to 3 then counts V1 up forever
+    PROGRAM = [0x6003, 0xF015, 0x7101, 0x1204]
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        pass
+
+    def createScheduler(self, mode, speed=1, instructionsPerTick=10):
+        return Scheduler(
+            createCpu(self.PROGRAM), instructionsPerTick, mode, speed,
+            clock=self.clock.clock, sleep=self.clock.sleep
+        )
+
+    def testShouldRejectUnknownMode(self):
+        with self.assertRaises(ValueError):
+            self.createScheduler("warp")
+
+    def testShouldRunInstructionsPerTickAndDecrementTimers(self):
+        scheduler = self.createScheduler(Scheduler.MODE_UNTHROTTLED)
+        scheduler.runTicks(2)
+
+        self.assertEqual(scheduler.ticks, 2)
+        self.assertEqual(scheduler.cycles, 20)
+        self.assertEqual(scheduler.cpu.delayTimer, 1)
+        self.assertEqual(scheduler.cpu.vRegister[1], 9)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def testShouldBeDeterministicAcrossModes(self):
+        states = []
+
+        for mode, speed in (
+            (Scheduler.MODE_REALTIME, 1),
+            (Scheduler.MODE_FAST_FORWARD, 8),
+            (Scheduler.MODE_UNTHROTTLED, 1),
+        ):
+            scheduler = self.createScheduler(mode, speed)
+            scheduler.runTicks(5)
+            cpu = scheduler.cpu
+            states.append((cpu.vRegister, cpu.delayTimer, cpu.programCounter))
+
+        self.assertEqual(states[0], states[1])
+        self.assertEqual(states[0], states[2])
+
+    def testShouldPaceRealtimeTicks(self):
+        scheduler = self.createScheduler(Scheduler.MODE_REALTIME)
+        scheduler.runTicks(60)
+        self.assertAlmostEqual(self.clock.now, 1.0, places=2)
+
+    def testShouldPaceFastForwardTicks(self):
+        scheduler = self.createScheduler(Scheduler.MODE_FAST_FORWARD, 4)
+        scheduler.runTicks(60)
+        self.assertAlmostEqual(self.clock.now, 0.25, places=2)
+
+    def testShouldUseRestOfTickWhileWaitingForKey(self):
+        scheduler = self.createScheduler(Scheduler.MODE_UNTHROTTLED)
+        scheduler.cpu.memory.write(CpuConstants.PC_BEFORE, b"\xF0\x0A")
+        scheduler.runTicks(3)
+
+        self.assertEqual(scheduler.ticks, 3)
+        self.assertEqual(scheduler.cpu.waitingRegister, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -26,9 +26,148 @@ class ScreenTest(unittest.TestCase):
         self.assertFalse(pixel2)
 
     def testShouldBeClearedAfterInit(self):
-        self.assertTrue(self.screen.screen == [0] * len(self.screen.screen))
+        self.assertTrue(
+            self.screen.screen == bytearray(len(self.screen.screen))
+        )
 
     def testShouldFullyClearScreen(self):
         self.screen.setPixel(1, 1, True)
         self.screen.clear()
-        self.assertTrue(self.screen.screen == [0] * len(self.screen.screen))
+        self.assertTrue(
+            self.screen.screen == bytearray(len(self.screen.screen))
+        )
+
+    def testShouldPackEightPixelsPerByte(self):
+        self.assertEqual(
+            len(self.screen.screen), self.SCREEN_W * self.SCREEN_H // 8
+        )
+        self.screen.setPixel(9, 1, True)
+        self.assertEqual(self.screen.screen[self.SCREEN_W // 8 + 1], 0x40)
+
+    def testShouldDrawSpriteWithoutCollision(self):
+        collision = self.screen.drawSprite(3, 2, b"\xF0\x90")
+        self.assertFalse(collision)
+        self.assertEqual(
+            [self.screen.getPixel(x, 2) for x in range(3, 7)], [1, 1, 1, 1]
+        )
+        self.assertEqual(
+            [self.screen.getPixel(x, 3) for x in range(3, 7)], [1, 0, 0, 1]
+        )
+
+    def testShouldEraseSpriteAndReportCollision(self):
+        self.screen.drawSprite(3, 2, b"\xF0\x90")
+        collision = self.screen.drawSprite(3, 2, b"\xF0\x90")
+        self.assertTrue(collision)
+        self.assertTrue(
+            self.screen.screen == bytearray(len(self.screen.screen))
+        )
+
+    def testShouldClipSpriteAtEdges(self):
+        right = self.SCREEN_W - 1
+        bottom = self.SCREEN_H - 1
+        self.screen.drawSprite(right - 3, bottom, b"\xFF\xFF")
+        self.assertTrue(self.screen.getPixel(right, bottom))
+        self.assertFalse(self.screen.getPixel(0, bottom))
+        self.assertFalse(self.screen.getPixel(right, 0))
+
+    def testShouldWrapSpriteAtEdgesWhenEnabled(self):
+        right = self.SCREEN_W - 1
+        bottom = self.SCREEN_H - 1
+        self.screen.wrapSprites = True
+        self.screen.drawSprite(right - 3, bottom, b"\xFF\xFF")
+        self.assertTrue(self.screen.getPixel(3, bottom))
+        self.assertTrue(self.screen.getPixel(right, 0))
+        self.assertTrue(self.screen.getPixel(0, 0))
+
+    def testShouldWrapSpriteStartCoordinates(self):
+        self.screen.drawSprite(self.SCREEN_W + 1, self.SCREEN_H + 1, b"\x80")
+        self.assertTrue(self.screen.getPixel(1, 1))
+
+    def testShouldStartWithoutDirtyRows(self):
+        self.assertFalse(self.screen.isDirty())
+        self.assertEqual(self.screen.popDirtyRows(), [])
+
+    def testShouldTrackRowsChangedByPixelsAndSprites(self):
+        self.screen.setPixel(1, 1, True)
+        self.screen.drawSprite(0, 4, b"\x80\x00\x80")
+        self.assertTrue(self.screen.isDirty())
+        self.assertEqual(self.screen.popDirtyRows(), [1, 4, 6])
+        self.assertFalse(self.screen.isDirty())
+
+    def testShouldMarkOnlyLitRowsDirtyOnClear(self):
+        self.screen.setPixel(1, 3, True)
+        self.screen.popDirtyRows()
+        self.screen.clear()
+        self.assertEqual(self.screen.popDirtyRows(), [3])
+
+        self.screen.clear()
+        self.assertFalse(self.screen.isDirty())
+
+    def testShouldExposeRowBytes(self):
+        self.screen.setPixel(8, 2, True)
+        row = self.screen.getRow(2)
+        self.assertEqual(len(row), self.SCREEN_W // 8)
+        self.assertEqual(row[1], 0x80)
+
+    def testShouldScrollRowsDown(self):
+        self.screen.setPixel(5, 0, True)
+        self.screen.setPixel(6, 31, True)
+        self.screen.popDirtyRows()
+        self.screen.scrollDown(3)
+        self.assertEqual(self.screen.getPixel(5, 3), 1)
+        self.assertEqual(self.screen.getPixel(5, 0), 0)
+        self.assertEqual(sum(self.screen.screen), 0x04)
+        self.assertEqual(len(self.screen.popDirtyRows()), self.SCREEN_H)
+
+    def testShouldScrollSidewaysWithinEachRow(self):
+        self.screen.setPixel(0, 1, True)
+        self.screen.setPixel(self.SCREEN_W - 1, 1, True)
+        self.screen.scrollRight()
+        self.assertEqual(self.screen.getPixel(4, 1), 1)
+        # Bits leaving a row are dropped, not carried into the next
+        self.assertEqual(self.screen.getPixel(3, 2), 0)
+        self.assertEqual(sum(self.screen.screen), 0x08)
+
+        self.screen.scrollLeft()
+        self.screen.scrollLeft()
+        self.assertEqual(self.screen.getRow(1).tobytes(), bytes(8))
+
+    def testShouldSwitchResolution(self):
+        self.screen.setPixel(1, 1, True)
+        self.screen.setResolution(*Screen.HIGH_RESOLUTION)
+        self.assertEqual((self.screen.width, self.screen.height), (128, 64))
+        self.assertEqual(len(self.screen.screen), 128 * 64 // 8)
+        self.assertFalse(any(self.screen.screen))
+        self.assertTrue(self.screen.swapBuffers())
+        self.assertEqual(self.screen.front.width, 128)
+
+    def testShouldNotResizeAGivenBuffer(self):
+        screen = Screen(self.SCREEN_W, self.SCREEN_H, bytearray(256))
+
+        with self.assertRaises(ValueError):
+            screen.setResolution(*Screen.HIGH_RESOLUTION)
+
+    def testShouldDrawWideSprites(self):
+        collision = self.screen.drawWideSprite(56, 0, b"\xFF\x81" * 16)
+        self.assertFalse(collision)
+        self.assertEqual(self.screen.getPixel(63, 5), 1)
+        # The right half is clipped rather than wrapped
+        self.assertEqual(self.screen.getPixel(0, 5), 0)
+
+    def testShouldDrawIntoSelectedPlanes(self):
+        screen = Screen(self.SCREEN_W, self.SCREEN_H, planes=2)
+        screen.drawSprite(0, 0, b"\x80", 1)
+        screen.drawSprite(1, 0, b"\x80", 0)
+        screen.selectPlanes(0x02)
+        screen.scrollDown(1)
+        screen.swapBuffers()
+
+        self.assertEqual(screen.front.getPixel(0, 1), 2)
+        self.assertEqual(screen.front.getPixel(1, 0), 1)
+        screen.selectPlanes(0x03)
+        screen.clear()
+        self.assertEqual(screen.pixelBytes(), bytes(2 * 256))
+
+
+if __name__ == "__main__":
+    unittest.main()
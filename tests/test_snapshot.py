@@ -0,0 +1,96 @@
+import unittest
+from cpu import CPU
+from snapshot import Snapshot
+from cpu_constants import CpuConstants, createCpu
+
+
+class SnapshotTest(unittest.TestCase):
+    # Counts V1 up through a subroutine that also draws
+    PROGRAM = [0x2206, 0x7101, 0x1200, 0xA000, 0xD111, 0x00EE]
+
+    def setUp(self):
+        self.cpu = createCpu(self.PROGRAM)
+
+    def tearDown(self):
+        pass
+
+    def machineState(self, cpu):
+        return (
+            list(cpu.vRegister), cpu.indexRegister, cpu.programCounter,
+            list(cpu.stack), cpu.stackPointer, cpu.delayTimer,
+            cpu.soundTimer, bytes(cpu.memory.memory),
+            bytes(cpu.screen.screen),
+        )
+
+    def testShouldBeCompact(self):
+        blob = self.cpu.snapshot()
+        self.assertEqual(
+            len(blob),
+            Snapshot.HEADER.size + CpuConstants.MEM_SIZE
+            + CpuConstants.SCREEN_W * CpuConstants.SCREEN_H // 8
+        )
+
+    def testShouldRestoreIntoSameMachine(self):
+        self.cpu.delayTimer = 0x10
+        self.cpu.run(7)
+        blob = self.cpu.snapshot()
+        expected = self.machineState(self.cpu)
+
+        self.cpu.run(50)
+        self.cpu.memory.setByte(0x300, 0x42)
+        self.cpu.restore(blob)
+        self.assertEqual(self.machineState(self.cpu), expected)
+
+    def testShouldForkIntoAnotherMachine(self):
+        self.cpu.run(9)
+        fork = createCpu()
+        fork.restore(self.cpu.snapshot())
+
+        self.cpu.run(20)
+        fork.run(20)
+        self.assertEqual(self.machineState(fork), self.machineState(self.cpu))
+
+    def testShouldKeepPendingKeyWait(self):
+        self.cpu.waitingRegister = 0x03
+        fork = createCpu()
+        fork.restore(self.cpu.snapshot())
+        self.assertEqual(fork.waitingRegister, 0x03)
+
+    def testShouldInvalidateCachedCodeOnRestore(self):
+        blob = self.cpu.snapshot()
+        self.cpu.run(3)
+        self.cpu.memory.write(CpuConstants.PC_BEFORE, b"\x61\x99")
+        self.cpu.restore(blob)
+        self.cpu.run(2)
+        self.assertEqual(self.cpu.vRegister[1], 0x00)
+        self.assertEqual(self.cpu.programCounter, 0x206 + 2)
+
+    def testShouldKeepCodeOnUntouchedPages(self):
+        cpu = createCpu(self.PROGRAM, CPU.ENGINE_TRANSLATOR)
+        blob = cpu.snapshot()
+        cpu.run(6)
+        cpu.memory.write(0x800, b"\x01")
+        translations = cpu.blockTranslator.translations
+
+        cpu.restore(blob)
+        cpu.run(6)
+        self.assertEqual(cpu.blockTranslator.translations, translations)
+        self.assertEqual(cpu.memory.memory[0x800], 0)
+
+    def testShouldRejectForeignData(self):
+        blob = bytearray(self.cpu.snapshot())
+        blob[0:3] = b"XYZ"
+
+        with self.assertRaises(ValueError):
+            self.cpu.restore(bytes(blob))
+
+    def testShouldHashEqualStatesEqually(self):
+        first = Snapshot.digest(self.cpu.snapshot())
+        self.assertEqual(first, Snapshot.digest(self.cpu.snapshot()))
+
+        self.cpu.run(1)
+        self.assertNotEqual(first, Snapshot.digest(self.cpu.snapshot()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+from cpu import CPU
+from disassembler import Disassembler
+from memory import Memory
+from quirks import QuirkProfile
+from run_result import RunResult
+from screen import Screen
+from snapshot import Snapshot
+from cpu_constants import CpuConstants, createCpu, loadProgram
+
+
+class SuperChipTest(unittest.TestCase):
+    XO_CHIP_MEMORY = 0x10000
+
+    # Goes hi-res, draws a 16x16 block and scrolls it down and right
+    HIRES = [
+        0x00FF,  # 0x200: high resolution
+        0x6078,  # 0x202: V0 = 120
+        0xA300,  # 0x204: I = 0x300
+        0xD000,  # 0x206: draw 16x16 at V0, V0
+        0x00C2,  # 0x208: scroll down 2
+        0x00FB,  # 0x20A: scroll right 4
+        0x120C,  # 0x20C: jump 0x20C
+    ]
+    # Loads I from beyond 4 KB and draws one sprite row into both planes
+    PLANES = [
+        0xF000,  # 0x200: I = 0x1234
+        0x1234,  # 0x202
+        0xF301,  # 0x204: select planes 1 and 2
+        0xD011,  # 0x206: draw 1 row at V0, V1
+        0x3000,  # 0x208: skip if V0 == 0, past the whole of
+        0xF000,  # 0x20A: I = 0xFFFF
+        0xFFFF,  # 0x20C
+        0x120E,  # 0x20E: jump 0x20E
+    ]
+
+    def tearDown(self):
+        pass
+
+    def runHires(self, engine=CPU.ENGINE_INTERPRETER):
+        cpu = createCpu(self.HIRES, engine, QuirkProfile.SCHIP)
+        cpu.memory.write(0x300, b"\xFF\xFF" * 16)
+        cpu.run(20)
+        return cpu
+
+    def testShouldDrawAndScrollInHighResolution(self):
+        cpu = self.runHires()
+        screen = cpu.screen
+
+        self.assertEqual((screen.width, screen.height), (128, 64))
+        # An 8x8 corner of the block is visible at 120, 56, then scrolled
+        self.assertEqual(screen.getPixel(124, 58), 1)
+        self.assertEqual(screen.getPixel(127, 63), 1)
+        self.assertEqual(screen.getPixel(124, 57), 0)
+        self.assertEqual(screen.getPixel(123, 60), 0)
+        self.assertEqual(
+            sum(bin(byte).count("1") for byte in screen.screen), 4 * 6
+        )
+
+    def testTranslatorShouldMatchInHighResolution(self):
+        interpreted = self.runHires()
+        translated = self.runHires(CPU.ENGINE_TRANSLATOR)
+        self.assertEqual(translated.snapshot(), interpreted.snapshot())
+
+    def testWatchedPlaneReadShouldStopBeforeAnyDrawing(self):
+        program = [
+            0xF301,  # 0x200: select planes 1 and 2
+            0xA300,  # 0x202: I = 0x300
+            0xD001,  # 0x204: draw 1 row into each plane
+        ]
+        cpu = createCpu(program, quirks=QuirkProfile.XO_CHIP, planes=2)
+        cpu.memory.write(0x300, b"\xFF\xFF")
+        debugger = cpu.enableDebugging()
+        debugger.addWatchpoint(0x301, read=True, write=False)
+
+        self.assertEqual(cpu.run(10).reason, RunResult.WATCHPOINT)
+        self.assertEqual(cpu.screen.planes[0][0], 0)
+
+        # Resuming draws each plane once
+        cpu.run(1)
+        self.assertEqual(cpu.screen.planes[0][0], 0xFF)
+        self.assertEqual(cpu.screen.planes[1][0], 0xFF)
+        self.assertEqual(cpu.vRegister[CpuConstants.V_CARRY], 0)
+
+    def testExtensionsShouldBeUnknownOutsideTheirProfiles(self):
+        cpu = createCpu(self.HIRES)
+        result = cpu.run(1)
+        self.assertIsNotNone(result.exception)
+        self.assertEqual(cpu.screen.width, CpuConstants.SCREEN_W)
+
+    def testShouldLoadLongAddressesAndDrawPlanes(self):
+        for engine in (CPU.ENGINE_INTERPRETER, CPU.ENGINE_TRANSLATOR):
+            with self.subTest(engine=engine):
+                cpu = createCpu(
+                    self.PLANES, engine, QuirkProfile.XO_CHIP,
+                    self.XO_CHIP_MEMORY, 2
+                )
+                cpu.memory.write(0x1234, b"\xC0\x30")
+                cpu.run(6)
+
+                self.assertEqual(cpu.indexRegister, 0x1234)
+                self.assertEqual(cpu.programCounter, 0x20E)
+                cpu.screen.swapBuffers()
+                self.assertEqual(
+                    [cpu.screen.front.getPixel(x, 0) for x in range(4)],
+                    [1, 1, 2, 2]
+                )
+
+    def testSnapshotShouldRestoreResolutionAndPlanes(self):
+        cpu = createCpu(
+            self.PLANES, quirks=QuirkProfile.XO_CHIP,
+            memorySize=self.XO_CHIP_MEMORY, planes=2
+        )
+        cpu.memory.write(0x1234, b"\xC0\x30")
+        blob = cpu.snapshot()
+        cpu.run(6)
+        cpu.screen.setResolution(*Screen.HIGH_RESOLUTION)
+        after = cpu.snapshot()
+
+        cpu.restore(blob)
+        self.assertEqual(cpu.screen.width, CpuConstants.SCREEN_W)
+        self.assertEqual(cpu.screen.selectedPlanes, 0x01)
+        self.assertEqual(cpu.snapshot(), blob)
+
+        cpu.restore(after)
+        self.assertEqual(cpu.screen.width, 128)
+        self.assertEqual(cpu.screen.selectedPlanes, 0x03)
+
+        other = createCpu(
+            self.PLANES, quirks=QuirkProfile.XO_CHIP,
+            memorySize=self.XO_CHIP_MEMORY
+        )
+
+        with self.assertRaises(ValueError):
+            other.restore(blob)
+
+        self.assertEqual(Snapshot.VERSION, 3)
+
+    def testDisassemblerShouldStepOverLongLoads(self):
+        memory = Memory(self.XO_CHIP_MEMORY)
+        loadProgram(memory, self.PLANES)
+        analysis = Disassembler(memory, end=0x210).analyse()
+
+        self.assertEqual(
+            sorted(analysis.instructions),
+            [0x200, 0x204, 0x206, 0x208, 0x20A, 0x20E]
+        )
+        self.assertIn(0x1234, analysis.dataReferences)
+        self.assertIn("0x200: F000 1234    LD I, 0x1234", analysis.listing())
+        self.assertEqual(analysis.regions(), [(0x200, 0x210, "code")])
+
+
+if __name__ == "__main__":
+    unittest.main()
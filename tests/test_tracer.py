@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import unittest
+from cpu import CPU
+from tracer import Tracer, TraceReader, main
+from cpu_constants import createCpu
+
+
+class TracerTest(unittest.TestCase):
+    # Counts V0 up, storing its digits at I each pass
+    BCD_LOOP = [
+        0xA300,  # 0x200: I = 0x300
+        0x7007,  # 0x202: V0 += 7
+        0xF033,  # 0x204: store BCD of V0 at I
+        0x1202,  # 0x206: jump 0x202
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def tearDown(self):
+        pass
+
+    def trace(self, name, cycles, compress=False, cpu=None):
+        path = os.path.join(self.directory, name)
+        cpu = cpu or createCpu(self.BCD_LOOP)
+        cpu.enableTracing(path, compress)
+        cpu.run(cycles)
+        cpu.disableTracing()
+        return path
+
+    def testShouldRecordStateAfterEachInstruction(self):
+        records = list(TraceReader(self.trace("a.trace", 4)))
+        self.assertEqual(len(records), 4)
+        self.assertEqual(
+            [r.programCounter for r in records], [0x200, 0x202, 0x204, 0x206]
+        )
+        self.assertEqual([r.cycle for r in records], [0, 1, 2, 3])
+        self.assertEqual(records[0].indexRegister, 0x300)
+        self.assertEqual(records[1].vRegister[0], 7)
+        self.assertEqual(records[2].opcode, 0xF033)
+        self.assertEqual(
+            (records[2].writeStart, records[2].writeLength), (0x300, 3)
+        )
+        self.assertEqual(records[3].writeLength, 0)
+
+    def testShouldSpanChunksWithAndWithoutCompression(self):
+        cycles = Tracer.CHUNK_RECORDS * 2 + 5
+        plain = self.trace("plain.trace", cycles)
+        packed = self.trace("packed.trace", cycles, compress=True)
+        self.assertEqual(sum(1 for _ in TraceReader(plain).rawRecords()),
+                         cycles)
+        self.assertLess(os.path.getsize(packed), os.path.getsize(plain))
+        self.assertIsNone(TraceReader.firstDivergence(plain, packed))
+
+    def testShouldFindTheFirstDivergence(self):
+        cycles = Tracer.CHUNK_RECORDS + 100
+        pathA = self.trace("a.trace", cycles)
+        pathB = os.path.join(self.directory, "b.trace")
+        cpu = createCpu(self.BCD_LOOP)
+        cpu.enableTracing(pathB, True)
+        cpu.run(Tracer.CHUNK_RECORDS + 10)
+        cpu.vRegister[5] = 1
+        cpu.run(90)
+        cpu.disableTracing()
+
+        index, recordA, recordB = TraceReader.firstDivergence(pathA, pathB)
+        self.assertEqual(index, Tracer.CHUNK_RECORDS + 10)
+        self.assertEqual(recordA.vRegister[5], 0)
+        self.assertEqual(recordB.vRegister[5], 1)
+
+    def testShouldReportATraceEndingEarly(self):
+        pathA = self.trace("a.trace", 10)
+        pathB = self.trace("b.trace", 7)
+        index, recordA, recordB = TraceReader.firstDivergence(pathA, pathB)
+        self.assertEqual(index, 7)
+        self.assertEqual(recordA.cycle, 7)
+        self.assertIsNone(recordB)
+        self.assertEqual(main([pathA, pathB]), 1)
+        self.assertEqual(main([pathA, pathA]), 0)
+
+    def testDisablingShouldRestoreTheTranslator(self):
+        cpu = createCpu(self.BCD_LOOP, CPU.ENGINE_TRANSLATOR)
+        translator = cpu.blockTranslator
+        self.trace("a.trace", 10, cpu=cpu)
+        self.assertIs(cpu.blockTranslator, translator)
+        self.assertIs(cpu.dispatchTable, cpu.plainDispatchTable)
+        self.assertIsNone(cpu.tracer)
+
+    def testShouldUnwrapLayersInAnyOrder(self):
+        cpu = createCpu(self.BCD_LOOP, CPU.ENGINE_TRANSLATOR)
+        translator = cpu.blockTranslator
+        path = os.path.join(self.directory, "a.trace")
+        profiler = cpu.enableProfiling()
+        cpu.enableTracing(path)
+        cpu.run(10)
+
+        # The profiler leaves first, though it was installed first
+        cpu.disableProfiling()
+        self.assertIsNone(cpu.blockTranslator)
+        cpu.run(10)
+        cpu.disableTracing()
+        cpu.run(10)
+
+        self.assertEqual(sum(1 for _ in TraceReader(path)), 20)
+        self.assertEqual(profiler.instructionCount(), 10)
+        self.assertIs(cpu.dispatchTable, cpu.plainDispatchTable)
+        self.assertIs(cpu.blockTranslator, translator)
+        self.assertEqual(cpu.instrumentation, [])
+
+
+if __name__ == "__main__":
+    unittest.main()